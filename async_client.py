@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+import codec
+from chunks import ChunkAssembler, is_chunked
+from client import RELAY_URL, build_command, build_message, decode_message, new_correlation_id, select_messages
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Upper bound on pooled keep-alive connections to the relay
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncAgentForgeClient:
+    """
+    asyncio counterpart of AgentForgeClient.
+    Same send/poll/wait semantics, but a single event loop can keep hundreds of
+    commands in flight over one pooled aiohttp connector.
+
+    Use as an async context manager (or call close()) to release the pool:
+
+        async with AsyncAgentForgeClient() as client:
+            await client.send_command("heartbeat")
+    """
+
+    def __init__(self, relay_url=RELAY_URL, max_connections=DEFAULT_MAX_CONNECTIONS, chunk_dir=None):
+        """
+        :param chunk_dir: Directory chunked results over chunks.INLINE_LIMIT bytes are
+                          written to; None keeps them in memory
+        """
+        self.relay_url = relay_url
+        self.inbox_endpoint = f"{relay_url}/inbox/supervisor"
+        self.outbox_endpoint = f"{relay_url}/outbox/chatgpt"
+        self.max_connections = max_connections
+        self.assembler = ChunkAssembler(output_dir=chunk_dir)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def session(self):
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  json_serialize=lambda obj: codec.dumps(obj).decode("utf-8"))
+        return self._session
+
+    async def close(self):
+        self.assembler.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def send_command(self, action, data=None, target_agent="supervisor", correlation_id=None):
+        """
+        Sends a command to the AgentForge inbox.
+        :param action: The action string
+        :param data: Dictionary containing payload data
+        :param target_agent: The agent inbox to target (default: supervisor)
+        :param correlation_id: ID stamped on the message (generated if omitted)
+        """
+        if correlation_id is None:
+            correlation_id = new_correlation_id()
+
+        endpoint = f"{self.relay_url}/inbox/{target_agent}"
+        payload = build_command(action, data, correlation_id)
+
+        try:
+            logger.info(f"Sending action: {action} to {endpoint}")
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with self.session.post(endpoint, json=payload, timeout=timeout) as response:
+                if response.status in [200, 201]:
+                    return {
+                        "status": "success",
+                        "message": "Command sent successfully",
+                        "correlation_id": correlation_id
+                    }
+                text = await response.text()
+                return {
+                    "status": "error",
+                    "message": f"HTTP {response.status}: {text}"
+                }
+        except aiohttp.ClientConnectionError:
+            return {"status": "error", "message": "Connection refused. Is AgentForge Relay running?"}
+        except Exception as e:
+            logger.error(f"Error sending command: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def poll_responses(self, limit=10, timeout=5, min_timestamp=0, target_agent="chatgpt",
+                             correlation_id=None, cursor=None):
+        """
+        Polls the AgentForge outbox for messages.
+        :param limit: Max number of messages to process
+        :param timeout: Timeout for the HTTP request
+        :param min_timestamp: Ignore messages older than this timestamp
+        :param target_agent: The agent outbox to poll (e.g. chatgpt, executor)
+        :param correlation_id: Only return replies to this command
+        :param cursor: OutboxCursor to poll incrementally from
+        :return: List of processed message dictionaries
+        """
+        endpoint = f"{self.relay_url}/outbox/{target_agent}"
+        params = {"after": cursor.last_id} if cursor is not None and cursor.last_id else None
+        try:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+            async with self.session.get(endpoint, params=params, timeout=client_timeout) as response:
+                if response.status != 200:
+                    logger.warning(f"Failed to poll outbox. Status: {response.status}")
+                    return []
+                data = await response.json(loads=codec.loads)
+        except aiohttp.ClientConnectionError:
+            logger.warning("Connection refused while polling.")
+            return []
+        except Exception as e:
+            logger.error(f"Error polling responses: {e}")
+            return []
+
+        return select_messages(data.get("messages", []), self._process_message, limit=limit,
+                               min_timestamp=min_timestamp, correlation_id=correlation_id, cursor=cursor)
+
+    def _process_message(self, msg):
+        """
+        Processes a raw message from the outbox, handling base64 decoding if needed.
+        Chunks of a multi-part payload yield None until the last one arrives.
+        """
+        if is_chunked(msg):
+            return self.assembler.add(msg, build_message)
+        return decode_message(msg)
+
+    async def wait_for_response(self, action_id=None, timeout_seconds=30, min_timestamp=0,
+                                target_agent="chatgpt", poll_interval=1):
+        """
+        Polls until a response is received or timeout occurs, yielding to the
+        event loop between polls.
+        :param action_id: Correlation ID returned by send_command
+        """
+        start_time = time.monotonic()
+        while (time.monotonic() - start_time) < timeout_seconds:
+            msgs = await self.poll_responses(min_timestamp=min_timestamp, target_agent=target_agent,
+                                             correlation_id=action_id)
+            if msgs:
+                return msgs
+            await asyncio.sleep(poll_interval)
+        return []
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from async_client import AsyncAgentForgeClient
+from client import AgentForgeClient
+from stub_relay import StubRelay
+
+# Compares command throughput of the sync and async clients against a local
+# stand-in relay. Each command is a send to the executor inbox followed by a
+# poll of its outbox, i.e. the same round-trip wait_for_response performs.
+
+AGENTS = ["supervisor", "executor", "planner"]
+OUTBOX = {"supervisor": "chatgpt", "executor": "executor", "planner": "planner"}
+
+
+def run_sync(relay_url, count):
+    client = AgentForgeClient(relay_url=relay_url)
+    start = time.perf_counter()
+    for i in range(count):
+        agent = AGENTS[i % len(AGENTS)]
+        client.send_command("benchmark", {"n": i}, target_agent=agent)
+        client.poll_responses(limit=1, target_agent=OUTBOX[agent])
+    return time.perf_counter() - start
+
+
+async def run_async(relay_url, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncAgentForgeClient(relay_url=relay_url, max_connections=concurrency) as client:
+        async def one(i):
+            agent = AGENTS[i % len(AGENTS)]
+            async with semaphore:
+                await client.send_command("benchmark", {"n": i}, target_agent=agent)
+                await client.poll_responses(limit=1, target_agent=OUTBOX[agent])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async AgentForge client throughput.")
+    parser.add_argument("--count", type=int, default=300, help="Commands per client")
+    parser.add_argument("--concurrency", type=int, default=50, help="Max in-flight async commands")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated relay latency per request (s)")
+    args = parser.parse_args()
+
+    logging.getLogger("AntigravitySupervisorClient").setLevel(logging.WARNING)
+
+    with StubRelay(latency=args.latency) as relay:
+        sync_elapsed = run_sync(relay.url, args.count)
+        async_elapsed = asyncio.run(run_async(relay.url, args.count, args.concurrency))
+
+    results = {
+        "count": args.count,
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "sync": {"seconds": round(sync_elapsed, 3), "commands_per_s": round(args.count / sync_elapsed, 1)},
+        "async": {"seconds": round(async_elapsed, 3), "commands_per_s": round(args.count / async_elapsed, 1)},
+        "speedup": round(sync_elapsed / async_elapsed, 2),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
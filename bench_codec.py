@@ -0,0 +1,103 @@
+import argparse
+import base64
+import glob
+import json
+import os
+import time
+
+import codec
+from client import AgentForgeClient
+from stub_relay import StubRelay
+
+# Relay traffic codec: stdlib json against orjson for encoding commands and
+# decoding outbox responses, and bytes on the wire with and without gzip/zstd
+# for a send -> reply round-trip against the stub relay.
+
+SIZES = (100 * 1024, 1024 * 1024, 5 * 1024 * 1024)
+REPEATS = 5
+
+
+def source_text(size):
+    """About `size` characters of this repo's own Python source, repeated as needed."""
+    parts = []
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            parts.append(f.read())
+    text = "\n".join(parts)
+    return (text * (size // len(text) + 1))[:size]
+
+
+def command_payload(size):
+    """An execute_agent command whose prompt carries `size` characters of source."""
+    return {"id": "bench", "correlation_id": "bench", "timestamp": time.time(), "sender": "chatgpt",
+            "payload": {"action": "execute_agent", "data": {"prompt": source_text(size), "files": ["client.py"]}}}
+
+
+def outbox_response(size):
+    """An outbox response holding one base64 reply of `size` bytes."""
+    result = json.dumps({"result": source_text(size)}).encode("utf-8")
+    return {"messages": [{"id": "reply", "timestamp": time.time(), "sender": "executor", "ref_id": "bench",
+                          "payload_chunk": {"content": base64.b64encode(result).decode("ascii"), "is_base64": True}}]}
+
+
+def best_of(fn, repeats=REPEATS):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def json_timings(size):
+    """Encode (command) and decode (outbox response) milliseconds per JSON backend."""
+    command = command_payload(size)
+    body = json.dumps(outbox_response(size)).encode("utf-8")
+    timings = {"json": {"encode_ms": best_of(lambda: json.dumps(command).encode("utf-8")) * 1000,
+                        "decode_ms": best_of(lambda: json.loads(body)) * 1000}}
+    if codec.orjson is not None:
+        timings["orjson"] = {"encode_ms": best_of(lambda: codec.dumps(command)) * 1000,
+                             "decode_ms": best_of(lambda: codec.loads(body)) * 1000}
+    return {backend: {k: round(v, 2) for k, v in values.items()} for backend, values in timings.items()}
+
+
+def wire_bytes(size, encodings):
+    """
+    Sends a command with a `size`-character prompt to a stub relay advertising
+    `encodings` and waits for its echo reply.
+    :return: Bytes sent to the inbox, bytes received from the outbox and round-trip seconds
+    """
+    prompt = source_text(size)
+    capabilities = ("long_poll", "cursor", "batch") + tuple(encodings)
+    with StubRelay(capabilities=capabilities) as relay:
+        client = AgentForgeClient(relay_url=relay.url, transport="long_poll")
+        client.capabilities  # probe /healthz before measuring
+        client.metrics.reset()
+        start = time.perf_counter()
+        result = client.send_command("execute_agent", {"prompt": prompt}, target_agent="executor")
+        replies = client.wait_for_response(action_id=result["correlation_id"], timeout_seconds=30,
+                                           target_agent="executor")
+        elapsed = time.perf_counter() - start
+        assert replies and replies[0]["content"]["data"]["prompt"] == prompt
+        return {"sent": int(client.metrics.counter("agentforge_bytes_sent_total", endpoint="inbox")),
+                "received": int(client.metrics.counter("agentforge_bytes_received_total", endpoint="outbox")),
+                "round_trip_ms": round(elapsed * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON backend speed and compressed bytes on the wire.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Payload sizes in bytes")
+    args = parser.parse_args()
+
+    results = {"json_backend": codec.JSON_BACKEND, "encodings": list(codec.ENCODINGS), "sizes": {}}
+    for size in args.sizes:
+        entry = {"json": json_timings(size), "wire": {"identity": wire_bytes(size, ())}}
+        for encoding in codec.ENCODINGS:
+            entry["wire"][encoding] = wire_bytes(size, (encoding,))
+        results["sizes"][size] = entry
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
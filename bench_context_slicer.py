@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+import context_slicer
+from client import AgentForgeClient
+from stub_relay import StubRelay
+
+# Prompt size and round-trip latency of whole-file prompts against AST
+# slices, for every function, class and method of the given modules. The
+# stub relay's executor answers after seconds_per_kb per KiB of command, a
+# stand-in for turnaround that grows with prompt size; replies echo the
+# command, so relay bytes grow with it in both directions.
+
+DEFAULT_FILES = ("client.py", "scheduler.py", "journal.py")
+DEFAULT_SECONDS_PER_KB = 0.01
+# Round trips measured per target, for the latency part
+LATENCY_TARGETS = 10
+
+PROMPT = ("Please generate a comprehensive `pytest` unit test file for `{target}` in the following Python code.\n\n"
+          "CODE:\n{code}\n\nReturn ONLY the Python code for the test file.\n")
+
+
+def prompt_sizes(path, budget=context_slicer.DEFAULT_BUDGET):
+    """{target: (whole-file prompt chars, sliced prompt chars)} for every target of a module."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return {target: (len(PROMPT.format(target=target, code=source)),
+                     len(PROMPT.format(target=target, code=context_slicer.slice_source(source, target, budget))))
+            for target in context_slicer.targets(source)}
+
+
+def round_trip(client, prompt):
+    start = time.perf_counter()
+    sent = client.send_command("execute_agent", {"prompt": prompt}, target_agent="executor")
+    replies = client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=60, target_agent="executor")
+    assert replies, "no reply from the stub executor"
+    return time.perf_counter() - start
+
+
+def latencies(path, targets, seconds_per_kb, budget=context_slicer.DEFAULT_BUDGET):
+    """Median round trip (s) and relay bytes for whole-file and sliced prompts of `targets`."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    results = {}
+    for variant in ("whole_file", "sliced"):
+        with StubRelay(seconds_per_kb=seconds_per_kb) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="long_poll")
+            client.capabilities
+            client.metrics.reset()
+            samples = []
+            for target in targets:
+                code = source if variant == "whole_file" else context_slicer.slice_source(source, target, budget)
+                samples.append(round_trip(client, PROMPT.format(target=target, code=code)))
+            results[variant] = {
+                "median_s": round(statistics.median(samples), 4),
+                "bytes_sent": int(client.metrics.counter("agentforge_bytes_sent_total", endpoint="inbox")),
+                "bytes_received": int(client.metrics.counter("agentforge_bytes_received_total", endpoint="outbox")),
+            }
+            client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-file prompts vs AST slices: size and round-trip latency.")
+    parser.add_argument("files", nargs="*", default=list(DEFAULT_FILES), help="Modules to slice")
+    parser.add_argument("--budget", type=int, default=context_slicer.DEFAULT_BUDGET, help="Slice budget (chars)")
+    parser.add_argument("--seconds-per-kb", type=float, default=DEFAULT_SECONDS_PER_KB,
+                        help="Simulated executor time per KiB of prompt")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {"budget": args.budget, "seconds_per_kb": args.seconds_per_kb, "files": {}}
+    for name in args.files:
+        path = name if os.path.isabs(name) else os.path.join(here, name)
+        sizes = prompt_sizes(path, args.budget)
+        whole = sum(w for w, _ in sizes.values())
+        sliced = sum(s for _, s in sizes.values())
+        ratios = sorted(s / w for w, s in sizes.values())
+        sample = list(sizes)[::max(1, len(sizes) // LATENCY_TARGETS)][:LATENCY_TARGETS]
+        results["files"][name] = {
+            "targets": len(sizes),
+            "whole_file_chars": whole // len(sizes),
+            "sliced_chars_mean": sliced // len(sizes),
+            "sliced_chars_max": max(s for _, s in sizes.values()),
+            "size_ratio_median": round(statistics.median(ratios), 3),
+            "latency": latencies(path, sample, args.seconds_per_kb, args.budget),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
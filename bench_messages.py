@@ -0,0 +1,78 @@
+import argparse
+import base64
+import gc
+import json
+import time
+import tracemalloc
+
+from client import decode_message
+
+# Memory held by processed messages once the raw outbox response is gone:
+# the default dicts (decoded content + raw_payload) against compact
+# message.Message objects, with and without the raw payload, before and after
+# their content is read.
+
+RESULT_BYTES = 2048
+
+
+def synthetic_outbox(count, result_bytes=RESULT_BYTES):
+    """JSON text of an outbox response with count base64 executor results."""
+    messages = []
+    for i in range(count):
+        result = json.dumps({"result": "x" * result_bytes, "n": i}).encode("utf-8")
+        messages.append({"id": f"msg-{i}", "timestamp": 1700000000 + i, "sender": "executor", "ref_id": f"cmd-{i}",
+                         "payload_chunk": {"content": base64.b64encode(result).decode("ascii"), "is_base64": True}})
+    return json.dumps({"messages": messages})
+
+
+def retained_bytes(body, touch=False, **options):
+    """
+    Bytes still allocated after decoding every message of body with
+    decode_message(**options) and dropping the parsed response.
+    :param touch: Read each message's content before measuring
+    :return: (bytes, seconds spent decoding; inflated by tracemalloc, compare them only to each other)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    raw = json.loads(body)["messages"]
+    start = time.perf_counter()
+    processed = [decode_message(msg, **options) for msg in raw]
+    if touch:
+        for message in processed:
+            message["content"]
+    elapsed = time.perf_counter() - start
+    del raw
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del processed
+    return retained, elapsed
+
+
+VARIANTS = {
+    "dict": {},
+    "dict_no_raw": {"keep_raw": False},
+    "compact": {"compact": True},
+    "compact_no_raw": {"compact": True, "keep_raw": False},
+    "compact_no_raw_read": {"compact": True, "keep_raw": False, "touch": True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory held by processed messages: dicts vs compact Message.")
+    parser.add_argument("--count", type=int, default=10000, help="Synthetic messages")
+    parser.add_argument("--result-bytes", type=int, default=RESULT_BYTES, help="Size of each executor result")
+    args = parser.parse_args()
+
+    body = synthetic_outbox(args.count, args.result_bytes)
+    results = {"count": args.count, "result_bytes": args.result_bytes}
+    for name, options in VARIANTS.items():
+        retained, elapsed = retained_bytes(body, **options)
+        results[name] = {"mb": round(retained / 1e6, 2), "bytes_per_message": retained // args.count,
+                         "decode_ms": round(elapsed * 1000, 1)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,33 @@
+import argparse
+import base64
 import json
+import logging
+import math
 import platform
 import socket
+import statistics
 import subprocess
+import tempfile
 import time
-import requests
 import os
 import hashlib
 
+from report_spool import DEFAULT_SPOOL_DIR, ReportSpool
+
+# Bumped whenever workloads or their sizes change, so the hub only compares like with like
+SCHEMA_VERSION = 2
+DEFAULT_WARMUP = 2
+DEFAULT_REPEAT = 10
+FIBONACCI_ITERATIONS = 100000
+MEMORY_BYTES = 32 * 1024 * 1024
+DISK_BYTES = 16 * 1024 * 1024
+DECODE_PAYLOAD_BYTES = 256 * 1024
+ROUND_TRIPS = 20
+
+# Seconds a run waits for its report to reach the hub before leaving it spooled;
+# a report must never stall the sync run
+REPORT_FLUSH_BUDGET = 10
+
 def get_system_info():
     return {
         "hostname": socket.gethostname(),
@@ -23,27 +44,187 @@ def get_git_revision(repo_path):
 
 def compute_benchmark():
     # Simple Fibonacci calculation to prove compute capability
-    start = time.time()
+    start = time.perf_counter()
     a, b = 0, 1
-    for _ in range(100000):
+    for _ in range(FIBONACCI_ITERATIONS):
         a, b = b, a + b
-    end = time.time()
+    end = time.perf_counter()
     return end - start
 
-def report_to_hub(data, hub_url):
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize(samples, nbytes=None):
+    """
+    Statistics of one workload's timings (seconds). With nbytes, the
+    throughput of the median run is included as MB/s.
+    """
+    summary = {
+        "unit": "s",
+        "runs": len(samples),
+        "median": statistics.median(samples),
+        "p95": percentile(samples, 0.95),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+    }
+    if nbytes:
+        summary["throughput_mb_s"] = nbytes / 1e6 / summary["median"] if summary["median"] else None
+    return summary
+
+def measure(func, warmup=DEFAULT_WARMUP, repeat=DEFAULT_REPEAT):
+    """
+    Times func() `repeat` times after `warmup` untimed calls. func may return
+    its own duration (e.g. to exclude setup); otherwise the call is timed.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        duration = func()
+        samples.append(duration if duration is not None else time.perf_counter() - start)
+    return samples
+
+def bench_memory():
+    buf = bytearray(MEMORY_BYTES)
+    def copy():
+        start = time.perf_counter()
+        bytes(buf)
+        return time.perf_counter() - start
+    return copy, MEMORY_BYTES
+
+def bench_disk():
+    block = os.urandom(1024 * 1024)
+    def write_read():
+        with tempfile.NamedTemporaryFile() as f:
+            start = time.perf_counter()
+            for _ in range(DISK_BYTES // len(block)):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            while f.read(len(block)):
+                pass
+            return time.perf_counter() - start
+    # Written and read back
+    return write_read, 2 * DISK_BYTES
+
+def bench_decode():
+    from client import decode_message
+    result = json.dumps({"result": "x" * DECODE_PAYLOAD_BYTES}).encode("utf-8")
+    msg = {"id": "bench", "timestamp": time.time(), "sender": "executor",
+           "payload_chunk": {"content": base64.b64encode(result).decode("ascii"), "is_base64": True}}
+    def decode():
+        decode_message(msg)
+    return decode, len(result)
+
+def bench_round_trip():
+    """Send + poll of one command against a local stub relay: the client's own overhead."""
+    from client import AgentForgeClient
+    from stub_relay import StubRelay
+    # One INFO line per send would dominate the timing; the caller's level is restored on close
+    logger = logging.getLogger("AntigravitySupervisorClient")
+    level = logger.level
+    logger.setLevel(logging.WARNING)
     try:
-        response = requests.post(hub_url, json=data, timeout=5)
-        if response.status_code == 200:
-            print("[BENCHMARK] Report sent successfully.")
+        relay = StubRelay().start()
+        client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+    except BaseException:
+        logger.setLevel(level)
+        raise
+    def round_trip():
+        start = time.perf_counter()
+        for _ in range(ROUND_TRIPS):
+            sent = client.send_command("benchmark", {}, target_agent="executor")
+            client.poll_responses(limit=1, target_agent="executor", correlation_id=sent["correlation_id"])
+        return (time.perf_counter() - start) / ROUND_TRIPS
+    def close():
+        try:
+            client.close()
+            relay.stop()
+        finally:
+            logger.setLevel(level)
+    return round_trip, close
+
+WORKLOADS = ("cpu_fibonacci", "memory_copy", "disk_io", "decode_base64_json", "client_round_trip")
+
+def run_suite(workloads=WORKLOADS, warmup=DEFAULT_WARMUP, repeat=DEFAULT_REPEAT):
+    """
+    Runs the selected workloads.
+    :return: Versioned result dict: {"schema_version", "warmup", "repeat", "results": {name: summary}}
+    """
+    results = {}
+    for name in workloads:
+        if name == "cpu_fibonacci":
+            results[name] = summarize(measure(compute_benchmark, warmup, repeat))
+        elif name == "memory_copy":
+            func, nbytes = bench_memory()
+            results[name] = summarize(measure(func, warmup, repeat), nbytes)
+        elif name == "disk_io":
+            func, nbytes = bench_disk()
+            results[name] = summarize(measure(func, warmup, repeat), nbytes)
+        elif name == "decode_base64_json":
+            func, nbytes = bench_decode()
+            results[name] = summarize(measure(func, warmup, repeat), nbytes)
+        elif name == "client_round_trip":
+            func, close = bench_round_trip()
+            try:
+                results[name] = summarize(measure(func, warmup, repeat))
+            finally:
+                close()
         else:
-            print(f"[BENCHMARK] Hub rejected report: {response.text}")
-    except Exception as e:
-        print(f"[BENCHMARK] Failed to send report: {e}")
+            raise ValueError(f"Unknown workload: {name}")
+    return {"schema_version": SCHEMA_VERSION, "warmup": warmup, "repeat": repeat, "results": results}
+
+def report_to_hub(data, hub_url, spool=None, budget=REPORT_FLUSH_BUDGET):
+    """
+    Spools the report, then flushes the spool (earlier unsent reports
+    included) in the background for at most `budget` seconds. Whatever is
+    not sent by then stays spooled for the next run or `--flush`.
+    """
+    spool = spool or ReportSpool()
+    if not spool.enqueue(data):
+        print("[BENCHMARK] Report already spooled.")
+    flusher = spool.start_flush(hub_url, deadline=time.monotonic() + budget)
+    flusher.join(budget)
+    if flusher.is_alive():
+        spool.stop()
+    result = flusher.result or {"sent": 0, "pending": len(spool.pending())}
+    print_flush_result(result)
+    return result
+
+def print_flush_result(result):
+    if not result["sent"] and not result["pending"]:
+        print("[BENCHMARK] No reports waiting for the hub.")
+    if result["sent"]:
+        print(f"[BENCHMARK] Sent {result['sent']} report(s) to the hub.")
+    if result["pending"]:
+        reason = f": {result['error']}" if result.get("error") else ""
+        print(f"[BENCHMARK] {result['pending']} report(s) left in the spool for the next flush{reason}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark this spoke and report to the Hub.")
+    parser.add_argument("--only", help=f"Comma-separated workloads to run ({', '.join(WORKLOADS)})")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Untimed runs per workload")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per workload")
+    parser.add_argument("--no-report", action="store_true", help="Print the results without sending them")
+    parser.add_argument("--flush", action="store_true",
+                        help="Only send spooled reports to the hub (with backoff), without benchmarking")
+    parser.add_argument("--spool", default=DEFAULT_SPOOL_DIR, help="Directory of reports waiting for the hub")
+    args = parser.parse_args()
+    # Uses the same default IP or env var
+    hub_url = os.environ.get("AGENTFORGE_HUB_REPORT_URL", "http://100.111.236.92:5000/api/report")
+
+    if args.flush:
+        print_flush_result(ReportSpool(args.spool).drain(hub_url))
+        return
+
     # Configuration
     # We assume this script runs in antigravity_integration, so we look for sibling repos
     root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    suite = run_suite(args.only.split(",") if args.only else WORKLOADS, warmup=args.warmup, repeat=args.repeat)
     
     # 1. Collect Info
     data = {
@@ -51,7 +232,9 @@ def main():
         "system": get_system_info(),
         "hostname": socket.gethostname(),
         "status": "online",
-        "benchmark_score": compute_benchmark(),
+        # Kept for hubs that predate the suite: median Fibonacci time
+        "benchmark_score": suite["results"].get("cpu_fibonacci", {}).get("median"),
+        "benchmark": suite,
         "repos": {}
     }
     
@@ -67,9 +250,9 @@ def main():
     print(json.dumps(data, indent=2))
     
     # 3. Report
-    # Uses the same default IP or env var
-    hub_url = os.environ.get("AGENTFORGE_HUB_REPORT_URL", "http://100.111.236.92:5000/api/report")
-    report_to_hub(data, hub_url)
+    if args.no_report:
+        return
+    report_to_hub(data, hub_url, ReportSpool(args.spool))
 
 if __name__ == "__main__":
     main()
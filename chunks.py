@@ -0,0 +1,212 @@
+import base64
+import binascii
+import codecs
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import codec
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Decoded bytes kept in memory per message before spilling to a temp file
+SPOOL_MEMORY_LIMIT = 1024 * 1024
+# Results larger than this are written to output_dir (when set) instead of inlined
+INLINE_LIMIT = 1024 * 1024
+# Seconds to wait for the missing chunks of a message before dropping it
+CHUNK_TIMEOUT = 120
+# Block size used when reading a spooled result back
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def is_chunked(msg):
+    """
+    True for one piece of a multi-part payload. Chunked messages carry
+    payload_chunk.message_id, .sequence (0-based) and .total.
+    """
+    chunk = msg.get("payload_chunk") or {}
+    return (chunk.get("total") or 1) > 1
+
+
+class _PendingPayload:
+    """Decode state of one chunked payload; decoded bytes go to a spool file."""
+
+    def __init__(self, first_msg, total):
+        self.first_msg = first_msg
+        self.total = total
+        self.next_sequence = 0
+        self.out_of_order = {}
+        self.remainder = ""
+        self.size = 0
+        self.started = time.monotonic()
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+
+    def add(self, sequence, content, is_base64):
+        if sequence < self.next_sequence or sequence in self.out_of_order:
+            return  # duplicate delivery
+        self.out_of_order[sequence] = (content, is_base64)
+        # Only chunks that arrived early are buffered; in-order ones are written straight through
+        while self.next_sequence in self.out_of_order:
+            self._write(*self.out_of_order.pop(self.next_sequence))
+            self.next_sequence += 1
+
+    def _write(self, content, is_base64):
+        if not is_base64:
+            data = content.encode("utf-8")
+        else:
+            # base64 decodes in 4-character groups; carry the tail to the next chunk
+            encoded = self.remainder + content
+            usable = len(encoded) - len(encoded) % 4
+            self.remainder = encoded[usable:]
+            data = base64.b64decode(encoded[:usable], validate=False)
+        self.spool.write(data)
+        self.size += len(data)
+
+    @property
+    def complete(self):
+        return self.next_sequence >= self.total
+
+    def read_text(self):
+        """Decodes the spooled bytes as UTF-8 block by block."""
+        self.spool.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = []
+        while True:
+            block = self.spool.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            parts.append(decoder.decode(block))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
+    def close(self):
+        self.spool.close()
+
+
+def _file_name(key):
+    """
+    File name for a payload in output_dir. The key comes from the relay, so it
+    is reduced to a plain name (no separators or dots) with a hash of the full
+    key to keep distinct keys apart.
+    """
+    digest = hashlib.sha256(str(key).encode("utf-8")).hexdigest()[:16]
+    return f"{re.sub(r'[^A-Za-z0-9_-]', '_', str(key))[:64]}-{digest}.out"
+
+
+class ChunkAssembler:
+    """
+    Reassembles payloads the relay splits over several outbox messages.
+
+    Chunks are grouped by payload_chunk.message_id and written in sequence
+    order; base64 is decoded chunk by chunk into a spooled temp file, so peak
+    memory for a multi-MB result stays close to one chunk rather than the
+    base64 text + decoded bytes + decoded string. Out-of-order chunks are held
+    until the gap is filled; payloads still missing chunks after `timeout`
+    seconds are dropped by a background timer, armed while any are pending.
+    Safe to feed from several router threads at once.
+
+    Results up to INLINE_LIMIT bytes become the message 'content' like any
+    other message. Larger results are written to output_dir (when given) and
+    'content' becomes {"path": ..., "bytes": ...}.
+    """
+
+    def __init__(self, timeout=CHUNK_TIMEOUT, output_dir=None):
+        self.timeout = timeout
+        self.output_dir = output_dir
+        self.expired = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, msg, finish):
+        """
+        Feeds one chunk message.
+        :param finish: Callable(first_msg, content) building the processed message
+        :return: The processed message once the payload is complete, else None
+        """
+        self.expire()
+        chunk = msg.get("payload_chunk") or {}
+        key = chunk.get("message_id") or msg.get("ref_id") or msg.get("id")
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = _PendingPayload(msg, chunk.get("total", 1))
+                self._pending[key] = pending
+            try:
+                pending.add(chunk.get("sequence", 0), chunk.get("content", ""), chunk.get("is_base64", False))
+            except (binascii.Error, ValueError) as e:
+                logger.error(f"Base64 decoding error in chunk of {key}: {e}")
+                self._discard(key)
+                return finish(pending.first_msg, f"[Decode Error] chunk {chunk.get('sequence')} of {key}")
+            if not pending.complete:
+                self._schedule()
+                return None
+            self._pending.pop(key)
+        try:
+            return finish(pending.first_msg, self._content(key, pending))
+        finally:
+            pending.close()
+
+    def _content(self, key, pending):
+        if pending.size > INLINE_LIMIT and self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, _file_name(key))
+            pending.spool.seek(0)
+            with open(path, "wb") as f:
+                shutil.copyfileobj(pending.spool, f)
+            return {"path": path, "bytes": pending.size}
+        text = pending.read_text()
+        try:
+            return codec.loads(text)
+        except json.JSONDecodeError:
+            return text
+
+    def _schedule(self):
+        """Arms the expiry timer for the oldest pending payload; caller holds the lock."""
+        if self._timer is not None or not self._pending:
+            return
+        oldest = min(pending.started for pending in self._pending.values())
+        self._timer = threading.Timer(max(0, oldest + self.timeout - time.monotonic()) + 0.01, self._sweep)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _sweep(self):
+        with self._lock:
+            self._timer = None
+        self.expire()
+        with self._lock:
+            self._schedule()
+
+    def expire(self, now=None):
+        """Drops payloads whose remaining chunks did not arrive in time."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for key, pending in list(self._pending.items()):
+                if now - pending.started > self.timeout:
+                    logger.warning(f"Dropping payload {key}: received {pending.next_sequence}/{pending.total} "
+                                   f"chunks before timeout.")
+                    self._discard(key)
+                    self.expired += 1
+
+    def _discard(self, key):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.close()
+
+    def close(self):
+        """Stops the expiry timer and drops every incomplete payload."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for key in list(self._pending):
+                self._discard(key)
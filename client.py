@@ -1,8 +1,23 @@
 import requests
+import hashlib
 import json
 import logging
-import base64
+import threading
 import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+
+from requests.adapters import HTTPAdapter
+
+import codec
+from chunks import ChunkAssembler, is_chunked
+from cursor import OutboxCursor
+from message import Message, decode_content, message_correlation_id
+from metrics import Metrics
+from resilience import (CircuitBreaker, CircuitOpenError, RetryPolicy, TransientHTTPError, is_transient_status,
+                        retry_call)
+from transport import RelayStatusError, create_transport, detect_capabilities
 
 # Configuration
 # Default to AgentForge Relay address, but allow override via environment or init
@@ -10,142 +25,661 @@ RELAY_URL = "http://100.111.236.92:5101/agentforge"
 INBOX_ENDPOINT = f"{RELAY_URL}/inbox/supervisor"
 OUTBOX_ENDPOINT = f"{RELAY_URL}/outbox/chatgpt"
 
+# Concurrent sends used by send_batch when the relay has no bulk endpoint
+DEFAULT_BATCH_WORKERS = 8
+# Commands per bulk POST
+BULK_SIZE = 100
+# Outbox each agent writes its replies to (default routing table; agents not
+# listed reply to an outbox of their own name). Override with routes= or load_routes().
+REPLY_OUTBOX = {
+    "supervisor": "chatgpt",
+    "executor": "executor",
+    "planner": "planner",
+}
+# Completion policies of fan_out
+FAN_OUT_POLICIES = ("all", "first", "quorum")
+# Outbox poll interval of fan_out's reply routers (short-poll transports)
+FAN_OUT_POLL_INTERVAL = 0.2
+# Send failures worth retrying; anything else (e.g. HTTP 4xx) is returned as-is
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TransientHTTPError)
+
 logger = logging.getLogger("AntigravitySupervisorClient")
-logging.basicConfig(level=logging.INFO)
+
+# Relay endpoints, as labelled in the transfer metrics
+ENDPOINT_KINDS = ("inbox", "outbox", "blobs", "healthz")
+
+def new_correlation_id():
+    """
+    Generates a client-side correlation ID used to match replies to commands.
+    """
+    return str(uuid.uuid4())
+
+def build_command(action, data, correlation_id):
+    """
+    Constructs the operative JSON payload as defined in system.md.
+    """
+    return {
+        "id": correlation_id, # Echoed back by agents as 'ref_id'
+        "correlation_id": correlation_id,
+        "sender": "chatgpt", # Identification for routing
+        "payload": {
+            "action": action,
+            "data": data if data is not None else {}
+        }
+    }
+
+def build_message(msg, content, keep_raw=True):
+    """
+    Builds the processed dictionary shape for a raw message and its decoded content.
+    """
+    message = {
+        "id": msg.get("id"),
+        "timestamp": msg.get("timestamp"),
+        "sender": msg.get("sender"),
+        "action": msg.get("action"), # Sometimes actions are at top level
+        "correlation_id": message_correlation_id(msg),
+        "content": content,
+    }
+    if keep_raw:
+        message["raw_payload"] = msg # Keep raw just in case
+    return message
+
+def decode_message(msg, compact=False, keep_raw=True):
+    """
+    Decodes a raw outbox message into the processed dictionary shape.
+    Shared by the sync and async clients.
+    :param compact: Return a message.Message whose content is decoded on first access
+    :param keep_raw: Keep the raw message as 'raw_payload'
+    """
+    try:
+        # Check for chunked payload structure
+        payload_chunk = msg.get('payload_chunk', {})
+        content = payload_chunk.get('content', '')
+        is_base64 = payload_chunk.get('is_base64', False)
+
+        # Executor results come back in payload.result with an empty chunk
+        if not content:
+            payload = msg.get('payload')
+            if isinstance(payload, dict) and payload.get('result') is not None:
+                content, is_base64 = payload['result'], False
+
+        if compact:
+            return Message(msg, content, is_base64=is_base64, keep_raw=keep_raw)
+        # Auto-decode base64 if flagged
+        return build_message(msg, decode_content(content, is_base64), keep_raw=keep_raw)
+
+    except Exception as e:
+        logger.error(f"Error processing message: {e}")
+        return None
+
+def select_messages(messages, process, limit=10, min_timestamp=0, correlation_id=None, cursor=None):
+    """
+    Filters a batch of raw outbox messages and decodes the selected ones.
+    With a cursor, already-delivered messages are skipped before decoding and
+    every message examined is recorded on it, so it is never examined twice.
+    """
+    processed_msgs = []
+    for msg in messages:
+        if cursor is not None:
+            if cursor.seen(msg):
+                continue
+            cursor.advance(msg)
+        # Filter by timestamp if provided
+        if msg.get("timestamp", 0) < min_timestamp:
+            continue
+        if correlation_id and message_correlation_id(msg) != correlation_id:
+            continue
+
+        processed = process(msg)
+        if processed:
+            processed_msgs.append(processed)
+            if len(processed_msgs) >= limit:
+                break
+
+    return processed_msgs
+
+def load_routes(path):
+    """
+    Reads an inbox -> reply outbox routing table from a JSON object file,
+    e.g. {"reviewer": "chatgpt"}; entries override the REPLY_OUTBOX defaults.
+    :raises ValueError: If the file is not a JSON object of strings
+    """
+    with open(path, "r") as f:
+        routes = json.load(f)
+    if not isinstance(routes, dict) or not all(isinstance(k, str) and isinstance(v, str)
+                                               for k, v in routes.items()):
+        raise ValueError(f"{path}: expected a JSON object mapping agent inboxes to outboxes")
+    return routes
+
+def error_class(error):
+    """
+    Coarse class of a relay call failure, used as the 'error' metrics label.
+    """
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, TransientHTTPError):
+        return "transient_http"
+    if isinstance(error, RelayStatusError):
+        return "transient_http" if is_transient_status(error.status_code) else "http_status"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    return "other"
+
+def endpoint_kind(url):
+    """
+    Which relay endpoint a request URL targets (inbox, outbox, blobs, healthz or other).
+    """
+    path = url.split("?", 1)[0]
+    for kind in ENDPOINT_KINDS:
+        if f"/{kind}" in path:
+            return kind
+    return "other"
 
 class AgentForgeClient:
-    def __init__(self, relay_url=RELAY_URL):
+    def __init__(self, relay_url=RELAY_URL, transport="auto", retry_policy=None, breaker=None, cache=None,
+                 metrics=None, compact_messages=False, keep_raw=True, routes=None,
+                 journal=None, chunk_dir=None):
+        """
+        :param relay_url: Base URL of the AgentForge Relay
+        :param transport: Outbox transport: "auto" (detect from /healthz), "short_poll",
+                          "long_poll", "sse", or a transport instance
+        :param retry_policy: resilience.RetryPolicy for sends
+        :param breaker: resilience.CircuitBreaker; pass the same one to clients
+                        of the same relay to share its view of relay health
+        :param cache: result_cache.ResultCache consulted by request(); None disables caching
+        :param metrics: metrics.Metrics registry for the hot-path timers and counters
+                        (a private one is created if omitted)
+        :param compact_messages: Return message.Message objects (slots, content decoded
+                                 on first access) instead of dicts from polls
+        :param keep_raw: Keep each raw outbox message as 'raw_payload'; long-running
+                         consumers that only need the content can drop it
+        :param routes: {agent inbox: reply outbox} entries overriding REPLY_OUTBOX
+        :param journal: journal.Journal recording every sent command and received
+                        message; None disables journaling
+        :param chunk_dir: Directory chunked results over chunks.INLINE_LIMIT bytes are
+                          written to (content becomes {"path", "bytes"}); None keeps
+                          them in memory
+        """
         self.relay_url = relay_url
         self.inbox_endpoint = f"{relay_url}/inbox/supervisor"
         self.outbox_endpoint = f"{relay_url}/outbox/chatgpt"
         self.session = requests.Session()
+        # Keep enough pooled connections for send_batch's concurrent sends
+        adapter = HTTPAdapter(pool_maxsize=DEFAULT_BATCH_WORKERS * 2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = codec.accept_encoding()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.session.hooks["response"].append(self._record_transfer)
+        self._transport = transport
+        self._transport_lock = threading.Lock()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self._capabilities = None
+        self.cursors = {}
+        self.assembler = ChunkAssembler(output_dir=chunk_dir)
+        self.cache = cache
+        self.compact_messages = compact_messages
+        self.keep_raw = keep_raw
+        self.routes = dict(REPLY_OUTBOX, **(routes or {}))
+        self.journal = journal
+
+    def _record_transfer(self, response, *args, **kwargs):
+        """
+        requests response hook: counts every relay request and its bytes on the wire.
+        Received bytes come from Content-Length, so streamed bodies are not read here.
+        """
+        endpoint = endpoint_kind(response.url)
+        self.metrics.inc("agentforge_http_requests_total", endpoint=endpoint, status=response.status_code)
+        body = response.request.body
+        if isinstance(body, (bytes, str)):
+            self.metrics.inc("agentforge_bytes_sent_total", len(body), endpoint=endpoint)
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit():
+            self.metrics.inc("agentforge_bytes_received_total", int(length), endpoint=endpoint)
 
-    def send_command(self, action, data=None, target_agent="supervisor"):
+    def _encode(self, payload, headers=None):
+        """
+        Body keyword arguments for a relay POST. The payload is serialised once
+        with the codec; bodies from MIN_COMPRESS_BYTES on are also compressed
+        with the best encoding the relay advertises, so small sends never ask
+        /healthz.
+        """
+        headers = dict(headers or {}, **{"Content-Type": "application/json"})
+        body = codec.dumps(payload)
+        if len(body) < codec.MIN_COMPRESS_BYTES:
+            return {"data": body, "headers": headers}
+        encoding = codec.negotiate(self.capabilities)
+        if encoding:
+            body = codec.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return {"data": body, "headers": headers}
+
+    def reply_outbox(self, target_agent):
+        """The outbox target_agent writes its replies to, per this client's routing table."""
+        return self.routes.get(target_agent, target_agent)
+
+    def _detect_capabilities(self):
+        """Cached /healthz capabilities, or None while the relay is unreachable."""
+        if self._capabilities is None:
+            self._capabilities = detect_capabilities(self.session, self.relay_url)
+        return self._capabilities
+
+    @property
+    def capabilities(self):
+        """
+        Optional protocol features the relay advertises on /healthz
+        (long_poll, sse, cursor, batch, ...). Empty for older relays.
+        """
+        return self._detect_capabilities() or []
+
+    @property
+    def transport(self):
+        """
+        The outbox transport, resolved on first use. Detection is retried
+        on the next poll if the relay could not be reached.
+        """
+        if isinstance(self._transport, str):
+            # Pollers of several outboxes (e.g. fan_out's routers) may get here at once
+            with self._transport_lock:
+                if not isinstance(self._transport, str):
+                    return self._transport
+                capabilities = self._detect_capabilities() if self._transport == "auto" else []
+                transport, conclusive = create_transport(self._transport, self.session, self.relay_url,
+                                                         capabilities)
+                if not conclusive:
+                    return transport
+                if hasattr(transport, "on_bytes"):
+                    transport.on_bytes = lambda n: self.metrics.inc("agentforge_bytes_received_total", n,
+                                                                    endpoint="outbox")
+                self._transport = transport
+        return self._transport
+
+    def close(self):
+        """Stops any open outbox streams and releases pooled connections."""
+        if not isinstance(self._transport, str):
+            self._transport.close()
+        self.assembler.close()
+        self.session.close()
+
+    def send_command(self, action, data=None, target_agent="supervisor", correlation_id=None):
         """
         Sends a command to the AgentForge inbox.
         :param action: The action string
         :param data: Dictionary containing payload data
         :param target_agent: The agent inbox to target (default: supervisor)
+        :param correlation_id: ID stamped on the message (generated if omitted)
+        :return: Result dict; on success it carries the 'correlation_id' to wait on
         """
-        if data is None:
-            data = {}
+        if correlation_id is None:
+            correlation_id = new_correlation_id()
         
         endpoint = f"{self.relay_url}/inbox/{target_agent}"
-        
-        # Construct the operative JSON payload as defined in system.md
-        payload = {
-            "sender": "chatgpt", # Identification for routing
-            "payload": {
-                "action": action,
-                "data": data
-            }
-        }
+        payload = build_command(action, data, correlation_id)
+        # Retries resend the same message id, so the relay can drop duplicates
+        body = self._encode(payload, headers={"Idempotency-Key": correlation_id})
+
+        def post():
+            response = self.session.post(endpoint, timeout=5, **body)
+            if is_transient_status(response.status_code):
+                raise TransientHTTPError(response.status_code, response.text)
+            return response
         
         try:
             logger.info(f"Sending action: {action} to {endpoint}")
-            response = self.session.post(endpoint, json=payload, timeout=5)
+            with self.metrics.timer("agentforge_send_seconds", inbox=target_agent):
+                response = retry_call(post, self.retry_policy, retry_on=RETRYABLE_ERRORS, breaker=self.breaker,
+                                      on_retry=self._log_retry)
             
             if response.status_code in [200, 201]:
-                return {"status": "success", "message": "Command sent successfully"}
+                self._journal("record_sent", target_agent, [payload])
+                return {
+                    "status": "success",
+                    "message": "Command sent successfully",
+                    "correlation_id": correlation_id
+                }
             else:
+                self.metrics.inc("agentforge_errors_total", op="send", error="http_status")
                 return {
                     "status": "error", 
                     "message": f"HTTP {response.status_code}: {response.text}"
                 }
-        except requests.exceptions.ConnectionError:
+        except CircuitOpenError as e:
+            self.metrics.inc("agentforge_errors_total", op="send", error=error_class(e))
+            return {"status": "error", "message": str(e)}
+        except TransientHTTPError as e:
+            self.metrics.inc("agentforge_errors_total", op="send", error=error_class(e))
+            return {"status": "error", "message": str(e)}
+        except requests.exceptions.ConnectionError as e:
+            self.metrics.inc("agentforge_errors_total", op="send", error=error_class(e))
             return {"status": "error", "message": "Connection refused. Is AgentForge Relay running?"}
         except Exception as e:
+            self.metrics.inc("agentforge_errors_total", op="send", error=error_class(e))
             logger.error(f"Error sending command: {e}")
             return {"status": "error", "message": str(e)}
 
-    def poll_responses(self, limit=10, timeout=5, min_timestamp=0, target_agent="chatgpt"):
+    def send_batch(self, commands, max_workers=DEFAULT_BATCH_WORKERS):
+        """
+        Sends many commands at once.
+        Relays advertising the "batch" capability get one bulk POST per target
+        inbox (BULK_SIZE commands each); otherwise the commands are pipelined
+        over the pooled session with at most max_workers in flight.
+        :param commands: Iterable of dicts with 'action' and optional 'data',
+                         'target_agent' and 'correlation_id'
+        :return: One send_command-style result per command, in input order,
+                 each carrying its 'correlation_id'
+        """
+        commands = [dict(c) for c in commands]
+        for command in commands:
+            command.setdefault("target_agent", "supervisor")
+            if not command.get("correlation_id"):
+                command["correlation_id"] = new_correlation_id()
+        if not commands:
+            return []
+
+        results = [None] * len(commands)
+        pending = list(range(len(commands)))
+        if "batch" in self.capabilities:
+            pending = self._send_bulk(commands, results)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+                for index, result in zip(pending, pool.map(lambda i: self.send_command(**commands[i]), pending)):
+                    results[index] = result
+
+        for command, result in zip(commands, results):
+            result.setdefault("correlation_id", command["correlation_id"])
+        return results
+
+    def _send_bulk(self, commands, results):
+        """
+        POSTs commands to /inbox/<agent>/batch, grouped by target inbox.
+        A group is only resent one by one when the relay surely did not take
+        it (no connection, circuit open, or a 4xx such as "bulk unsupported");
+        after a read timeout or a 5xx it may have, so its commands fail instead
+        of being delivered twice.
+        :return: Indexes of commands whose bulk request failed (to be resent one by one)
+        """
+        by_agent = {}
+        for index, command in enumerate(commands):
+            by_agent.setdefault(command["target_agent"], []).append(index)
+
+        failed = []
+        for agent, indexes in by_agent.items():
+            endpoint = f"{self.relay_url}/inbox/{agent}/batch"
+            for start in range(0, len(indexes), BULK_SIZE):
+                group = indexes[start:start + BULK_SIZE]
+                messages = [build_command(commands[i]["action"], commands[i].get("data"),
+                                          commands[i]["correlation_id"]) for i in group]
+                # Same group, same key: retries of the bulk POST can be dropped by the relay
+                key = "batch-" + hashlib.sha256("\n".join(m["id"] for m in messages).encode("utf-8")).hexdigest()
+                body = self._encode({"messages": messages}, headers={"Idempotency-Key": key})
+                def post():
+                    response = self.session.post(endpoint, timeout=5 + len(group) / 100, **body)
+                    if is_transient_status(response.status_code):
+                        raise TransientHTTPError(response.status_code, response.text)
+                    return response
+
+                try:
+                    logger.info(f"Sending {len(group)} actions to {endpoint}")
+                    response = retry_call(post, self.retry_policy, retry_on=RETRYABLE_ERRORS, breaker=self.breaker,
+                                          on_retry=self._log_retry)
+                except (requests.exceptions.ConnectionError, CircuitOpenError) as e:
+                    logger.warning(f"Bulk send failed, falling back to single sends: {e}")
+                    failed.extend(group)
+                    continue
+                except (requests.exceptions.RequestException, TransientHTTPError) as e:
+                    self.metrics.inc("agentforge_errors_total", op="send", error=error_class(e))
+                    logger.warning(f"Bulk send to {agent} failed after the relay may have accepted it: {e}")
+                    for i in group:
+                        results[i] = {"status": "error", "correlation_id": commands[i]["correlation_id"],
+                                      "message": f"Bulk send failed, delivery unknown: {e}"}
+                    continue
+                if response.status_code not in [200, 201]:
+                    logger.warning(f"Bulk send rejected (HTTP {response.status_code}), falling back to single sends")
+                    failed.extend(group)
+                    continue
+                self._journal("record_sent", agent, messages)
+                for i in group:
+                    results[i] = {"status": "success", "message": "Command sent successfully",
+                                  "correlation_id": commands[i]["correlation_id"]}
+        return sorted(failed)
+
+    def poll_responses(self, limit=10, timeout=5, min_timestamp=0, target_agent="chatgpt", correlation_id=None,
+                       wait=0, cursor=None):
         """
         Polls the AgentForge outbox for messages from the supervisor/GPT.
         :param limit: Max number of messages to process (not strictly enforced by API but good for client limits)
         :param timeout: Timeout for the HTTP request
         :param min_timestamp: Ignore messages older than this timestamp
         :param target_agent: The agent outbox to pool (e.g. chatgpt, executor)
+        :param correlation_id: Only return replies to this command
+        :param wait: Seconds the transport may hold the poll open waiting for a
+                     new message (ignored by the short-poll transport)
+        :param cursor: OutboxCursor to poll incrementally from; messages it has
+                       already seen are skipped before decoding
         :return: List of processed message dictionaries
         """
-        endpoint = f"{self.relay_url}/outbox/{target_agent}"
+        since = min_timestamp
+        after = None
+        if cursor is not None:
+            since = max(since, cursor.last_timestamp)
+            after = cursor.last_id
+        if not self.breaker.allow():
+            # Relay known to be down: don't stall on another connect timeout
+            return []
         try:
-            response = self.session.get(endpoint, timeout=timeout)
-            if response.status_code == 200:
-                data = response.json()
-                # API format: {"messages": [...]} or just a list? 
-                # Based on previous analysis, it likely returns a list or a wrapper.
-                # Let's assume standard behavior from supervisor_client.py analysis:
-                messages = data.get("messages", [])
-                
-                processed_msgs = []
-                for msg in messages:
-                    # Filter by timestamp if provided
-                    if msg.get("timestamp", 0) < min_timestamp:
-                        continue
-
-                    processed = self._process_message(msg)
-                    if processed:
-                        processed_msgs.append(processed)
-                        if len(processed_msgs) >= limit:
-                            break
-                
-                return processed_msgs
+            with self.metrics.timer("agentforge_poll_seconds", outbox=target_agent):
+                messages = self.transport.fetch(target_agent, timeout=timeout, wait=wait, since=since, after=after,
+                                                limit=None if correlation_id else limit)
+        except RelayStatusError as e:
+            self.metrics.inc("agentforge_errors_total", op="poll", error=error_class(e))
+            if is_transient_status(e.status_code):
+                self.breaker.record_failure()
             else:
-                logger.warning(f"Failed to poll outbox. Status: {response.status_code}")
-                return []
-        except requests.exceptions.ConnectionError:
+                self.breaker.release()
+            logger.warning(f"Failed to poll outbox. Status: {e.status_code}")
+            return []
+        except requests.exceptions.ConnectionError as e:
+            self.metrics.inc("agentforge_errors_total", op="poll", error=error_class(e))
+            self.breaker.record_failure()
             logger.warning("Connection refused while polling.")
             return []
+        except requests.exceptions.Timeout as e:
+            self.metrics.inc("agentforge_errors_total", op="poll", error=error_class(e))
+            self.breaker.record_failure()
+            logger.warning("Timed out while polling.")
+            return []
         except Exception as e:
+            self.metrics.inc("agentforge_errors_total", op="poll", error=error_class(e))
+            self.breaker.release()
             logger.error(f"Error polling responses: {e}")
             return []
+        self.breaker.record_success()
+        self.metrics.inc("agentforge_messages_received_total", len(messages), outbox=target_agent)
+
+        processed = select_messages(messages, self._process_message, limit=limit, min_timestamp=min_timestamp,
+                                    correlation_id=correlation_id, cursor=cursor)
+        self._journal("record_received", target_agent, processed)
+        return processed
+
+    def _journal(self, method, agent, entries):
+        """Writes to the journal, if any; a journal failure never fails the relay call."""
+        if self.journal is None or not entries:
+            return
+        try:
+            getattr(self.journal, method)(agent, entries)
+        except Exception as e:
+            logger.warning(f"Journal write failed: {e}")
+
+    def _log_retry(self, attempt, error, delay):
+        self.metrics.inc("agentforge_retries_total", error=error_class(error))
+        logger.warning(f"Relay request failed ({error}); retry {attempt + 1} in {delay:.2f}s")
+
+    def cursor(self, target_agent):
+        """Returns this client's persistent OutboxCursor for an agent outbox."""
+        if target_agent not in self.cursors:
+            self.cursors[target_agent] = OutboxCursor()
+        return self.cursors[target_agent]
+
+    def poll_new(self, limit=10, timeout=5, target_agent="chatgpt", wait=0):
+        """
+        Incremental poll: returns only messages not yet delivered by an earlier
+        poll_new call on this client, decoding nothing else.
+        """
+        return self.poll_responses(limit=limit, timeout=timeout, target_agent=target_agent, wait=wait,
+                                   cursor=self.cursor(target_agent))
 
     def _process_message(self, msg):
         """
         Processes a raw message from the outbox, handling base64 decoding if needed.
+        Chunks of a multi-part payload yield None until the last one arrives.
         """
+        with self.metrics.timer("agentforge_decode_seconds"):
+            if is_chunked(msg):
+                return self.assembler.add(msg, self._finish_message)
+            return decode_message(msg, compact=self.compact_messages, keep_raw=self.keep_raw)
+
+    def _finish_message(self, msg, content):
+        """Builds the processed message of a reassembled chunked payload."""
+        if self.compact_messages:
+            return Message(msg, content, keep_raw=self.keep_raw)
+        return build_message(msg, content, keep_raw=self.keep_raw)
+
+    def request(self, action, data=None, target_agent="supervisor", timeout_seconds=300, use_cache=True):
+        """
+        Sends a command and waits for its replies, answering from the result
+        cache when this exact (action, target_agent, data) already ran.
+        :param timeout_seconds: How long to wait for the reply
+        :param use_cache: Set False to force a fresh run (the reply is still cached)
+        :return: Dict with 'status', 'responses' and 'cached'; on a fresh run
+                 also the send's 'correlation_id'
+        """
+        cacheable = self.cache is not None and self.cache.cacheable(action)
+        if cacheable and use_cache:
+            responses = self.cache.get(action, target_agent, data)
+            if responses is not None:
+                logger.info(f"Cache hit for action: {action}")
+                return {"status": "success", "responses": responses, "cached": True}
+
+        started = time.time()
+        result = self.send_command(action, data, target_agent=target_agent)
+        if result["status"] == "error":
+            return dict(result, responses=[], cached=False)
+        responses = self.wait_for_response(action_id=result["correlation_id"], timeout_seconds=timeout_seconds,
+                                           target_agent=self.reply_outbox(target_agent))
+        if cacheable and responses:
+            self.cache.put(action, target_agent, data, responses, elapsed=time.time() - started)
+        return dict(result, responses=responses, cached=False)
+
+    def fan_out(self, action, data=None, targets=("planner", "executor"), timeout_seconds=300, policy="all", count=1,
+                on_result=None):
+        """
+        Sends the same command to several agents at once and collects their
+        replies as they arrive. Replies are polled in parallel, by one router
+        per reply outbox, and the wait ends as soon as the policy is met.
+        :param targets: Agent inboxes to send to
+        :param policy: "all" replies, the "first" `count` replies, or a "quorum" (majority)
+        :param count: Replies needed by the "first" policy
+        :param on_result: Optional callable(target, message) run as each reply arrives
+        :return: Dict with 'status' ("error" if the policy was not met in time),
+                 'required', 'completed' and per-target 'results' holding the
+                 'send_result' and the reply ('response', None if none arrived)
+        """
+        from router import ResponseRouter
+
+        targets = list(dict.fromkeys(targets))
+        if policy not in FAN_OUT_POLICIES:
+            raise ValueError(f"Unknown fan-out policy: {policy}")
+        if not targets:
+            raise ValueError("fan_out needs at least one target")
+        required = {"all": len(targets), "first": max(1, min(count, len(targets))),
+                    "quorum": len(targets) // 2 + 1}[policy]
+
+        routers = {}
+        commands = []
+        for target in targets:
+            outbox = self.reply_outbox(target)
+            if outbox not in routers:
+                routers[outbox] = ResponseRouter(self, outbox=outbox, poll_interval=FAN_OUT_POLL_INTERVAL)
+            commands.append({"action": action, "data": data, "target_agent": target,
+                             "correlation_id": new_correlation_id()})
         try:
-            # Check for chunked payload structure
-            payload_chunk = msg.get('payload_chunk', {})
-            content = payload_chunk.get('content', '')
-            is_base64 = payload_chunk.get('is_base64', False)
-            
-            decoded_data = content
-            
-            # Auto-decode base64 if flagged
-            if is_base64 and content:
-                try:
-                    decoded = base64.b64decode(content).decode('utf-8')
-                    # Try parsing as JSON if it looks like one
-                    try:
-                        decoded_data = json.loads(decoded)
-                    except json.JSONDecodeError:
-                        decoded_data = decoded
-                except Exception as e:
-                    logger.error(f"Base64 decoding error: {e}")
-                    decoded_data = f"[Decode Error] {content}"
-
-            return {
-                "id": msg.get("id"),
-                "timestamp": msg.get("timestamp"),
-                "sender": msg.get("sender"),
-                "action": msg.get("action"), # Sometimes actions are at top level
-                "content": decoded_data,
-                "raw_payload": msg # Keep raw just in case
-            }
-                
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            return None
+            # Expect before sending, so a fast reply cannot slip past its router
+            futures = {routers[self.reply_outbox(c["target_agent"])].expect(c["correlation_id"]): c
+                       for c in commands}
+            sends = self.send_batch(commands)
+            results = {c["target_agent"]: {"send_result": r, "response": None} for c, r in zip(commands, sends)}
+            pending = {f for f, c in futures.items() if results[c["target_agent"]]["send_result"]["status"] != "error"}
+
+            completed = 0
+            deadline = time.time() + timeout_seconds
+            while pending and completed < required and (remaining := deadline - time.time()) > 0:
+                done, pending = wait_futures(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled() or future.exception() is not None:
+                        continue
+                    target = futures[future]["target_agent"]
+                    results[target]["response"] = future.result()
+                    completed += 1
+                    if on_result is not None:
+                        on_result(target, future.result())
+        finally:
+            for router in routers.values():
+                router.close()
+
+        result = {"status": "success" if completed >= required else "error", "policy": policy,
+                  "required": required, "completed": completed, "results": results}
+        if completed < required:
+            result["message"] = f"{completed}/{required} replies within {timeout_seconds}s"
+        return result
 
     def wait_for_response(self, action_id=None, timeout_seconds=30, min_timestamp=0, target_agent="chatgpt"):
         """
         Helper to poll until a response is received or timeout occurs.
+        :param action_id: Correlation ID returned by send_command; when given,
+                          only replies to that command are returned
         """
         start_time = time.time()
-        while (time.time() - start_time) < timeout_seconds:
-            msgs = self.poll_responses(min_timestamp=min_timestamp, target_agent=target_agent)
+        # Private cursor: each poll only examines messages newer than the last one
+        cursor = OutboxCursor()
+        polls = 0
+
+        def done(msgs):
+            self.metrics.observe("agentforge_polls_per_wait", polls, outbox=target_agent)
+            if msgs:
+                self.metrics.observe("agentforge_time_to_first_response_seconds", time.time() - start_time,
+                                     outbox=target_agent)
+            else:
+                self.metrics.inc("agentforge_wait_timeouts_total", outbox=target_agent)
+            return msgs
+
+        while (remaining := timeout_seconds - (time.time() - start_time)) > 0:
+            retry_after = self.breaker.retry_after()
+            if retry_after > 0:
+                # Relay down: sleep until the breaker lets a trial poll through
+                time.sleep(min(retry_after, remaining))
+                continue
+            polls += 1
+            if not self.transport.supports_wait:
+                msgs = self.poll_responses(min_timestamp=min_timestamp, target_agent=target_agent,
+                                           correlation_id=action_id)
+                if msgs:
+                    return done(msgs)
+                time.sleep(1)
+                continue
+
+            # Long-poll / stream: the relay holds the request until something new
+            # arrives, so there is no fixed sleep between polls.
+            poll_started = time.time()
+            examined = len(cursor)
+            msgs = self.poll_responses(min_timestamp=min_timestamp, target_agent=target_agent,
+                                       correlation_id=action_id, wait=remaining, cursor=cursor)
             if msgs:
-                return msgs
-            time.sleep(1)
-        return []
+                return done(msgs)
+            if len(cursor) == examined and (time.time() - poll_started) < min(remaining, 1):
+                # Returned early with nothing new (e.g. relay error): back off
+                time.sleep(1)
+        return done([])
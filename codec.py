@@ -0,0 +1,89 @@
+import json
+import zlib
+
+# Wire codec for relay traffic: JSON (orjson when installed, else the stdlib)
+# and Content-Encoding compression (zstd when the zstandard package is
+# installed, else gzip). Both optional dependencies are picked up at import
+# time and never required.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+# Request body encodings this client can produce, best first
+ENCODINGS = (("zstd",) if zstandard is not None else ()) + ("gzip",)
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+# zlib level 6 and zstd level 3: most of the ratio for a fraction of the CPU
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def dumps(obj):
+    """Serialises obj to UTF-8 JSON bytes. Mappings such as message.Message are written as objects."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=dict)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits or non-string keys: the stdlib copes
+    return json.dumps(obj, default=dict, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """
+    Parses JSON from bytes or str.
+    :raises json.JSONDecodeError: If data is not JSON (orjson's error is a subclass)
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects some valid JSON (e.g. integers beyond 64 bits);
+            # the stdlib has the final say
+            pass
+    return json.loads(data)
+
+
+def compress(data, encoding):
+    """:raises ValueError: For encodings this client cannot produce"""
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data, encoding):
+    """:raises ValueError: For unknown encodings and corrupt data"""
+    try:
+        if encoding == "gzip":
+            return zlib.decompress(data, 47)  # wbits=47 -> gzip or zlib container
+        if encoding == "zstd" and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as e:
+        raise ValueError(f"Corrupt {encoding} body: {e}") from e
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def negotiate(capabilities):
+    """
+    Best request body encoding the relay accepts, from the "gzip" / "zstd"
+    entries of its /healthz capabilities; None for relays that accept neither.
+    """
+    for encoding in ENCODINGS:
+        if encoding in capabilities:
+            return encoding
+    return None
+
+
+def accept_encoding():
+    """Accept-Encoding header value for responses this client can decode."""
+    return ", ".join(ENCODINGS)
@@ -0,0 +1,287 @@
+import base64
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import zlib
+
+import requests
+
+from resilience import CircuitOpenError, TransientHTTPError, is_transient_status, retry_call
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Where the packer remembers what the relay has already seen, relative to the project root
+DEFAULT_MANIFEST_PATH = os.path.join(".agentforge", "context_manifest.json")
+# Files larger than this are left out of the context
+MAX_FILE_SIZE = 10 * 1024 * 1024
+# Text files at least this large are gzip-compressed on the way out
+COMPRESS_MIN_SIZE = 1024
+READ_BLOCK_SIZE = 64 * 1024
+ALWAYS_SKIP = {".git", ".agentforge"}
+
+
+def hash_file(path):
+    """Streaming sha256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_text_file(path):
+    with open(path, "rb") as f:
+        return b"\0" not in f.read(8192)
+
+
+def iter_gzip(path):
+    """Yields the gzip-compressed content of a file block by block."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+            data = compressor.compress(block)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def manifest_id(files):
+    """Content address of a manifest ({path: sha256})."""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_gitignore(root):
+    path = os.path.join(root, ".gitignore")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", errors="replace") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#") and not line.startswith("!")]
+
+
+def _ignored(rel_path, patterns):
+    """Minimal .gitignore matching for trees that are not git checkouts."""
+    parts = rel_path.split("/")
+    for pattern in patterns:
+        anchored = pattern.startswith("/")
+        dir_only = pattern.endswith("/")
+        pattern = pattern.strip("/")
+        # A pattern matches the path itself or any of its parent directories
+        candidates = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        if dir_only:
+            candidates = candidates[:-1]
+        for candidate in candidates:
+            if anchored or "/" in pattern:
+                if fnmatch.fnmatch(candidate, pattern):
+                    return True
+            elif fnmatch.fnmatch(candidate.rsplit("/", 1)[-1], pattern):
+                return True
+    return False
+
+
+def list_project_files(root):
+    """
+    Relative paths of the files that make up a project, honouring .gitignore.
+    Uses git when root is a checkout, otherwise walks the tree with the root .gitignore.
+    """
+    try:
+        output = subprocess.run(["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+                                cwd=root, capture_output=True, check=True).stdout
+        files = [p for p in output.decode("utf-8", "replace").split("\0") if p]
+        return sorted(p for p in files if os.path.isfile(os.path.join(root, p))
+                      and p.split("/", 1)[0] not in ALWAYS_SKIP)
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    patterns = _load_gitignore(root)
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in ALWAYS_SKIP and not _ignored(rel_dir + d + "/", patterns))
+        for name in filenames:
+            rel_path = rel_dir + name
+            if not _ignored(rel_path, patterns):
+                files.append(rel_path)
+    return sorted(files)
+
+
+class ContextPack:
+    """
+    One prepared upload: the delta against what the relay last saw, plus the
+    blobs it does not have yet.
+    """
+
+    def __init__(self, files, base_id, changed, removed, new_blobs):
+        self.files = files
+        self.id = manifest_id(files)
+        self.base_id = base_id
+        self.changed = changed
+        self.removed = removed
+        self.new_blobs = new_blobs
+        self.inline_blobs = {}
+
+    def payload(self):
+        """
+        The context reference sent with a command. When the relay already
+        knows base_id, only changed/removed paths are listed.
+        """
+        context = {"manifest_id": self.id}
+        if self.base_id:
+            context.update({"base_id": self.base_id, "changed": self.changed, "removed": self.removed})
+        else:
+            context["files"] = self.files
+        if self.inline_blobs:
+            context["blobs"] = self.inline_blobs
+        return context
+
+
+class ContextPacker:
+    """
+    Content-addressed, incremental project context for AgentForge commands.
+
+    Files are hashed (re-hashed only when size/mtime change) and uploaded as
+    sha256-addressed blobs; the local manifest remembers which blobs and which
+    manifest the relay has seen, so repeated analyze_project calls only ship
+    changed files and a small manifest delta. Text files are gzip-compressed
+    while streaming. Relays without the "blobs" capability receive new blobs
+    inline in the command data.
+
+        packer = ContextPacker("/path/to/project")
+        packer.send(client, "analyze_project")
+    """
+
+    def __init__(self, root, manifest_path=None, max_file_size=MAX_FILE_SIZE):
+        self.root = os.path.abspath(root)
+        self.manifest_path = manifest_path or os.path.join(self.root, DEFAULT_MANIFEST_PATH)
+        self.max_file_size = max_file_size
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable context manifest: {e}")
+        return {"hash_cache": {}, "relays": {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _relay_state(self, relay_url):
+        return self.state["relays"].setdefault(relay_url, {"blobs": [], "manifest": {}, "manifest_id": None})
+
+    def scan(self):
+        """Current {path: sha256} of the project, reusing cached hashes of untouched files."""
+        cache = self.state["hash_cache"]
+        files = {}
+        for rel_path in list_project_files(self.root):
+            path = os.path.join(self.root, rel_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size > self.max_file_size:
+                continue
+            cached = cache.get(rel_path)
+            if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                files[rel_path] = cached["sha256"]
+                continue
+            sha = hash_file(path)
+            cache[rel_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+            files[rel_path] = sha
+        for stale in set(cache) - set(files):
+            del cache[stale]
+        return files
+
+    def prepare(self, relay_url):
+        """Diffs the project against what relay_url has seen."""
+        relay = self._relay_state(relay_url)
+        files = self.scan()
+        previous = relay["manifest"]
+        changed = {p: sha for p, sha in files.items() if previous.get(p) != sha}
+        removed = sorted(set(previous) - set(files))
+        known = set(relay["blobs"])
+        new_blobs = {}
+        for rel_path, sha in changed.items():
+            if sha not in known:
+                new_blobs.setdefault(sha, rel_path)
+        return ContextPack(files, relay["manifest_id"], changed, removed, new_blobs)
+
+    def upload(self, client, pack):
+        """
+        Ships the pack's new blobs: PUT /blobs/<sha256> on relays with the
+        "blobs" capability, otherwise inline in the command payload.
+        """
+        if "blobs" not in client.capabilities:
+            for sha, rel_path in pack.new_blobs.items():
+                pack.inline_blobs[sha] = self._inline_blob(rel_path)
+            return
+        for sha, rel_path in pack.new_blobs.items():
+            self._put_blob(client, sha, rel_path)
+
+    def _inline_blob(self, rel_path):
+        path = os.path.join(self.root, rel_path)
+        if is_text_file(path) and os.path.getsize(path) >= COMPRESS_MIN_SIZE:
+            data = b"".join(iter_gzip(path))
+            return {"encoding": "gzip+base64", "content": base64.b64encode(data).decode("ascii")}
+        with open(path, "rb") as f:
+            return {"encoding": "base64", "content": base64.b64encode(f.read()).decode("ascii")}
+
+    def _put_blob(self, client, sha, rel_path):
+        path = os.path.join(self.root, rel_path)
+        endpoint = f"{client.relay_url}/blobs/{sha}"
+        compress = is_text_file(path) and os.path.getsize(path) >= COMPRESS_MIN_SIZE
+        headers = {"Content-Type": "application/octet-stream"}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+
+        def put():
+            # Blobs are addressed by their hash, so re-uploading one is harmless
+            with open(path, "rb") as f:
+                response = client.session.put(endpoint, data=iter_gzip(path) if compress else f,
+                                              headers=headers, timeout=30)
+            if is_transient_status(response.status_code):
+                raise TransientHTTPError(response.status_code, response.text)
+            return response
+
+        response = retry_call(put, client.retry_policy, retry_on=(requests.exceptions.ConnectionError,
+                                                                  requests.exceptions.Timeout, TransientHTTPError),
+                              breaker=client.breaker)
+        if response.status_code not in [200, 201, 204]:
+            raise requests.exceptions.HTTPError(f"Blob upload of {rel_path} failed: HTTP {response.status_code}")
+
+    def commit(self, relay_url, pack):
+        """Records that relay_url now has the pack's blobs and manifest."""
+        relay = self._relay_state(relay_url)
+        relay["blobs"] = sorted(set(relay["blobs"]) | set(pack.new_blobs))
+        relay["manifest"] = pack.files
+        relay["manifest_id"] = pack.id
+        self._save_state()
+
+    def send(self, client, action="analyze_project", data=None, target_agent="supervisor"):
+        """
+        Uploads what changed and sends `action` with the context attached
+        as data["context"]. State is only committed if the send succeeds.
+        """
+        pack = self.prepare(client.relay_url)
+        try:
+            self.upload(client, pack)
+        except (requests.exceptions.RequestException, TransientHTTPError, CircuitOpenError) as e:
+            return {"status": "error", "message": f"Context upload failed: {e}"}
+        data = dict(data or {})
+        data["context"] = pack.payload()
+        result = client.send_command(action, data, target_agent=target_agent)
+        if result["status"] == "success":
+            self.commit(client.relay_url, pack)
+        result["context"] = {"files": len(pack.files), "changed": len(pack.changed),
+                             "removed": len(pack.removed), "uploaded_blobs": len(pack.new_blobs)}
+        return result
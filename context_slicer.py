@@ -0,0 +1,293 @@
+import ast
+import builtins
+
+# Cuts a prompt's code context down to what one function or class needs:
+# its own source, the imports and module globals it references, and stubs
+# (signature + docstring) of the module functions, classes and sibling
+# methods it calls, instead of the whole file.
+
+# Characters of sliced context unless a budget is given (~4 characters per token)
+DEFAULT_BUDGET = 16000
+_BUILTINS = set(dir(builtins))
+
+
+class _Piece:
+    """One part of a slice. Lower `rank` is kept first when over budget."""
+
+    def __init__(self, rank, line, text, kind, name, member=False, node=None):
+        self.rank = rank
+        self.line = line
+        self.text = text
+        self.kind = kind
+        self.name = name
+        self.member = member
+        self.node = node
+
+
+def _referenced(node):
+    """Names a node loads, and attributes it reads from self / cls."""
+    names, attributes = set(), set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+            names.add(child.id)
+        elif (isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name)
+              and child.value.id in ("self", "cls")):
+            attributes.add(child.attr)
+    return names, attributes
+
+
+def _first_line(node):
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _comment_above(lines, line):
+    """Index of the first line of the comment block directly above 1-based `line`."""
+    start = line - 1
+    while start > 0 and lines[start - 1].strip().startswith("#"):
+        start -= 1
+    return start
+
+
+def _segment(lines, node, with_comment=False):
+    start = _comment_above(lines, _first_line(node)) if with_comment else _first_line(node) - 1
+    return "".join(lines[start:node.end_lineno])
+
+
+def _docstring(node):
+    """The docstring expression of a def or class, if it has one."""
+    first = node.body[0]
+    if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+        return first
+    return None
+
+
+def _header(lines, node):
+    """Source lines of a def or class up to its body: decorators and the (possibly multi-line) signature."""
+    header = lines[_first_line(node) - 1:node.body[0].lineno - 1]
+    while header and not header[-1].strip():
+        header.pop()
+    return "".join(header)
+
+
+def _stub(lines, node, docstring=True):
+    """Signature (with decorators) and optionally the docstring of a def or class, body replaced by `...`."""
+    body = node.body
+    doc = _docstring(node)
+    header = _header(lines, node)
+    indent = " " * body[0].col_offset
+    # col_offset counts UTF-8 bytes
+    before_body = lines[body[0].lineno - 1].encode("utf-8")[:body[0].col_offset].decode("utf-8")
+    one_line = bool(before_body.strip())
+    if one_line:  # body on the signature's line: "def f(): return 1"
+        header += before_body.rstrip() + "\n"
+        indent = " " * (node.col_offset + 4)
+    parts = [header]
+    if doc is not None and docstring:
+        if one_line:
+            # The docstring shares the signature's line: only its own text
+            parts.append(indent + ast.get_source_segment("".join(lines), doc) + "\n")
+        else:
+            parts.append("".join(lines[doc.lineno - 1:doc.end_lineno]))
+    parts.append(f"{indent}...\n")
+    return "".join(parts)
+
+
+def _filtered_import(node, used):
+    """The import statement narrowed to the names in `used`; None if it binds none of them."""
+    aliases = [a for a in node.names if (a.asname or a.name.split(".")[0]) in used]
+    if not aliases:
+        return None
+    if isinstance(node, ast.ImportFrom):
+        narrowed = ast.ImportFrom(module=node.module, names=aliases, level=node.level)
+    else:
+        narrowed = ast.Import(names=aliases)
+    return ast.unparse(narrowed) + "\n"
+
+
+def _find(tree, target):
+    """(class node or None, target node) for "name" or "Class.method"."""
+    parts = target.split(".")
+    scope, owner, node = tree.body, None, None
+    for depth, part in enumerate(parts):
+        node = next((n for n in scope if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                     and n.name == part), None)
+        if node is None:
+            raise ValueError(f"{target} not found")
+        if depth < len(parts) - 1:
+            if not isinstance(node, ast.ClassDef):
+                raise ValueError(f"{'.'.join(parts[:depth + 1])} is not a class")
+            owner, scope = node, node.body
+    return owner, node
+
+
+def _block_statements(node):
+    """Statements nested in a module-level try / if block, at any depth."""
+    blocks = [node.body, node.orelse]
+    if isinstance(node, ast.Try):
+        blocks += [handler.body for handler in node.handlers] + [node.finalbody]
+    for block in blocks:
+        for statement in block:
+            yield statement
+
+
+def _bound_names(node):
+    """Names a module-level statement defines, including those bound inside try / if blocks."""
+    if isinstance(node, (ast.Try, ast.If)):
+        names = set()
+        for statement in _block_statements(node):
+            names |= _bound_names(statement)
+        return names
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return {a.asname or a.name.split(".")[0] for a in node.names}
+    targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+    names = set()
+    for target in targets:
+        for child in ast.walk(target) if target is not None else ():
+            if isinstance(child, ast.Name):
+                names.add(child.id)
+    return names
+
+
+def _signature_names(node):
+    """
+    Names a module statement needs besides its body: all of an assignment or
+    try / if block, a def's or class's signature.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        parts = node.decorator_list + [node.args] + ([node.returns] if node.returns else [])
+    elif isinstance(node, ast.ClassDef):
+        parts = node.decorator_list + node.bases + node.keywords
+    elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.Try, ast.If)):
+        parts = [node]
+    else:
+        return set()
+    names = set()
+    for part in parts:
+        names |= _referenced(part)[0]
+    return names
+
+
+def _pieces(source, target):
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    owner, node = _find(tree, target)
+    names, attributes = _referenced(node)
+    pieces = [_Piece(0, _first_line(node), _segment(lines, node), "target", target, member=owner is not None)]
+
+    if owner is not None:
+        # The class line and docstring, the constructor (it defines the attributes
+        # the method reads) and stubs of the sibling methods it calls
+        header = _header(lines, owner)
+        doc = _docstring(owner)
+        if doc is not None:
+            header += "".join(lines[doc.lineno - 1:doc.end_lineno])
+        pieces.append(_Piece(0, _first_line(owner), header, "class", owner.name))
+        for member in owner.body:
+            if member is node or not isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            if member.name == "__init__":
+                pieces.append(_Piece(2, _first_line(member), _segment(lines, member), "init", member.name, True))
+                init_names, _ = _referenced(member)
+                names |= init_names
+            elif member.name in attributes:
+                pieces.append(_Piece(4, _first_line(member), _stub(lines, member), "method", member.name, True,
+                                     member))
+                names |= _signature_names(member)
+        names |= _signature_names(owner) | {owner.name}
+
+    # Included globals pull in what their values reference (logger -> logging),
+    # stubs what their signatures reference (defaults, decorators, bases)
+    grown = True
+    while grown:
+        grown = False
+        for statement in tree.body:
+            if statement is node or statement is owner or not _bound_names(statement) & names:
+                continue
+            used = _signature_names(statement) - names
+            if used:
+                names |= used
+                grown = True
+
+    names -= _BUILTINS
+    for statement in tree.body:
+        if statement is node or statement is owner:
+            continue
+        bound = _bound_names(statement) & names
+        if not bound:
+            continue
+        line = _first_line(statement) if hasattr(statement, "decorator_list") else statement.lineno
+        if isinstance(statement, (ast.Import, ast.ImportFrom)):
+            pieces.append(_Piece(1, line, _filtered_import(statement, bound), "import", ", ".join(sorted(bound))))
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            pieces.append(_Piece(4, line, _stub(lines, statement), "stub", statement.name, node=statement))
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign, ast.Try, ast.If)):
+            # A try / if block is kept whole: e.g. an optional import and its fallback
+            pieces.append(_Piece(3, line, _segment(lines, statement, with_comment=True), "global",
+                                 ", ".join(sorted(bound))))
+    return pieces
+
+
+def _render(pieces, omitted):
+    module = sorted((p for p in pieces if not p.member and p.kind != "class"), key=lambda p: p.line)
+    members = sorted((p for p in pieces if p.member or p.kind == "class"), key=lambda p: p.line)
+    blocks = [p.text for p in module if p.kind == "import"]
+    if blocks:
+        blocks = ["".join(blocks)]
+    blocks += [p.text for p in module if p.kind != "import"]
+    if members:
+        blocks.append("\n".join(p.text for p in members))
+    if omitted:
+        blocks.append(f"# {len(omitted)} referenced definitions omitted: {', '.join(omitted)}\n")
+    return "\n\n".join(block.rstrip("\n") + "\n" for block in blocks)
+
+
+def slice_source(source, target, budget=DEFAULT_BUDGET):
+    """
+    The code context for `target` ("function", "Class" or "Class.method"):
+    its own source, the narrowed imports and module globals it uses, the
+    class line and constructor for a method, and signature+docstring stubs
+    of the functions, classes and sibling methods it calls.
+
+    Over `budget` characters, stub docstrings go first, then stubs, globals,
+    the constructor and imports, each from the last referenced; a comment
+    lists what was left out. The target itself is always kept whole, so a
+    slice can exceed the budget when the target alone does.
+    :raises ValueError: If target is not defined in source
+    """
+    pieces = _pieces(source, target)
+    text = _render(pieces, [])
+    if len(text) <= budget:
+        return text
+
+    lines = source.splitlines(keepends=True)
+    for piece in pieces:
+        if piece.node is not None:
+            piece.text = _stub(lines, piece.node, docstring=False)
+    omitted = []
+    droppable = sorted((p for p in pieces if p.rank > 0), key=lambda p: (-p.rank, -p.line))
+    for piece in droppable:
+        text = _render(pieces, omitted)
+        if len(text) <= budget:
+            break
+        pieces.remove(piece)
+        omitted.append(piece.name)
+    return _render(pieces, omitted)
+
+
+def slice_file(path, target, budget=DEFAULT_BUDGET):
+    with open(path, encoding="utf-8") as f:
+        return slice_source(f.read(), target, budget)
+
+
+def targets(source):
+    """Every sliceable target of a module: top-level functions, classes and "Class.method" names."""
+    names = []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(node.name)
+        if isinstance(node, ast.ClassDef):
+            names += [f"{node.name}.{m.name}" for m in node.body
+                      if isinstance(m, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    return names
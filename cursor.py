@@ -0,0 +1,81 @@
+import json
+import os
+from collections import OrderedDict
+
+# How many delivered message ids a cursor remembers for de-duplication
+MAX_SEEN_IDS = 10000
+
+
+class OutboxCursor:
+    """
+    Position of a consumer in one agent outbox.
+
+    last_id is sent to the relay as ?after=<id> so relays that support it only
+    return newer messages. Relays that ignore it return the whole outbox, and
+    the bounded seen-ID set filters out everything already delivered before
+    it is decoded. Once an id is evicted from the set, its timestamp becomes
+    the watermark: anything at or below it is treated as already delivered.
+    """
+
+    def __init__(self, max_seen=MAX_SEEN_IDS):
+        self.max_seen = max_seen
+        self.last_id = None
+        self.last_timestamp = 0
+        self.watermark = None
+        self._seen = OrderedDict()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def seen(self, msg):
+        """True if the message was already delivered through this cursor."""
+        msg_id = msg.get("id")
+        if msg_id is not None and msg_id in self._seen:
+            return True
+        return self.watermark is not None and (msg.get("timestamp") or 0) <= self.watermark
+
+    def advance(self, msg):
+        """Records a message as delivered."""
+        timestamp = msg.get("timestamp") or 0
+        msg_id = msg.get("id")
+        if msg_id is not None:
+            self._seen[msg_id] = timestamp
+            self.last_id = msg_id
+            while len(self._seen) > self.max_seen:
+                _, evicted = self._seen.popitem(last=False)
+                self.watermark = evicted if self.watermark is None else max(self.watermark, evicted)
+        self.last_timestamp = max(self.last_timestamp, timestamp)
+
+    def to_dict(self):
+        return {
+            "last_id": self.last_id,
+            "last_timestamp": self.last_timestamp,
+            "watermark": self.watermark,
+            "seen": list(self._seen.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data, max_seen=MAX_SEEN_IDS):
+        cursor = cls(max_seen=max_seen)
+        cursor.last_id = data.get("last_id")
+        cursor.last_timestamp = data.get("last_timestamp", 0)
+        cursor.watermark = data.get("watermark")
+        cursor._seen = OrderedDict((msg_id, ts) for msg_id, ts in data.get("seen", [])[-max_seen:])
+        return cursor
+
+
+def load_cursors(path):
+    """Loads per-agent cursors saved by save_cursors; missing file -> no cursors."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {agent: OutboxCursor.from_dict(state) for agent, state in data.items()}
+
+
+def save_cursors(cursors, path):
+    """Atomically writes per-agent cursors to path."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({agent: cursor.to_dict() for agent, cursor in cursors.items()}, f)
+    os.replace(tmp_path, path)
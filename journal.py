@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from message import decode_content
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentforge", "journal.sqlite3")
+# Entries recorded longer ago than this are removed by compaction
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Compaction removes the oldest entries once the database grows beyond this
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# ... down to this fraction of max_bytes, so it does not run on every write
+COMPACT_TARGET = 0.8
+# Opening a journal compacts it when the last compaction is older than this
+COMPACT_INTERVAL = 3600
+# Rows returned by query() unless a limit is given
+DEFAULT_QUERY_LIMIT = 100
+# Seconds a writer waits for another process holding the database lock
+BUSY_TIMEOUT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    direction TEXT NOT NULL,
+    recorded REAL NOT NULL,
+    timestamp REAL,
+    message_id TEXT,
+    correlation_id TEXT,
+    agent TEXT,
+    action TEXT,
+    body TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS entries_message ON entries (direction, message_id);
+CREATE INDEX IF NOT EXISTS entries_correlation ON entries (correlation_id);
+CREATE INDEX IF NOT EXISTS entries_agent ON entries (agent, timestamp);
+CREATE INDEX IF NOT EXISTS entries_action ON entries (action, timestamp);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE INDEX IF NOT EXISTS entries_recorded ON entries (recorded);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Fields of a processed message worth keeping; raw_payload would double the size
+JOURNALED_FIELDS = ("id", "timestamp", "sender", "action", "correlation_id", "content")
+
+
+def _message(body):
+    message = json.loads(body)
+    if message.pop("content_base64", False):
+        message["content"] = decode_content(message["content"], True)
+    return message
+
+
+class Journal:
+    """
+    Append-only SQLite journal of the commands a client sent and the messages
+    it received, so a reply can be looked up after it has left the relay outbox.
+
+    Entries are indexed by correlation ID, agent, action and timestamp. Sent
+    commands are stored as built by build_command, received messages as their
+    processed fields without raw_payload; a message seen by several polls is
+    stored once. Message content that has not been decoded yet is stored in
+    its base64 form and decoded only when query() returns it. Compaction
+    drops entries older than max_age and, beyond max_bytes, the oldest
+    entries. The database is in WAL mode, so CLI invocations and a plugin
+    daemon can share one file.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES,
+                 clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # Must precede table creation to take effect on a new database
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        with self._db:
+            self._db.executescript(SCHEMA)
+        last = self._meta("last_compaction")
+        if last is None or self.clock() - float(last) > COMPACT_INTERVAL:
+            self.compact()
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _insert(self, rows):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO entries (direction, recorded, timestamp, message_id, correlation_id, agent, "
+                "action, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def record_sent(self, target_agent, commands):
+        """
+        Journals commands sent to an agent inbox.
+        :param commands: Command dicts as built by client.build_command
+        """
+        now = self.clock()
+        self._insert([("sent", now, now, c.get("id"), c.get("correlation_id"), target_agent,
+                       (c.get("payload") or {}).get("action"), json.dumps(c, default=dict)) for c in commands])
+
+    def record_received(self, outbox, messages):
+        """
+        Journals processed messages received from an outbox. A message without
+        an action of its own is indexed under the action of the command it answers.
+        """
+        if not messages:
+            return
+        now = self.clock()
+        rows = []
+        for msg in messages:
+            body = {field: msg.get(field) for field in JOURNALED_FIELDS if field != "content"}
+            if hasattr(msg, "encoded_content"):
+                # Don't force the decode a compact Message defers
+                body["content"], encoded = msg.encoded_content()
+                if encoded:
+                    body["content_base64"] = True
+            else:
+                body["content"] = msg.get("content")
+            action = body["action"] or self._action_of(body["correlation_id"])
+            rows.append(("received", now, body["timestamp"] or now, body["id"], body["correlation_id"],
+                         body["sender"] or outbox, action, json.dumps(body, default=dict)))
+        self._insert(rows)
+
+    def _action_of(self, correlation_id):
+        if correlation_id is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT action FROM entries WHERE correlation_id = ? AND direction = 'sent' "
+                                   "LIMIT 1", (correlation_id,)).fetchone()
+        return row[0] if row else None
+
+    def query(self, correlation_id=None, agent=None, action=None, direction=None, since=None, until=None,
+              limit=DEFAULT_QUERY_LIMIT):
+        """
+        Journaled entries matching every given filter, most recently recorded first.
+        :param since: Only entries with a timestamp >= since (epoch seconds)
+        :return: List of {"direction", "recorded", "timestamp", "correlation_id",
+                 "agent", "action", "message"} dicts
+        """
+        clauses, params = [], []
+        for column, value in (("correlation_id", correlation_id), ("agent", agent), ("action", action),
+                              ("direction", direction)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT direction, recorded, timestamp, correlation_id, agent, action, body FROM entries {where} "
+               f"ORDER BY seq DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, (*params, limit)).fetchall()
+        return [{"direction": direction, "recorded": recorded, "timestamp": timestamp,
+                 "correlation_id": correlation, "agent": entry_agent, "action": entry_action,
+                 "message": _message(body)}
+                for direction, recorded, timestamp, correlation, entry_agent, entry_action, body in rows]
+
+    def size(self):
+        """Bytes used by live pages of the database."""
+        with self._lock:
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+            pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+            free = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def stats(self):
+        with self._lock:
+            count, oldest, newest = self._db.execute(
+                "SELECT COUNT(*), MIN(recorded), MAX(recorded) FROM entries").fetchone()
+        return {"entries": count, "bytes": self.size(), "oldest": oldest, "newest": newest, "path": self.path}
+
+    def compact(self):
+        """
+        Removes entries older than max_age, then the oldest entries until the
+        database is below COMPACT_TARGET * max_bytes.
+        :return: Number of entries removed
+        """
+        removed = 0
+        with self._lock, self._db:
+            removed += self._db.execute("DELETE FROM entries WHERE recorded < ?",
+                                        (self.clock() - self.max_age,)).rowcount
+        size = self.size()
+        if size > self.max_bytes:
+            with self._lock, self._db:
+                count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                # Entry sizes are similar enough to drop a proportional share of the oldest
+                excess = int(count * (1 - COMPACT_TARGET * self.max_bytes / size)) + 1
+                removed += self._db.execute(
+                    "DELETE FROM entries WHERE seq IN (SELECT seq FROM entries ORDER BY seq LIMIT ?)",
+                    (excess,)).rowcount
+        with self._lock:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_compaction', ?)",
+                                 (str(self.clock()),))
+            self._db.execute("PRAGMA incremental_vacuum").fetchall()
+        if removed:
+            logger.info(f"Journal compaction removed {removed} entries")
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark import percentile
+from client import REPLY_OUTBOX, AgentForgeClient
+from stub_relay import StubRelay
+
+# Drives AgentForgeClient (or AsyncAgentForgeClient) against a relay at a fixed
+# concurrency and reports throughput, latency percentiles and errors. Without
+# --relay a local StubRelay is started, so regressions can be caught offline.
+
+AGENTS = ["supervisor", "executor", "planner"]
+# Seconds between polls while waiting for one reply
+POLL_INTERVAL = 0.01
+
+
+def _payload(i, payload_bytes):
+    return {"n": i, "blob": "x" * payload_bytes} if payload_bytes else {"n": i}
+
+
+def run_sync(relay_url, requests, concurrency, timeout, payload_bytes=0, transport="short_poll"):
+    """
+    One request = send_command + polling until the reply to that command arrives.
+    :return: (latencies of completed requests, {error kind: count}, elapsed seconds)
+    """
+    client = AgentForgeClient(relay_url=relay_url, transport=transport)
+    latencies, errors = [], {}
+
+    def one(i):
+        agent = AGENTS[i % len(AGENTS)]
+        start = time.perf_counter()
+        sent = client.send_command("loadgen", _payload(i, payload_bytes), target_agent=agent)
+        if sent["status"] == "error":
+            return "send_error", None
+        while time.perf_counter() - start < timeout:
+            if client.poll_responses(limit=1, target_agent=client.reply_outbox(agent),
+                                     correlation_id=sent["correlation_id"]):
+                return None, time.perf_counter() - start
+            time.sleep(POLL_INTERVAL)
+        return "timeout", None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for error, latency in pool.map(one, range(requests)):
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return latencies, errors, elapsed
+
+
+async def run_async(relay_url, requests, concurrency, timeout, payload_bytes=0):
+    """asyncio flavour of run_sync using AsyncAgentForgeClient."""
+    from async_client import AsyncAgentForgeClient
+
+    latencies, errors = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncAgentForgeClient(relay_url=relay_url, max_connections=concurrency) as client:
+        async def one(i):
+            agent = AGENTS[i % len(AGENTS)]
+            async with semaphore:
+                start = time.perf_counter()
+                sent = await client.send_command("loadgen", _payload(i, payload_bytes), target_agent=agent)
+                if sent["status"] == "error":
+                    errors["send_error"] = errors.get("send_error", 0) + 1
+                    return
+                msgs = await client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=timeout,
+                                                      target_agent=REPLY_OUTBOX[agent], poll_interval=POLL_INTERVAL)
+                if msgs:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors["timeout"] = errors.get("timeout", 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, elapsed, requests):
+    """Summary dict: requests/s over completed requests, latency percentiles (ms) and error counts."""
+    result = {
+        "requests": requests,
+        "completed": len(latencies),
+        "errors": errors,
+        "error_count": sum(errors.values()),
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+    if latencies:
+        result["latency_ms"] = {name: round(percentile(latencies, fraction) * 1000, 2)
+                                for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against an AgentForge relay.")
+    parser.add_argument("--relay", help="Relay URL (default: start a local stub relay)")
+    parser.add_argument("--client", choices=["sync", "async"], default="sync")
+    parser.add_argument("--requests", type=int, default=500, help="Total send+reply round-trips")
+    parser.add_argument("--concurrency", type=int, default=16, help="Round-trips in flight at once")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds to wait for each reply")
+    parser.add_argument("--payload-bytes", type=int, default=0, help="Extra bytes of data per command")
+    parser.add_argument("--transport", default="short_poll", choices=["auto", "short_poll", "long_poll", "sse"],
+                        help="Outbox transport of the sync client")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub relay: seconds of delay per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub relay: fraction of requests failing")
+    parser.add_argument("--chunk-size", type=int, help="Stub relay: split replies into base64 chunks of this size")
+    args = parser.parse_args()
+
+    logging.getLogger("AntigravitySupervisorClient").setLevel(logging.ERROR)
+
+    relay = None
+    relay_url = args.relay
+    if not relay_url:
+        relay = StubRelay(latency=args.latency, error_rate=args.error_rate, chunk_size=args.chunk_size).start()
+        relay_url = relay.url
+    try:
+        if args.client == "async":
+            latencies, errors, elapsed = asyncio.run(run_async(relay_url, args.requests, args.concurrency,
+                                                               args.timeout, args.payload_bytes))
+        else:
+            latencies, errors, elapsed = run_sync(relay_url, args.requests, args.concurrency, args.timeout,
+                                                  args.payload_bytes, args.transport)
+    finally:
+        if relay is not None:
+            relay.stop()
+
+    result = report(latencies, errors, elapsed, args.requests)
+    result.update({"client": args.client, "concurrency": args.concurrency, "relay": args.relay or "stub"})
+    if relay is not None:
+        result["injected_errors"] = relay.injected_errors
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
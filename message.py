@@ -0,0 +1,96 @@
+import base64
+import json
+import logging
+from collections.abc import Mapping
+
+import codec
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Keys of a processed message, in the order the CLI prints them
+FIELDS = ("id", "timestamp", "sender", "action", "correlation_id", "content", "raw_payload")
+
+
+def message_correlation_id(msg):
+    """
+    Returns the correlation ID a raw outbox message refers to, if any.
+    Agents echo the originating message id back as 'ref_id'.
+    """
+    return msg.get("correlation_id") or msg.get("ref_id")
+
+
+def decode_content(content, is_base64):
+    """
+    Decodes a payload_chunk's content: base64 (when flagged) to UTF-8 text,
+    then JSON if the text parses as JSON.
+    """
+    if not (is_base64 and content):
+        return content
+    try:
+        decoded = base64.b64decode(content).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Base64 decoding error: {e}")
+        return f"[Decode Error] {content}"
+    # Try parsing as JSON if it looks like one
+    try:
+        return codec.loads(decoded)
+    except json.JSONDecodeError:
+        return decoded
+
+
+class Message(Mapping):
+    """
+    Compact processed message for long-running consumers.
+
+    Reads like the processed dict (msg["content"], msg.get("sender"), dict(msg))
+    but holds its fields in slots, and the content stays encoded until it is
+    first accessed. The raw outbox message is only kept when asked for; without
+    it a Message no longer pins the relay's whole JSON tree.
+
+    json.dumps needs default=dict to serialise one (and keeps the key order).
+    """
+    __slots__ = ("id", "timestamp", "sender", "action", "correlation_id", "_content", "_encoded", "raw_payload")
+
+    def __init__(self, msg, content, is_base64=False, keep_raw=True):
+        """
+        :param msg: The raw outbox message
+        :param content: The payload content, decoded or (with is_base64) still encoded
+        :param is_base64: Decode content on first access
+        :param keep_raw: Keep msg as 'raw_payload'
+        """
+        self.id = msg.get("id")
+        self.timestamp = msg.get("timestamp")
+        self.sender = msg.get("sender")
+        self.action = msg.get("action")
+        self.correlation_id = message_correlation_id(msg)
+        self._content = content
+        self._encoded = bool(is_base64 and content)
+        self.raw_payload = msg if keep_raw else None
+
+    @property
+    def content(self):
+        if self._encoded:
+            self._content = decode_content(self._content, True)
+            self._encoded = False
+        return self._content
+
+    def encoded_content(self):
+        """(content, is_base64) as received, without decoding it."""
+        return self._content, self._encoded
+
+    def _keys(self):
+        return FIELDS if self.raw_payload is not None else FIELDS[:-1]
+
+    def __getitem__(self, key):
+        if key not in self._keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"Message(id={self.id!r}, sender={self.sender!r}, correlation_id={self.correlation_id!r})"
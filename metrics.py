@@ -0,0 +1,147 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Timers and counters for the client hot paths. Every AgentForgeClient owns a
+# Metrics registry (client.metrics); hooks receive each observation as it
+# happens, exporters render the accumulated values.
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class _Summary:
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and summaries (count/sum/min/max).
+
+        metrics = Metrics()
+        metrics.add_hook(lambda kind, name, value, labels: print(kind, name, value, labels))
+        with metrics.timer("agentforge_send_seconds", action="heartbeat"):
+            ...
+        print(metrics.to_prometheus())
+
+    Hooks are called as hook(kind, name, value, labels) with kind "counter" or
+    "summary"; use them to forward observations to statsd, OpenTelemetry, logs...
+    A hook raising an exception is removed rather than breaking the client.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._counters = {}
+        self._summaries = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def _notify(self, kind, name, value, labels):
+        for hook in list(self._hooks):
+            try:
+                hook(kind, name, value, labels)
+            except Exception:
+                self.remove_hook(hook)
+
+    def inc(self, name, value=1, **labels):
+        """Adds value to a counter."""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self._hooks:
+            self._notify("counter", name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """Records one sample (e.g. a duration in seconds) in a summary."""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary()
+            summary.add(value)
+        if self._hooks:
+            self._notify("summary", name, value, labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the duration of the with-block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name, **labels):
+        return self._counters.get(_key(name, labels), 0)
+
+    def summary(self, name, **labels):
+        """{'count', 'sum', 'min', 'max', 'mean'} of a summary, or None if never observed."""
+        summary = self._summaries.get(_key(name, labels))
+        if summary is None:
+            return None
+        return {"count": summary.count, "sum": summary.total, "min": summary.min, "max": summary.max,
+                "mean": summary.total / summary.count}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def to_json(self):
+        """JSON-serialisable dump: {"counters": [...], "summaries": [...]}, one entry per label set."""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            summaries = [{"name": name, "labels": dict(labels), "count": s.count, "sum": s.total,
+                          "min": s.min, "max": s.max, "mean": s.total / s.count}
+                         for (name, labels), s in sorted(self._summaries.items())]
+        return {"counters": counters, "summaries": summaries}
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (counters and summaries with _count/_sum)."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), s in sorted(self._summaries.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} summary")
+                    typed.add(name)
+                lines.append(f"{name}_count{_format_labels(labels)} {s.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {s.total:.6f}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,300 @@
+import argparse
+import ast
+import difflib
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import as_completed
+
+from client import AgentForgeClient, load_routes
+from context_packer import list_project_files
+from context_slicer import slice_source
+from scheduler import Scheduler
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# What a job asks the executor for, and how its reply is stored:
+# "patch" replies are the unit rewritten and become a unified diff of the
+# source file, "file" replies are written out as a new file.
+TASKS = {
+    "docstrings": {
+        "output": "patch",
+        "prompt": ("Please generate Google-style docstrings for all classes and methods in the following Python "
+                   "code. Return the full Python code with the docstrings included. Do not change any logic.\n\n"
+                   "FILE: {path}\n\nCODE:\n{code}\n"),
+    },
+    "tests": {
+        "output": "file",
+        "prompt": ("Please generate a comprehensive `pytest` unit test file for the following Python code from "
+                   "{path}. Use `unittest.mock` to mock network and filesystem access. Test success and failure "
+                   "scenarios.\n\nCODE:\n{code}\n\nReturn ONLY the Python code for the test file.\n"),
+    },
+}
+GRANULARITIES = ("module", "function")
+# Jobs per executor awaiting a reply; the executor's capacity, not the client, should bound a run
+DEFAULT_MAX_IN_FLIGHT = 8
+# Seconds a single job may take before it is recorded as failed (and retried by the next run)
+DEFAULT_JOB_TIMEOUT = 600
+CHECKPOINT_NAME = ".pipeline-checkpoint.jsonl"
+# Trees never worth generating for
+DEFAULT_EXCLUDE = ("node_modules/*", "*/node_modules/*", ".venv/*", "venv/*", "build/*", "dist/*")
+
+_FENCE = re.compile(r"```(?:python|py)?\s*\n(.*?)```", re.DOTALL)
+
+
+class Job:
+    """
+    One unit of work: a module, or a top-level function or class of one.
+    `key` identifies the unit across runs, `digest` its source and task, so a
+    checkpointed job is redone once its code changes.
+    """
+
+    def __init__(self, task, path, name, source, lines=None):
+        """
+        :param path: Source file, relative to the project root
+        :param name: Qualified name of the unit; None for a whole module
+        :param lines: (first, last) 1-based line numbers of the unit in the file
+        """
+        self.task = task
+        self.path = path
+        self.name = name
+        self.source = source
+        self.lines = lines
+        self.key = f"{task}:{path}" + (f"::{name}" if name else "")
+        self.digest = hashlib.sha256(f"{TASKS[task]['prompt']}\0{source}".encode("utf-8")).hexdigest()
+
+    def prompt(self):
+        return TASKS[self.task]["prompt"].format(path=self.path, code=self.source)
+
+    def __repr__(self):
+        return f"Job({self.key!r})"
+
+
+def _units(tree):
+    """Top-level functions and classes of a module: (name, first line incl. decorators, last line)."""
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            yield node.name, first, node.end_lineno
+
+
+def discover_jobs(root, task, granularity="module", include=("*.py",), exclude=DEFAULT_EXCLUDE):
+    """
+    Walks a project (honouring .gitignore) and turns each module, or each
+    top-level function / class, into a job. Files that do not parse are skipped.
+    :return: List of Job, in path order
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task: {task}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    jobs = []
+    for path in list_project_files(root):
+        if not any(fnmatch.fnmatch(path, p) for p in include) or any(fnmatch.fnmatch(path, p) for p in exclude):
+            continue
+        with open(os.path.join(root, path), encoding="utf-8", errors="replace") as f:
+            source = f.read()
+        if not source.strip():
+            continue
+        if granularity == "module":
+            jobs.append(Job(task, path, None, source))
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            logger.warning(f"Skipping {path}: {e}")
+            continue
+        lines = source.splitlines(keepends=True)
+        for name, first, last in _units(tree):
+            # Patches replace the unit's lines, so only the unit is sent; new files
+            # get the imports, globals and callee signatures the unit uses as well
+            unit = slice_source(source, name) if TASKS[task]["output"] == "file" else "".join(lines[first - 1:last])
+            jobs.append(Job(task, path, name, unit, (first, last)))
+    return jobs
+
+
+def extract_code(content):
+    """
+    The code in an executor reply: the 'result' (or 'code' / 'content') field
+    of a JSON reply, with a Markdown code fence stripped if there is one.
+    """
+    if isinstance(content, dict):
+        for field in ("result", "code", "content", "output"):
+            if isinstance(content.get(field), str):
+                content = content[field]
+                break
+        else:
+            content = json.dumps(content, indent=2)
+    content = "" if content is None else str(content)
+    match = _FENCE.search(content)
+    return (match.group(1) if match else content).strip("\n") + "\n"
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines record of finished jobs in the output directory.
+    Each line is written and flushed as its job completes, so a run killed
+    at any point resumes with the jobs it had not finished.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of an interrupted run
+                    if entry.get("status") == "done":
+                        self.done[entry["key"]] = entry["digest"]
+                    else:
+                        self.done.pop(entry["key"], None)
+
+    def is_done(self, job):
+        return self.done.get(job.key) == job.digest
+
+    def record(self, job, status, **details):
+        entry = dict({"key": job.key, "digest": job.digest, "status": status, "time": time.time()}, **details)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status == "done":
+                self.done[job.key] = job.digest
+
+
+def _safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def write_result(job, content, root, output_dir):
+    """
+    Stores one job's reply under output_dir and returns the path written:
+    tests as tests/test_<module>[_<unit>].py, docstrings as a .patch of the
+    source file (only the unit's lines change for function jobs).
+    """
+    code = extract_code(content)
+    module = os.path.splitext(job.path)[0]
+    if TASKS[job.task]["output"] == "file":
+        name = "test_" + _safe_name(os.path.basename(module)) + (f"_{_safe_name(job.name)}" if job.name else "")
+        target = os.path.join(output_dir, job.task, os.path.dirname(job.path), name + ".py")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(code)
+        return target
+
+    with open(os.path.join(root, job.path), encoding="utf-8", errors="replace") as f:
+        original = f.read().splitlines(keepends=True)
+    if job.lines:
+        first, last = job.lines
+        updated = original[:first - 1] + code.splitlines(keepends=True) + original[last:]
+    else:
+        updated = code.splitlines(keepends=True)
+    patch = "".join(difflib.unified_diff(original, updated, f"a/{job.path}", f"b/{job.path}"))
+    suffix = f".{_safe_name(job.name)}" if job.name else ""
+    target = os.path.join(output_dir, job.task, job.path + suffix + ".patch")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(patch)
+    return target
+
+
+def run_pipeline(client, jobs, root, output_dir, target_agent="executor", max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 rate=None, job_timeout=DEFAULT_JOB_TIMEOUT, log=print):
+    """
+    Submits every job not yet in the checkpoint to target_agent through a
+    Scheduler, so at most max_in_flight are awaiting a reply at any time,
+    and writes each reply out as soon as it arrives.
+    :param rate: Commands per second to the agent (None: unlimited)
+    :param log: Callable receiving each progress line
+    :return: Dict with 'total', 'skipped', 'done', 'failed' and 'seconds'
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(output_dir, CHECKPOINT_NAME))
+    todo = [job for job in jobs if not checkpoint.is_done(job)]
+    summary = {"total": len(jobs), "skipped": len(jobs) - len(todo), "done": 0, "failed": 0}
+    if summary["skipped"]:
+        log(f"[PIPELINE] Resuming: {summary['skipped']} of {len(jobs)} jobs already done.")
+    started = time.monotonic()
+    scheduler = Scheduler(client, rate=rate, burst=max_in_flight, max_in_flight=max_in_flight,
+                          interactive_reserve=0, reply_timeout=job_timeout)
+    try:
+        pending = {scheduler.submit("execute_agent", {"prompt": job.prompt()}, target_agent=target_agent,
+                                    priority="batch").reply: job for job in todo}
+        for future in as_completed(pending):
+            job = pending[future]
+            try:
+                output = write_result(job, future.result()["content"], root, output_dir)
+            except Exception as e:
+                # Timeouts, failed sends and malformed replies alike: one bad job must not end the run
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                summary["failed"] += 1
+                checkpoint.record(job, "failed", error=error)
+                log(f"[PIPELINE] FAILED {job.key}: {error}")
+                continue
+            summary["done"] += 1
+            checkpoint.record(job, "done", output=output)
+            log(f"[PIPELINE] {summary['done'] + summary['failed']}/{len(todo)} {job.key} -> {output}")
+    finally:
+        scheduler.close()
+    return dict(summary, seconds=round(time.monotonic() - started, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate docstrings or tests for a whole project via the executor.")
+    parser.add_argument("root", help="Project to walk")
+    parser.add_argument("--task", choices=sorted(TASKS), default="docstrings")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="module",
+                        help="One job per module or per top-level function/class")
+    parser.add_argument("--out", default="generated", help="Directory for results and the checkpoint")
+    parser.add_argument("--target", default="executor", help="Agent that runs the jobs")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Jobs awaiting a reply at once")
+    parser.add_argument("--rate", type=float, help="Jobs submitted per second (default: unlimited)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_JOB_TIMEOUT, help="Seconds per job")
+    parser.add_argument("--include", default="*.py", help="Comma-separated glob patterns of files to process")
+    parser.add_argument("--exclude", default=",".join(DEFAULT_EXCLUDE), help="Comma-separated glob patterns to skip")
+    parser.add_argument("--routes", help="JSON file mapping agent -> reply outbox")
+    parser.add_argument("--server", help="Override Relay URL")
+    parser.add_argument("--dry-run", action="store_true", help="List the jobs without sending them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    root = os.path.abspath(args.root)
+    jobs = discover_jobs(root, args.task, args.granularity, include=args.include.split(","),
+                         exclude=[p for p in args.exclude.split(",") if p])
+    if args.dry_run:
+        checkpoint = Checkpoint(os.path.join(args.out, CHECKPOINT_NAME))
+        for job in jobs:
+            print(f"{'done' if checkpoint.is_done(job) else 'todo'}  {job.key}")
+        print(f"{len(jobs)} jobs")
+        return
+
+    routes = load_routes(args.routes) if args.routes else None
+    kwargs = {"relay_url": args.server} if args.server else {}
+    client = AgentForgeClient(compact_messages=True, keep_raw=False, routes=routes, **kwargs)
+    try:
+        summary = run_pipeline(client, jobs, root, args.out, target_agent=args.target,
+                               max_in_flight=args.max_in_flight, rate=args.rate, job_timeout=args.timeout)
+    except KeyboardInterrupt:
+        print("[PIPELINE] Interrupted; rerun the same command to resume.")
+        sys.exit(130)
+    finally:
+        client.close()
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,126 @@
 import argparse
 import json
-import codecs
 import sys
-from client import AgentForgeClient
+from plugin_daemon import FORWARD_TIMEOUT_MARGIN, DaemonClient, DaemonError
+
+def forward_to_daemon(args):
+    """
+    Runs the requested operation on a running plugin daemon.
+    :return: Exit code, or None if there is no daemon or the operation needs a local client
+    """
+    # Options the daemon does not serve (or that need a differently configured client)
+    if args.init or args.batch or args.context or args.cursor or args.cache_stats or args.server \
+            or args.cache_dir or args.transport != "auto" or args.targets or args.routes or args.history \
+            or args.journal is not None or args.chunk_dir:
+        return None
+    if args.check_connection:
+        method, params, timeout = "check_connection", {}, 5
+    elif args.poll and not args.action:
+        method, params, timeout = "poll", {"target_agent": args.target or "chatgpt"}, 10
+    elif args.action:
+        try:
+            data = json.loads(args.data) if args.data else {}
+        except json.JSONDecodeError:
+            return None  # reported by the local path
+        method = "request"
+        params = {"action": args.action, "data": data, "target_agent": args.target, "wait": args.wait,
+                  "use_cache": not args.no_cache, "priority": args.priority}
+        timeout = args.wait + FORWARD_TIMEOUT_MARGIN
+    elif args.stats:
+        method, params, timeout = "stats", {"format": args.stats}, 5
+    else:
+        return None
+
+    daemon = DaemonClient.connect(args.socket)
+    if daemon is None:
+        return None
+    try:
+        if method == "request" and args.wait > 0:
+            print(f"Command sent. Waiting {args.wait}s for response...", file=sys.stderr)
+        result = daemon.call(method, timeout=timeout, **params)
+        if args.stats and method != "stats":
+            print_stats(daemon.call("stats", timeout=5, format=args.stats), file=sys.stderr)
+    except (OSError, ValueError, DaemonError) as e:
+        # Not retried locally: the daemon may already have sent the command
+        print(json.dumps({"status": "error", "message": f"Plugin daemon request failed: {e}"}))
+        return 1
+    finally:
+        daemon.close()
+
+    if method == "stats":
+        print_stats(result)
+        return 0
+    if method == "check_connection":
+        print(json.dumps(result))
+        return 0 if result["status"] == "connected" else 1
+    if method == "request" and result["send_result"]["status"] == "error":
+        print(json.dumps(result["send_result"]))
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+def print_stats(stats, file=None):
+    """Prints a metrics dump: Prometheus text as-is, the JSON dump indented."""
+    text = stats if isinstance(stats, str) else json.dumps(stats, indent=2) + "\n"
+    (file or sys.stdout).write(text)
 
 def main():
     parser = argparse.ArgumentParser(description="Antigravity AgentForge Plugin CLI")
     
     parser.add_argument("--action", help="Action to perform (e.g., analyze_project, heartbeat)")
     parser.add_argument("--data", help="JSON string data payload")
+    parser.add_argument("--batch", help="JSONL file of commands ({\"action\", \"data\", \"target\"} per line) to send at once")
+    parser.add_argument("--context", help="Project directory to attach as incremental, content-addressed context")
     parser.add_argument("--target", default="supervisor", help="Target agent (supervisor, executor, planner)")
+    parser.add_argument("--targets", help="Comma-separated agents to send --action to concurrently (e.g. planner,executor)")
+    parser.add_argument("--policy", default="all", choices=["all", "first", "quorum"],
+                        help="With --targets and --wait: wait for all replies, the first --count, or a majority")
+    parser.add_argument("--count", type=int, default=1, help="Replies the 'first' policy waits for")
+    parser.add_argument("--routes", help="JSON file mapping agent inboxes to the outboxes they reply to")
     parser.add_argument("--check-connection", action="store_true", help="Check connectivity to Relay")
     parser.add_argument("--poll", action="store_true", help="Poll for messages")
+    parser.add_argument("--cursor", help="Cursor state file: --poll only returns messages not returned before")
     parser.add_argument("--wait", type=int, default=0, help="Wait N seconds for a response after sending")
+    parser.add_argument("--priority", default="interactive", choices=["interactive", "batch"],
+                        help="Daemon dispatch priority: interactive commands overtake queued batch jobs")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the action, ignoring cached results")
+    parser.add_argument("--cache-dir", help="Result cache directory (default: ~/.cache/agentforge/results)")
+    parser.add_argument("--cache-stats", action="store_true", help="Print result cache hit rate and exit")
+    parser.add_argument("--stats", nargs="?", const="json", choices=["json", "prometheus"],
+                        help="Print client metrics (timers, polls, bytes, errors) to stderr after the operation; "
+                             "alone, print the running daemon's metrics")
+    parser.add_argument("--history", action="store_true",
+                        help="Query the local message journal instead of the relay (filters: --action, --agent, "
+                             "--correlation-id, --since, --limit)")
+    parser.add_argument("--agent", help="--history: only entries sent to or received from this agent")
+    parser.add_argument("--correlation-id", help="--history: only the command with this ID and its replies")
+    parser.add_argument("--since", type=float, help="--history: only entries from the last N seconds")
+    parser.add_argument("--limit", type=int, default=20, help="--history: newest N entries (default: 20)")
+    parser.add_argument("--journal", nargs="?", const="", default=None,
+                        help="Record sent commands and received messages in this journal database "
+                             "(default: ~/.cache/agentforge/journal.sqlite3); also the database --history reads")
+    parser.add_argument("--chunk-dir", help="Write chunked results over 1 MiB to this directory instead of holding them in memory")
     parser.add_argument("--server", help="Override Relay URL")
+    parser.add_argument("--transport", default="auto", choices=["auto", "short_poll", "long_poll", "sse"],
+                        help="Outbox transport (default: detect what the Relay supports)")
     
     parser.add_argument("--init", action="store_true", help="Initialize connection and get Server Persona")
+    parser.add_argument("--daemon", action="store_true", help="Keep a warm client running and serve requests on a Unix socket")
+    parser.add_argument("--socket", help="Daemon socket path (default: $AGENTFORGE_PLUGIN_SOCKET or a per-user path)")
+    parser.add_argument("--no-daemon", action="store_true", help="Don't forward to a running daemon")
     
     args = parser.parse_args()
 
-    # Initialize Client
-    kwargs = {}
-    if args.server:
-        kwargs['relay_url'] = args.server
-    
-    client = AgentForgeClient(**kwargs)
+    # Forward to a running daemon: no client, session or connection setup here
+    if not args.daemon and not args.no_daemon:
+        exit_code = forward_to_daemon(args)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    if args.stats and not (args.action or args.poll or args.check_connection or args.batch or args.daemon):
+        # A one-shot client has nothing to report before it has done anything
+        print(json.dumps({"status": "error", "message": "No plugin daemon running; combine --stats with an operation"}))
+        sys.exit(1)
 
     # 0. Initialize / Handshake
     if args.init:
@@ -46,6 +142,66 @@ def main():
             print(json.dumps({"status": "error", "message": f"Handshake failed: {str(e)}"}))
             sys.exit(1)
 
+    if args.history:
+        import time
+        from journal import DEFAULT_JOURNAL_PATH, Journal
+        journal = Journal(args.journal or DEFAULT_JOURNAL_PATH)
+        entries = journal.query(correlation_id=args.correlation_id, agent=args.agent, action=args.action,
+                                since=time.time() - args.since if args.since else None, limit=args.limit)
+        journal.close()
+        print(json.dumps(entries, indent=2))
+        sys.exit(0)
+
+    if args.cache_stats:
+        from result_cache import DEFAULT_CACHE_DIR, ResultCache
+        print(json.dumps(ResultCache(args.cache_dir or DEFAULT_CACHE_DIR).stats(), indent=2))
+        sys.exit(0)
+
+    # Initialize Client
+    # Imported here, not at module level: --help, --init and argument errors
+    # should not pay for requests and the client stack
+    import logging
+    logging.basicConfig(level=logging.INFO)
+    from client import AgentForgeClient
+    kwargs = {"transport": args.transport}
+    if args.server:
+        kwargs['relay_url'] = args.server
+    if args.chunk_dir:
+        kwargs['chunk_dir'] = args.chunk_dir
+    if args.routes:
+        from client import load_routes
+        try:
+            kwargs['routes'] = load_routes(args.routes)
+        except (OSError, ValueError) as e:
+            print(json.dumps({"status": "error", "message": f"Invalid routes file: {e}"}))
+            sys.exit(1)
+    if args.daemon:
+        # Long-lived: replies are held by the routers until collected
+        kwargs['compact_messages'] = True
+    
+    client = AgentForgeClient(**kwargs)
+    if args.journal is not None:
+        from journal import DEFAULT_JOURNAL_PATH, Journal
+        client.journal = Journal(args.journal or DEFAULT_JOURNAL_PATH)
+    if args.stats and not args.daemon:
+        # Printed however the operation exits below
+        import atexit
+        atexit.register(lambda: print_stats(client.metrics.to_prometheus() if args.stats == "prometheus"
+                                            else client.metrics.to_json(), file=sys.stderr))
+
+    if args.daemon:
+        from plugin_daemon import serve
+        cache = None
+        if not args.no_cache:
+            from result_cache import DEFAULT_CACHE_DIR, ResultCache
+            cache = ResultCache(args.cache_dir or DEFAULT_CACHE_DIR)
+        try:
+            serve(client, args.socket, cache=cache)
+        except RuntimeError as e:
+            print(json.dumps({"status": "error", "message": str(e)}))
+            sys.exit(1)
+        sys.exit(0)
+
     # 1. Check Connection
     if args.check_connection:
         # Simple health check by trying to poll (or we could add a specific health endpoint if known)
@@ -61,11 +217,41 @@ def main():
     # 2. Poll only
     if args.poll and not args.action:
         target = args.target if args.target else "chatgpt"
-        msgs = client.poll_responses(target_agent=target)
+        if args.cursor:
+            from cursor import load_cursors, save_cursors
+            client.cursors = load_cursors(args.cursor)
+            msgs = client.poll_new(target_agent=target)
+            save_cursors(client.cursors, args.cursor)
+        else:
+            msgs = client.poll_responses(target_agent=target)
         print(json.dumps(msgs, indent=2))
         sys.exit(0)
 
-    # 3. Send Action
+    # 3. Send a batch of actions
+    if args.batch:
+        commands = []
+        line_no = 0
+        try:
+            with open(args.batch, "r") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    commands.append({
+                        "action": entry["action"],
+                        "data": entry.get("data", {}),
+                        "target_agent": entry.get("target", entry.get("target_agent", args.target)),
+                    })
+        except (OSError, KeyError, json.JSONDecodeError) as e:
+            print(json.dumps({"status": "error", "message": f"Invalid batch file (line {line_no}): {e}"}))
+            sys.exit(1)
+
+        results = client.send_batch(commands)
+        failed = sum(1 for r in results if r["status"] == "error")
+        print(json.dumps({"sent": len(results) - failed, "failed": failed, "results": results}, indent=2))
+        sys.exit(1 if failed else 0)
+
+    # 4. Send Action
     if args.action:
         data = {}
         if args.data:
@@ -75,11 +261,47 @@ def main():
                 print(json.dumps({"status": "error", "message": "Invalid JSON in --data"}))
                 sys.exit(1)
         
-        import time
-        start_ts = time.time()
-        
+        # Same command to several agents, replies collected as they arrive
+        if args.targets:
+            targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+            if args.wait <= 0:
+                results = client.send_batch([{"action": args.action, "data": data, "target_agent": t}
+                                             for t in targets])
+                failed = sum(1 for r in results if r["status"] == "error")
+                print(json.dumps({"sent": len(results) - failed, "failed": failed,
+                                  "results": dict(zip(targets, results))}, indent=2))
+                sys.exit(1 if failed else 0)
+            print(f"Waiting up to {args.wait}s for {args.policy} replies from {', '.join(targets)}...",
+                  file=sys.stderr)
+            result = client.fan_out(args.action, data, targets=targets, timeout_seconds=args.wait,
+                                    policy=args.policy, count=args.count,
+                                    on_result=lambda target, msg: print(f"[AgentForge] Reply from {target}",
+                                                                        file=sys.stderr))
+            print(json.dumps(result, indent=2, default=dict))
+            sys.exit(0 if result["status"] == "success" else 1)
+
+        # Cacheable actions (e.g. execute_agent) that wait for their result are
+        # answered from the result cache when the same command already ran
+        if args.wait > 0 and not args.context:
+            from result_cache import DEFAULT_CACHE_DIR, ResultCache
+            client.cache = ResultCache(args.cache_dir or DEFAULT_CACHE_DIR)
+            if client.cache.cacheable(args.action):
+                print(f"Waiting up to {args.wait}s for response...", file=sys.stderr)
+                result = client.request(args.action, data, target_agent=args.target, timeout_seconds=args.wait,
+                                        use_cache=not args.no_cache)
+                response_msgs = result.pop("responses")
+                if result['status'] == 'error':
+                    print(json.dumps(result))
+                    sys.exit(1)
+                print(json.dumps({"send_result": result, "responses": response_msgs}, indent=2))
+                sys.exit(0)
+
         # Send
-        result = client.send_command(args.action, data, target_agent=args.target)
+        if args.context:
+            from context_packer import ContextPacker
+            result = ContextPacker(args.context).send(client, args.action, data, target_agent=args.target)
+        else:
+            result = client.send_command(args.action, data, target_agent=args.target)
         
         if result['status'] == 'error':
             print(json.dumps(result))
@@ -90,16 +312,12 @@ def main():
         if args.wait > 0:
             print(f"Command sent. Waiting {args.wait}s for response...", file=sys.stderr)
             
-            # Determine correct outbox to poll
-            # If we target 'supervisor', default reply is 'chatgpt' outbox (supervisor writes there)
-            # If we target 'executor', it writes to 'executor' outbox
-            poll_target = "chatgpt"
-            if args.target == "executor":
-                poll_target = "executor"
-            elif args.target == "planner":
-                poll_target = "planner"
-
-            response_msgs = client.wait_for_response(timeout_seconds=args.wait, min_timestamp=start_ts, target_agent=poll_target)
+            # Replies are matched by correlation ID rather than by comparing the
+            # relay's timestamps with our own clock; the client's routing table
+            # says which outbox the target replies to
+            response_msgs = client.wait_for_response(action_id=result.get('correlation_id'),
+                                                     timeout_seconds=args.wait,
+                                                     target_agent=client.reply_outbox(args.target))
             
         # Output result
         output = {
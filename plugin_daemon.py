@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait as wait_futures
+
+# Warm plugin backend: `plugin.py --daemon` keeps one AgentForgeClient (pooled
+# relay connection, background outbox poller) alive and serves newline-delimited
+# JSON-RPC 2.0 over a Unix socket. plugin.py forwards to it when it is running,
+# so an action costs a socket round-trip instead of interpreter + import +
+# connection setup. This module only imports the client on the daemon side;
+# the forwarding path must stay cheap.
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+SOCKET_ENV = "AGENTFORGE_PLUGIN_SOCKET"
+# How long a forwarding plugin.py waits for the daemon beyond the action's own --wait
+FORWARD_TIMEOUT_MARGIN = 10
+CONNECT_TIMEOUT = 0.5
+# How long a command sent without --wait may sit in the dispatch queue
+DISPATCH_TIMEOUT = 5
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+def default_socket_path():
+    """$AGENTFORGE_PLUGIN_SOCKET, else a per-user socket in $XDG_RUNTIME_DIR or ~/.cache/agentforge."""
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "agentforge")
+    return os.path.join(runtime_dir, "agentforge-plugin.sock")
+
+
+class DaemonError(Exception):
+    """The daemon answered with a JSON-RPC error."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class DaemonClient:
+    """
+    Thin JSON-RPC client for a running plugin daemon.
+
+        daemon = DaemonClient.connect()
+        if daemon is not None:
+            daemon.call("send_command", action="heartbeat")
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._file = sock.makefile("rb")
+        self._next_id = 0
+
+    @classmethod
+    def connect(cls, path=None):
+        """Connected client, or None when no daemon listens on the socket."""
+        path = path or default_socket_path()
+        if not os.path.exists(path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock)
+
+    def call(self, method, timeout=30, **params):
+        self._next_id += 1
+        request = {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params}
+        self._sock.settimeout(timeout)
+        self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Plugin daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise DaemonError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+class PluginDaemon:
+    """
+    The RPC methods served by the daemon, backed by one warm client.
+    Commands go through a scheduler.Scheduler, so interactive commands overtake
+    queued batch jobs and each agent is rate limited; its reply routers (one
+    per outbox) collect the replies.
+    """
+
+    def __init__(self, client, cache=None, scheduler=None):
+        from scheduler import Scheduler
+
+        self.client = client
+        self.client.cache = cache
+        self.scheduler = scheduler or Scheduler(client)
+
+    def ping(self):
+        return {"status": "ok", "pid": os.getpid(), "relay_url": self.client.relay_url}
+
+    def check_connection(self):
+        try:
+            self.client.session.get(self.client.relay_url + "/healthz", timeout=2)
+            return {"status": "connected", "url": self.client.relay_url}
+        except Exception as e:
+            return {"status": "disconnected", "error": str(e)}
+
+    def send_command(self, action, data=None, target_agent="supervisor"):
+        return self.client.send_command(action, data, target_agent=target_agent)
+
+    def request(self, action, data=None, target_agent="supervisor", wait=0, use_cache=True, priority="interactive"):
+        """
+        Queues a command on the scheduler and, with wait > 0, waits for its reply.
+        :param priority: Scheduler priority class ("interactive" or "batch")
+        :return: {"send_result": ..., "responses": [...]} as printed by plugin.py
+        """
+        cacheable = wait > 0 and self.client.cache is not None and self.client.cache.cacheable(action)
+        if cacheable and use_cache:
+            responses = self.client.cache.get(action, target_agent, data)
+            if responses is not None:
+                return {"send_result": {"status": "success", "cached": True}, "responses": responses}
+
+        started = time.time()
+        job = self.scheduler.submit(action, data, target_agent=target_agent, priority=priority)
+        responses = []
+        if wait > 0:
+            try:
+                responses = [job.reply.result(timeout=wait)]
+            except (ConnectionError, FutureTimeoutError):
+                pass  # reported through the send result below
+        else:
+            wait_futures([job.sent], timeout=DISPATCH_TIMEOUT)
+        # Nobody waits for the reply past this point: free the in-flight slot now
+        if not responses and self.scheduler.abandon(job):
+            return {"send_result": {"status": "error", "message": f"Still queued after {wait or DISPATCH_TIMEOUT}s "
+                                                                  f"(rate limit or in-flight cap)"},
+                    "responses": []}
+        send_result = job.sent.result()
+        if cacheable:
+            send_result = dict(send_result, cached=False)
+            if responses:
+                self.client.cache.put(action, target_agent, data, responses, elapsed=time.time() - started)
+        return {"send_result": send_result, "responses": responses}
+
+    def poll(self, target_agent="chatgpt", limit=10):
+        return self.client.poll_responses(limit=limit, target_agent=target_agent)
+
+    def stats(self, format="json"):
+        """The warm client's accumulated metrics, as a JSON dump or Prometheus text."""
+        if format == "prometheus":
+            return self.client.metrics.to_prometheus()
+        return self.client.metrics.to_json()
+
+    def close(self):
+        self.scheduler.close()
+        self.client.close()
+
+
+class _RPCHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.dispatch(line)
+            # default=dict serialises the client's compact Message objects
+            self.wfile.write(json.dumps(response, default=dict).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if self.server.shutting_down:
+                return
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    METHODS = ("ping", "check_connection", "send_command", "request", "poll", "stats")
+
+    def __init__(self, path, plugin):
+        self.plugin = plugin
+        self.shutting_down = False
+        super().__init__(path, _RPCHandler)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            method = request.get("method")
+            params = request.get("params") or {}
+        except (json.JSONDecodeError, AttributeError) as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": PARSE_ERROR, "message": str(e)}}
+
+        if method == "shutdown":
+            self.shutting_down = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"jsonrpc": "2.0", "id": request_id, "result": {"status": "stopping"}}
+        if method not in self.METHODS:
+            return {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": METHOD_NOT_FOUND, "message": f"Unknown method: {method}"}}
+        try:
+            result = getattr(self.plugin, method)(**params)
+        except TypeError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": INVALID_PARAMS, "message": str(e)}}
+        except Exception as e:
+            logger.error(f"Daemon method {method} failed: {e}")
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def serve(client, path=None, cache=None, ready=None):
+    """
+    Runs the daemon until a "shutdown" call or Ctrl-C.
+    :param ready: Optional threading.Event set once the socket accepts connections
+    """
+    path = path or default_socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        existing = DaemonClient.connect(path)
+        if existing is not None:
+            existing.close()
+            raise RuntimeError(f"A plugin daemon is already listening on {path}")
+        os.remove(path)  # stale socket of a daemon that died
+
+    daemon = PluginDaemon(client, cache=cache)
+    server = DaemonServer(path, daemon)
+    print(f"[AgentForge] Plugin daemon listening on {path}", file=sys.stderr)
+    if ready is not None:
+        ready.set()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        if os.path.exists(path):
+            os.remove(path)
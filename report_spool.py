@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from resilience import RetryPolicy, is_transient_status
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent flushers are not excluded
+    fcntl = None
+
+DEFAULT_SPOOL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agentforge", "reports")
+# Oldest reports are dropped once the spool grows beyond this
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Reports sent per flush batch, over one pooled connection
+DEFAULT_BATCH_SIZE = 20
+# Per-request timeout; a slow hub costs at most this per report
+REPORT_TIMEOUT = 5
+# Backoff between failed flush batches
+FLUSH_RETRY_POLICY = RetryPolicy(attempts=5, base_delay=0.5, max_delay=30)
+
+PENDING_SUFFIX = ".json"
+# Reports the hub refused (4xx) are kept, but never resent
+REJECTED_SUFFIX = ".rejected"
+
+
+def report_key(report):
+    """
+    File name of a report: its timestamp (so names sort oldest first) and a
+    digest of (hostname, timestamp), so the same report is only spooled once.
+    """
+    hostname = report.get("hostname") or (report.get("system") or {}).get("hostname", "")
+    timestamp = float(report.get("timestamp") or 0)
+    digest = hashlib.sha1(f"{hostname}|{timestamp!r}".encode("utf-8")).hexdigest()[:16]
+    return f"{int(timestamp * 1e6):020d}-{digest}"
+
+
+class _FlushThread(threading.Thread):
+    def __init__(self, spool, hub_url, options):
+        super().__init__(name="report-flush", daemon=True)
+        self.spool = spool
+        self.hub_url = hub_url
+        self.options = options
+        self.result = None
+
+    def run(self):
+        self.result = self.spool.drain(self.hub_url, **self.options)
+
+
+class ReportSpool:
+    """
+    On-disk queue of benchmark/status reports for the hub.
+
+    enqueue() only writes a file, so a run never waits on the hub; flush()
+    sends the oldest reports in batches and removes each one the hub accepted.
+    Reports stay queued across runs until a flush gets through, and the
+    spool is capped at max_bytes by dropping the oldest.
+
+        spool = ReportSpool()
+        spool.enqueue(report)
+        spool.start_flush(hub_url).join(timeout=10)
+    """
+
+    def __init__(self, path=DEFAULT_SPOOL_DIR, max_bytes=DEFAULT_MAX_BYTES, log=print):
+        """
+        :param log: Callable receiving each progress line
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.log = log
+        self._stop = threading.Event()
+        os.makedirs(path, exist_ok=True)
+
+    def _files(self, suffix):
+        return sorted(name for name in os.listdir(self.path) if name.endswith(suffix))
+
+    def pending(self):
+        """File names of reports not yet sent, oldest first."""
+        return self._files(PENDING_SUFFIX)
+
+    def rejected(self):
+        return self._files(REJECTED_SUFFIX)
+
+    def size(self):
+        total = 0
+        for name in self.pending() + self.rejected():
+            try:
+                total += os.path.getsize(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass  # sent by a concurrent flush
+        return total
+
+    def enqueue(self, report):
+        """
+        Writes a report to the spool.
+        :return: False if a report with the same hostname and timestamp is already queued
+        """
+        key = report_key(report)
+        target = os.path.join(self.path, key + PENDING_SUFFIX)
+        if os.path.exists(target) or os.path.exists(os.path.join(self.path, key + REJECTED_SUFFIX)):
+            return False
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        # Atomic, so a concurrent flush never reads a half-written report
+        os.replace(tmp, target)
+        self._enforce_cap()
+        return True
+
+    def _enforce_cap(self):
+        size = self.size()
+        dropped = 0
+        # Rejected reports go first, then the oldest pending; the newest report always stays
+        for name in self.rejected() + self.pending()[:-1]:
+            if size <= self.max_bytes:
+                break
+            path = os.path.join(self.path, name)
+            try:
+                size -= os.path.getsize(path)
+                os.remove(path)
+                dropped += 1
+            except FileNotFoundError:
+                pass
+        if dropped:
+            self.log(f"[SPOOL] Spool over {self.max_bytes} bytes; dropped {dropped} oldest report(s).")
+
+    def _lock(self):
+        """Non-blocking exclusive lock on the spool; None if another flush holds it."""
+        handle = open(os.path.join(self.path, ".lock"), "a")
+        if fcntl is None:
+            return handle
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    def flush(self, hub_url, batch_size=DEFAULT_BATCH_SIZE, timeout=REPORT_TIMEOUT):
+        """
+        Sends up to batch_size of the oldest reports, stopping at the first one
+        the hub could not take (unreachable, timeout, 5xx or 429).
+        :return: Dict with 'sent', 'rejected', 'pending' and, when the batch
+                 stopped early, 'error'
+        """
+        result = {"sent": 0, "rejected": 0}
+        lock = self._lock()
+        if lock is None:
+            return dict(result, pending=len(self.pending()), error="another flush is running")
+        try:
+            with requests.Session() as session:
+                for name in self.pending()[:batch_size]:
+                    path = os.path.join(self.path, name)
+                    try:
+                        with open(path, encoding="utf-8") as f:
+                            report = json.load(f)
+                    except FileNotFoundError:
+                        continue
+                    except json.JSONDecodeError:
+                        os.replace(path, path[:-len(PENDING_SUFFIX)] + REJECTED_SUFFIX)
+                        result["rejected"] += 1
+                        continue
+                    try:
+                        response = session.post(hub_url, json=report, timeout=timeout)
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                        result["error"] = str(e)
+                        break
+                    if response.status_code == 200:
+                        os.remove(path)
+                        result["sent"] += 1
+                    elif is_transient_status(response.status_code):
+                        result["error"] = f"HTTP {response.status_code}: {response.text}"
+                        break
+                    else:
+                        self.log(f"[SPOOL] Hub rejected report {name}: {response.text}")
+                        os.replace(path, path[:-len(PENDING_SUFFIX)] + REJECTED_SUFFIX)
+                        result["rejected"] += 1
+        finally:
+            lock.close()
+        return dict(result, pending=len(self.pending()))
+
+    def drain(self, hub_url, policy=FLUSH_RETRY_POLICY, deadline=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Flushes batch after batch until the spool is empty, backing off after
+        a failed batch; gives up after policy.attempts failures in a row, at
+        `deadline` (time.monotonic()) or when stop() is called.
+        :return: Totals of 'sent' and 'rejected', the 'pending' count and the last 'error'
+        """
+        totals = {"sent": 0, "rejected": 0, "pending": len(self.pending())}
+        failures = 0
+        while totals["pending"] and not self._stop.is_set():
+            result = self.flush(hub_url, batch_size=batch_size)
+            totals["sent"] += result["sent"]
+            totals["rejected"] += result["rejected"]
+            totals["pending"] = result["pending"]
+            if "error" not in result:
+                failures = 0
+                totals.pop("error", None)
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                continue
+            totals["error"] = result["error"]
+            failures += 1
+            if failures >= policy.attempts:
+                break
+            delay = policy.delay(failures - 1)
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+            if delay <= 0 or self._stop.wait(delay):
+                break
+        return totals
+
+    def start_flush(self, hub_url, **options):
+        """
+        Runs drain() on a daemon thread and returns the thread; its totals
+        are stored as `thread.result` once it finishes. Reports not sent
+        when the process exits stay spooled for the next run.
+        """
+        thread = _FlushThread(self, hub_url, options)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Interrupts a running drain() between batches."""
+        self._stop.set()
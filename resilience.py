@@ -0,0 +1,162 @@
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Defaults for relay I/O: a relay restart should cost a few hundred ms of
+# backoff, not a pile of 5-second timeouts.
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.2
+DEFAULT_MAX_DELAY = 5.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 10.0
+
+
+def backoff_delay(attempt, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """
+    Jittered exponential backoff ("full jitter"): a random delay between 0 and
+    base_delay * 2**attempt, capped at max_delay. Randomising the whole window
+    keeps many clients from retrying in lock-step after a relay restart.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the relay while the circuit breaker is open."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Relay unavailable (circuit open, retry in {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+class TransientHTTPError(Exception):
+    """A relay answer worth retrying (5xx or 429)."""
+
+    def __init__(self, status_code, text=""):
+        super().__init__(f"HTTP {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def is_transient_status(status_code):
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the relay is down.
+
+    closed:    calls go through; failure_threshold consecutive failures open it.
+    open:      calls are refused until reset_timeout seconds have passed.
+    half_open: one trial call is let through; success closes the circuit,
+               failure opens it again for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self):
+        """Seconds until the next call would be allowed (0 if allowed now)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(0, self._opened_at + self.reset_timeout - self.clock())
+
+    def allow(self):
+        """True if a call may go through now. In half_open, admits a single trial."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Relay circuit opened after {self.failures} failures.")
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Ends a call that proved nothing either way (e.g. a 404), freeing the half_open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class RetryPolicy:
+    """How often and how patiently to retry one operation."""
+
+    def __init__(self, attempts=DEFAULT_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+
+def retry_call(func, policy=None, retry_on=(Exception,), breaker=None, sleep=time.sleep, on_retry=None):
+    """
+    Calls func() until it succeeds, retrying the exceptions in retry_on with
+    jittered exponential backoff. With a breaker, every outcome is recorded and
+    CircuitOpenError is raised instead of calling func while it is open.
+    Only use for idempotent operations (e.g. sends keyed by correlation ID).
+    :param on_retry: Optional callback(attempt, exception, delay) before each sleep
+    :return: func()'s return value; re-raises the last exception when out of attempts
+    """
+    policy = policy or RetryPolicy()
+    for attempt in range(policy.attempts):
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(breaker.retry_after())
+        try:
+            result = func()
+        except retry_on as e:
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt == policy.attempts - 1:
+                raise
+            delay = policy.delay(attempt)
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            sleep(delay)
+            continue
+        except BaseException:
+            # Neither proof the relay is up nor down, but the half_open trial must be freed
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
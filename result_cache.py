@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agentforge", "results")
+# Cached executor results older than this are treated as missing
+DEFAULT_TTL = 7 * 24 * 3600
+# Least recently used entries are evicted beyond this total size
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Actions whose results only depend on their data (prompt), so replaying them is safe
+DEFAULT_CACHEABLE_ACTIONS = ("execute_agent",)
+STATS_FILE = "stats.json"
+
+
+def cache_key(action, target_agent, data):
+    """
+    Hash of (action, target_agent, normalized data). Key order and
+    whitespace of the JSON data do not matter.
+    """
+    normalized = json.dumps([action, target_agent, data if data is not None else {}],
+                            sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of executor replies, one JSON file per entry.
+
+    Entries expire after `ttl` seconds; when the directory grows beyond
+    `max_bytes` the least recently used entries (by file mtime, refreshed on
+    every hit) are removed. Hits, misses and the executor seconds the hits
+    saved are kept in stats.json so they add up across CLI invocations.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES,
+                 actions=DEFAULT_CACHEABLE_ACTIONS, clock=time.time):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.actions = set(actions)
+        self.clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cacheable(self, action):
+        return action in self.actions
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, action, target_agent, data):
+        """
+        :return: The cached responses, or None on a miss (absent or expired)
+        """
+        path = self._path(cache_key(action, target_agent, data))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._record(hit=False)
+            return None
+        if self.clock() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            self._record(hit=False)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self._record(hit=True, saved_seconds=entry.get("elapsed", 0))
+        return entry["responses"]
+
+    def put(self, action, target_agent, data, responses, elapsed=0):
+        """
+        Stores the responses to a command.
+        :param elapsed: Seconds the executor took; credited as saved on later hits
+        """
+        entry = {"created": self.clock(), "action": action, "target_agent": target_agent,
+                 "elapsed": elapsed, "responses": responses}
+        path = self._path(cache_key(action, target_agent, data))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            # default=dict: responses may be compact message.Message objects
+            json.dump(entry, f, default=dict)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self, now=None):
+        """Removes expired entries, then least recently used ones until under max_bytes."""
+        now = self.clock() if now is None else now
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json") or name == STATS_FILE:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes and now - mtime <= self.ttl:
+                continue
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            self._remove(os.path.join(self.cache_dir, name))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        """{'hits', 'misses', 'hit_rate', 'saved_seconds', 'entries', 'bytes'}"""
+        stats = self._load_stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        entries = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir)
+                   if n.endswith(".json") and n != STATS_FILE]
+        stats["entries"] = len(entries)
+        stats["bytes"] = sum(os.path.getsize(p) for p in entries if os.path.exists(p))
+        return stats
+
+    def _load_stats(self):
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"hits": 0, "misses": 0, "saved_seconds": 0}
+
+    def _record(self, hit, saved_seconds=0):
+        with self._lock:
+            stats = self._load_stats()
+            stats["hits" if hit else "misses"] += 1
+            stats["saved_seconds"] += saved_seconds
+            path = os.path.join(self.cache_dir, STATS_FILE)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, path)
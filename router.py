@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from client import new_correlation_id
+from cursor import OutboxCursor
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Messages requested per poll; the router needs the whole recent outbox, not a page
+POLL_LIMIT = 1000
+# How long one long-poll / stream wait is held when the transport supports it
+ROUTER_WAIT_SECONDS = 10
+# Replies nobody was waiting for yet, kept so a late wait() still finds them
+MAX_UNCLAIMED = 1000
+
+
+class _RouterBase:
+    """
+    Bookkeeping shared by the thread and asyncio routers: pending waiters keyed
+    by correlation ID and the router's own outbox cursor, so each poll only
+    decodes messages it has not examined yet.
+    """
+
+    def __init__(self, client, outbox, poll_interval):
+        self.client = client
+        self.outbox = outbox
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._unclaimed = OrderedDict()
+        self._cursor = OutboxCursor()
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def _claim(self, correlation_id):
+        """Pops a reply that arrived before anyone waited for it."""
+        return self._unclaimed.pop(correlation_id, None)
+
+    def _match(self, messages):
+        """Yields (future, message) pairs for replies a waiter is pending on."""
+        for msg in messages:
+            correlation_id = msg.get("correlation_id")
+            future = self._pending.pop(correlation_id, None)
+            if future is not None and not future.done():
+                yield future, msg
+            elif correlation_id is not None:
+                self._unclaimed[correlation_id] = msg
+                if len(self._unclaimed) > MAX_UNCLAIMED:
+                    self._unclaimed.popitem(last=False)
+
+
+class ResponseRouter(_RouterBase):
+    """
+    Routes replies from one outbox to concurrent waiters by correlation ID.
+    A single background poller thread serves every pending command, so N
+    waiters cost one poll per interval instead of N, and a waiter can only
+    ever receive the reply to its own command.
+
+        router = ResponseRouter(client, outbox="executor")
+        future = router.submit("execute_agent", {"prompt": "..."}, target_agent="executor")
+        reply = future.result(timeout=300)
+    """
+
+    def __init__(self, client, outbox="chatgpt", poll_interval=1):
+        super().__init__(client, outbox, poll_interval)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def expect(self, correlation_id):
+        """
+        Registers interest in the reply to correlation_id. Replies that arrived
+        earlier are kept in a bounded buffer, but calling this before sending
+        (as submit() does) is the only way to be sure not to miss one.
+        """
+        future = Future()
+        with self._lock:
+            msg = self._claim(correlation_id)
+            if msg is not None:
+                future.set_result(msg)
+                return future
+            self._pending[correlation_id] = future
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"router-{self.outbox}", daemon=True)
+                self._thread.start()
+        return future
+
+    def submit(self, action, data=None, target_agent="supervisor", correlation_id=None):
+        """
+        Sends a command and returns a Future resolving to its processed reply.
+        If the send fails, the Future raises ConnectionError.
+        """
+        correlation_id = correlation_id or new_correlation_id()
+        future = self.expect(correlation_id)
+        result = self.client.send_command(action, data, target_agent=target_agent, correlation_id=correlation_id)
+        if result["status"] == "error":
+            self.discard(correlation_id)
+            future.set_exception(ConnectionError(result["message"]))
+        return future
+
+    def wait(self, correlation_id, timeout=30):
+        """
+        Blocks until the reply to correlation_id arrives.
+        :return: The processed message, or None on timeout
+        """
+        with self._lock:
+            future = self._pending.get(correlation_id)
+        if future is None:
+            future = self.expect(correlation_id)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.discard(correlation_id)
+            return None
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.cancel()
+
+    def discard(self, correlation_id):
+        """Stops waiting for the reply to correlation_id."""
+        with self._lock:
+            self._pending.pop(correlation_id, None)
+
+    def _run(self):
+        waits = self.client.transport.supports_wait
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            poll_started = time.time()
+            msgs = self.client.poll_responses(limit=POLL_LIMIT, target_agent=self.outbox, cursor=self._cursor,
+                                              wait=ROUTER_WAIT_SECONDS if waits else 0)
+            with self._lock:
+                matched = list(self._match(msgs))
+            for future, msg in matched:
+                future.set_result(msg)
+            # Long-polls return as soon as there is news; only pace short polls
+            # and long-polls that failed fast.
+            if not waits or (not msgs and time.time() - poll_started < self.poll_interval):
+                self._stop.wait(self.poll_interval)
+        with self._lock:
+            self._thread = None
+
+
+class AsyncResponseRouter(_RouterBase):
+    """
+    asyncio flavour of ResponseRouter for AsyncAgentForgeClient: one poller
+    task per outbox resolves the asyncio futures of all pending commands.
+    """
+
+    def __init__(self, client, outbox="chatgpt", poll_interval=1):
+        super().__init__(client, outbox, poll_interval)
+        self._task = None
+
+    def expect(self, correlation_id):
+        future = asyncio.get_running_loop().create_future()
+        msg = self._claim(correlation_id)
+        if msg is not None:
+            future.set_result(msg)
+            return future
+        self._pending[correlation_id] = future
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    async def submit(self, action, data=None, target_agent="supervisor"):
+        """Sends a command and returns a future resolving to its processed reply."""
+        correlation_id = new_correlation_id()
+        future = self.expect(correlation_id)
+        result = await self.client.send_command(action, data, target_agent=target_agent,
+                                                correlation_id=correlation_id)
+        if result["status"] == "error":
+            self._pending.pop(correlation_id, None)
+            future.set_exception(ConnectionError(result["message"]))
+        return future
+
+    async def wait(self, correlation_id, timeout=30):
+        """Waits for the reply to correlation_id; returns None on timeout."""
+        future = self._pending.get(correlation_id) or self.expect(correlation_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(correlation_id, None)
+            return None
+
+    async def close(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while self._pending:
+            msgs = await self.client.poll_responses(limit=POLL_LIMIT, target_agent=self.outbox,
+                                                    cursor=self._cursor)
+            for future, msg in self._match(msgs):
+                future.set_result(msg)
+            if self._pending:
+                await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,295 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from client import new_correlation_id
+from router import ResponseRouter
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Priority classes, most urgent first
+PRIORITIES = {"interactive": 0, "batch": 1}
+# Commands per second and burst size per target agent
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+# Commands per agent sent but not yet answered
+DEFAULT_MAX_IN_FLIGHT = 4
+# In-flight slots per agent that batch commands may not take
+DEFAULT_INTERACTIVE_RESERVE = 1
+# A command whose reply has not arrived by then stops counting as in flight
+DEFAULT_REPLY_TIMEOUT = 600
+# Threads performing the actual sends
+SEND_WORKERS = 4
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`; one token per command.
+    A rate of None or 0 never limits.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        if not self.rate:
+            return 0
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate:
+            self._refill()
+            self.tokens -= 1
+
+
+class ScheduledCommand:
+    """
+    Handle of a submitted command. `sent` resolves to the send_command result
+    once the scheduler dispatched it; `reply` to the processed reply message
+    (ConnectionError if the send failed, TimeoutError after reply_timeout).
+    `abandoned` is set once nobody waits for the reply any more.
+    """
+
+    def __init__(self, action, data, target_agent, priority, correlation_id):
+        self.action = action
+        self.data = data
+        self.target_agent = target_agent
+        self.priority = priority
+        self.correlation_id = correlation_id
+        self.sent = Future()
+        self.reply = Future()
+        self.queued_at = None
+        self.deadline = None
+        self.abandoned = False
+
+
+def _resolve(future, result=None, error=None):
+    # The reply may race the reply_timeout expiry; the first outcome wins
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class Scheduler:
+    """
+    Client-side dispatch queue in front of send_command.
+
+    Each target agent gets a token bucket (rate limit) and a cap on commands in
+    flight, i.e. sent with their correlation ID still awaiting a reply. Queued
+    commands are dispatched interactive first, then batch, FIFO within a class,
+    and batch commands leave `interactive_reserve` in-flight slots free, so a
+    palette command is not stuck behind a queue of long execute_agent jobs.
+
+        scheduler = Scheduler(client, per_agent={"executor": {"rate": 1, "max_in_flight": 8}})
+        job = scheduler.submit("execute_agent", {"prompt": "..."}, target_agent="executor", priority="batch")
+        reply = job.reply.result(timeout=300)
+    """
+
+    def __init__(self, client, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 interactive_reserve=DEFAULT_INTERACTIVE_RESERVE, reply_timeout=DEFAULT_REPLY_TIMEOUT,
+                 per_agent=None, poll_interval=0.2, clock=time.monotonic):
+        """
+        :param client: AgentForgeClient used for sends and reply polling
+        :param rate: Commands per second per agent (None: unlimited)
+        :param burst: Commands an idle agent may receive at once
+        :param max_in_flight: Commands per agent awaiting a reply
+        :param per_agent: {agent: {"rate", "burst", "max_in_flight"}} overrides
+        :param poll_interval: Outbox poll interval of the reply routers
+        """
+        self.client = client
+        self.defaults = {"rate": rate, "burst": burst, "max_in_flight": max_in_flight}
+        self.per_agent = per_agent or {}
+        self.interactive_reserve = interactive_reserve
+        self.reply_timeout = reply_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._queues = {}
+        self._buckets = {}
+        self._in_flight = {}
+        self._routers = {}
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="scheduler-send")
+        self._thread = None
+        self._closed = False
+
+    def _limit(self, agent, name):
+        return self.per_agent.get(agent, {}).get(name, self.defaults[name])
+
+    def _bucket(self, agent):
+        if agent not in self._buckets:
+            self._buckets[agent] = TokenBucket(self._limit(agent, "rate"), self._limit(agent, "burst"), self.clock)
+        return self._buckets[agent]
+
+    def _router(self, outbox):
+        with self._cond:
+            if outbox not in self._routers:
+                self._routers[outbox] = ResponseRouter(self.client, outbox=outbox, poll_interval=self.poll_interval)
+            return self._routers[outbox]
+
+    def submit(self, action, data=None, target_agent="supervisor", priority="interactive", correlation_id=None):
+        """
+        Queues a command.
+        :param priority: "interactive" or "batch"
+        :return: ScheduledCommand
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        job = ScheduledCommand(action, data, target_agent, priority, correlation_id or new_correlation_id())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            job.queued_at = self.clock()
+            heapq.heappush(self._queues.setdefault(target_agent, []),
+                           (PRIORITIES[priority], next(self._sequence), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return job
+
+    def cancel(self, job):
+        """Removes a command that is still queued. :return: True if it was never sent"""
+        with self._cond:
+            queue = self._queues.get(job.target_agent, [])
+            for index, entry in enumerate(queue):
+                if entry[2] is job:
+                    queue.pop(index)
+                    heapq.heapify(queue)
+                    job.sent.cancel()
+                    job.reply.cancel()
+                    return True
+        return False
+
+    def abandon(self, job):
+        """
+        Stops waiting for a command's reply: a queued command is cancelled, a
+        sent one gives its in-flight slot back at once instead of holding it
+        until the reply or reply_timeout, and a late reply is ignored. For
+        fire-and-forget commands and waits the caller gave up on.
+        :return: True if the command was never sent
+        """
+        if self.cancel(job):
+            return True
+        with self._cond:
+            job.abandoned = True
+            self._in_flight.get(job.target_agent, {}).pop(job.correlation_id, None)
+            self._cond.notify()
+        self._router(self.client.reply_outbox(job.target_agent)).discard(job.correlation_id)
+        job.reply.cancel()
+        return False
+
+    def queued(self, target_agent):
+        with self._cond:
+            return len(self._queues.get(target_agent, []))
+
+    def in_flight(self, target_agent):
+        with self._cond:
+            return len(self._in_flight.get(target_agent, {}))
+
+    def _has_slot(self, agent, rank):
+        cap = max(1, self._limit(agent, "max_in_flight"))
+        if rank > PRIORITIES["interactive"]:
+            cap -= min(self.interactive_reserve, cap - 1)
+        return len(self._in_flight.get(agent, {})) < cap
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                now = self.clock()
+                wake = self._expire(now)
+                for agent, queue in self._queues.items():
+                    while queue and self._has_slot(agent, queue[0][0]):
+                        bucket = self._bucket(agent)
+                        delay = bucket.delay()
+                        if delay > 0:
+                            wake = delay if wake is None else min(wake, delay)
+                            break
+                        bucket.take()
+                        job = heapq.heappop(queue)[2]
+                        job.deadline = now + self.reply_timeout
+                        # wake was computed before this job was in flight; wake for its expiry too
+                        wake = self.reply_timeout if wake is None else min(wake, self.reply_timeout)
+                        self._in_flight.setdefault(agent, {})[job.correlation_id] = job
+                        self.client.metrics.observe("agentforge_queue_seconds", now - job.queued_at,
+                                                    priority=job.priority)
+                        self._pool.submit(self._send, job)
+                self._cond.wait(wake)
+
+    def _expire(self, now):
+        """Releases commands whose reply is overdue; returns seconds until the next deadline."""
+        wake = None
+        for agent, jobs in self._in_flight.items():
+            for correlation_id, job in list(jobs.items()):
+                if job.deadline > now:
+                    wake = job.deadline - now if wake is None else min(wake, job.deadline - now)
+                    continue
+                del jobs[correlation_id]
+                self._router(self.client.reply_outbox(agent)).discard(correlation_id)
+                _resolve(job.reply, error=FutureTimeoutError(f"No reply to {correlation_id}"))
+        return wake
+
+    def _release(self, job):
+        with self._cond:
+            self._in_flight.get(job.target_agent, {}).pop(job.correlation_id, None)
+            self._cond.notify()
+
+    def _send(self, job):
+        router = self._router(self.client.reply_outbox(job.target_agent))
+        reply = router.expect(job.correlation_id)
+        try:
+            result = self.client.send_command(job.action, job.data, target_agent=job.target_agent,
+                                              correlation_id=job.correlation_id)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        _resolve(job.sent, result)
+        if job.abandoned:
+            # Given up on while sending; abandon() may have run before expect()
+            router.discard(job.correlation_id)
+            return
+        if result["status"] == "error":
+            router.discard(job.correlation_id)
+            self._release(job)
+            _resolve(job.reply, error=ConnectionError(result["message"]))
+            return
+        reply.add_done_callback(lambda future: self._finish(job, future))
+
+    def _finish(self, job, future):
+        self._release(job)
+        if future.cancelled():
+            job.reply.cancel()
+        else:
+            _resolve(job.reply, future.result())
+
+    def close(self):
+        """Cancels queued commands and stops the dispatcher and reply routers."""
+        with self._cond:
+            self._closed = True
+            queued = [entry[2] for queue in self._queues.values() for entry in queue]
+            self._queues.clear()
+            self._cond.notify()
+        for job in queued:
+            job.sent.cancel()
+            job.reply.cancel()
+        self._pool.shutdown(wait=False)
+        for router in self._routers.values():
+            router.close()
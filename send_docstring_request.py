@@ -1,11 +1,16 @@
 
+import os
 import sys
 import json
+import logging
 import time
 from client import AgentForgeClient
 
+logging.basicConfig(level=logging.INFO)
+
 # Read the code to document
-with open("/home/tommaso/projects/antigravity_integration/client.py", "r") as f:
+# pipeline.py does this for a whole project, concurrently and resumably
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "client.py"), "r") as f:
     code_content = f.read()
 
 prompt = f"""
@@ -26,7 +31,7 @@ if result['status'] == 'error':
 
 print("Waiting for response (up to 120s)...")
 # Executor writes to 'executor' outbox
-response = client.wait_for_response(timeout_seconds=120, target_agent="executor")
+response = client.wait_for_response(action_id=result['correlation_id'], timeout_seconds=120, target_agent="executor")
 
 if response:
     print("Response Received:")
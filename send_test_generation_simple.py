@@ -1,42 +1,17 @@
 
+import os
 import sys
 import json
+import logging
 import time
 from client import AgentForgeClient
+from context_slicer import slice_file
 
-# Simplified code: just the send_command method to test
-code_content = """
-    def send_command(self, action, data=None, target_agent="supervisor"):
-        if data is None:
-            data = {}
-        
-        endpoint = f"{self.relay_url}/inbox/{target_agent}"
-        
-        payload = {
-            "sender": "chatgpt",
-            "payload": {
-                "action": action,
-                "data": data
-            }
-        }
-        
-        try:
-            logger.info(f"Sending action: {action} to {endpoint}")
-            response = self.session.post(endpoint, json=payload, timeout=5)
-            
-            if response.status_code in [200, 201]:
-                return {"status": "success", "message": "Command sent successfully"}
-            else:
-                return {
-                    "status": "error", 
-                    "message": f"HTTP {response.status_code}: {response.text}"
-                }
-        except requests.exceptions.ConnectionError:
-            return {"status": "error", "message": "Connection refused. Is AgentForge Relay running?"}
-        except Exception as e:
-            logger.error(f"Error sending command: {e}")
-            return {"status": "error", "message": str(e)}
-"""
+logging.basicConfig(level=logging.INFO)
+
+# Just send_command plus the imports, globals and signatures it uses
+code_content = slice_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "client.py"),
+                          "AgentForgeClient.send_command")
 
 prompt = f"""
 Generate a `pytest` unit test for the `send_command` method shown below.
@@ -58,7 +33,7 @@ if result['status'] == 'error':
     sys.exit(1)
 
 print("Waiting for response (up to 300s)...")
-response = client.wait_for_response(timeout_seconds=300, target_agent="executor")
+response = client.wait_for_response(action_id=result['correlation_id'], timeout_seconds=300, target_agent="executor")
 
 if response:
     print("Response Received:")
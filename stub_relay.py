@@ -0,0 +1,365 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import codec
+
+# Stand-in for the AgentForge Relay, used by tests and benchmarks so the
+# client can be exercised without the real relay on the Tailscale network.
+
+# Which outbox an agent writes its replies to (mirrors plugin.py --wait logic)
+REPLY_OUTBOX = {
+    "supervisor": "chatgpt",
+    "executor": "executor",
+    "planner": "planner",
+}
+
+MAX_OUTBOX_SIZE = 1000
+# Keep-alive comment interval on SSE streams
+STREAM_PING_SECONDS = 5
+
+
+class _RelayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is expected
+        pass
+
+
+class _RelayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark / test output quiet
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        encoding = self._response_encoding(len(data))
+        if encoding:
+            data = codec.compress(data, encoding)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _response_encoding(self, size):
+        """Compresses like the real relay: advertised encodings the client accepts, large bodies only."""
+        if size < codec.MIN_COMPRESS_BYTES:
+            return None
+        accepted = {e.split(";")[0].strip() for e in self.headers.get("Accept-Encoding", "").split(",")}
+        return codec.negotiate([e for e in self.server.relay.capabilities if e in accepted])
+
+    def _route(self):
+        # Accept any prefix (e.g. /agentforge/inbox/executor)
+        parts = [p for p in urlsplit(self.path).path.split("/") if p]
+        return parts
+
+    def _query(self):
+        return {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+
+    def _injected_error(self):
+        """Answers 503 for the configured fraction of inbox/outbox requests."""
+        if not self.server.relay.should_fail():
+            return False
+        self._send_json(503, {"error": "injected failure"})
+        return True
+
+    def do_GET(self):
+        relay = self.server.relay
+        relay.simulate_latency()
+        parts = self._route()
+        query = self._query()
+        since = float(query.get("since", 0))
+        if "outbox" in parts and self._injected_error():
+            return
+        if parts and parts[-1] == "healthz":
+            self._send_json(200, {"status": "ok", "capabilities": relay.capabilities})
+        elif parts[-2:] == ["api", "status"]:
+            self._send_json(200, relay.status)
+        elif len(parts) >= 3 and parts[-3] == "outbox" and parts[-1] == "stream" and "sse" in relay.capabilities:
+            self._stream(parts[-2], since)
+        elif len(parts) >= 2 and parts[-2] == "outbox":
+            after = query.get("after") if "cursor" in relay.capabilities else None
+            wait = float(query.get("wait", 0)) if "long_poll" in relay.capabilities else 0
+            if "since" in query and "long_poll" in relay.capabilities:
+                messages = relay.wait_outbox(parts[-1], since, wait, after=after)
+            else:
+                messages = relay.get_outbox(parts[-1], after=after)
+            self._send_json(200, {"messages": messages})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _stream(self, outbox, since):
+        relay = self.server.relay
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not relay.stopped:
+                messages = relay.wait_outbox(outbox, since, STREAM_PING_SECONDS)
+                if not messages:
+                    self.wfile.write(b": ping\n\n")
+                for msg in messages:
+                    since = max(since, msg["timestamp"])
+                    self.wfile.write(f"id: {msg['id']}\ndata: {json.dumps(msg)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(data)
+                data.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _decoded_body(self):
+        """Request body with its Content-Encoding removed; counts wire and decoded bytes."""
+        raw = self._read_body()
+        relay = self.server.relay
+        encoding = self.headers.get("Content-Encoding")
+        data = codec.decompress(raw, encoding) if encoding else raw
+        with relay._lock:
+            relay.bytes_received += len(raw)
+            relay.bytes_decoded += len(data)
+        return data
+
+    def do_PUT(self):
+        relay = self.server.relay
+        relay.simulate_latency()
+        parts = self._route()
+        raw = self._read_body()
+        if len(parts) >= 2 and parts[-2] == "blobs" and "blobs" in relay.capabilities:
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            if hashlib.sha256(raw).hexdigest() != parts[-1]:
+                self._send_json(400, {"error": "content does not match hash"})
+                return
+            relay.blobs[parts[-1]] = raw
+            self._send_json(201, {"status": "stored"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        relay = self.server.relay
+        relay.simulate_latency()
+        parts = self._route()
+        try:
+            raw = self._decoded_body()
+        except ValueError:
+            self._send_json(400, {"error": "invalid content encoding"})
+            return
+        if "inbox" in parts and self._injected_error():
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+        if len(parts) >= 3 and parts[-3] == "inbox" and parts[-1] == "batch" and "batch" in relay.capabilities:
+            for message in body.get("messages", []):
+                relay.deliver(parts[-2], message)
+            self._send_json(200, {"status": "queued", "count": len(body.get("messages", []))})
+        elif len(parts) >= 2 and parts[-2] == "inbox":
+            relay.deliver(parts[-1], body)
+            self._send_json(200, {"status": "queued"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class StubRelay:
+    """
+    In-process HTTP relay implementing the /inbox, /outbox and /healthz endpoints.
+    When auto_reply is enabled, every inbox message gets an echo reply in the
+    outbox of the target agent, so send -> wait round-trips complete.
+    latency (seconds) is added to every request to mimic the network hop.
+    With chunk_size set, base64 replies longer than that are split over
+    several outbox messages (payload_chunk.message_id / sequence / total).
+    capabilities are advertised on /healthz; drop "long_poll" / "sse" /
+    "cursor" / "batch" / "blobs" / "gzip" / "zstd" to emulate an older relay
+    that only supports short polling of the whole outbox, one command per POST
+    and uncompressed bodies.
+    Uploaded context blobs (PUT /blobs/<sha256>) are kept in `blobs`.
+    error_rate is the fraction of inbox/outbox requests answered with HTTP
+    503 (seeded by error_seed for reproducible runs).
+    seconds_per_kb delays each auto reply by that much per KiB of the inbox
+    message, a stand-in for an agent whose turnaround grows with prompt size.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, auto_reply=True, latency=0.0,
+                 capabilities=("long_poll", "sse", "cursor", "batch", "blobs") + codec.ENCODINGS, chunk_size=None,
+                 error_rate=0.0, error_seed=None, seconds_per_kb=0.0):
+        self.auto_reply = auto_reply
+        self.seconds_per_kb = seconds_per_kb
+        self.error_rate = error_rate
+        self.injected_errors = 0
+        self._random = random.Random(error_seed)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.capabilities = list(capabilities)
+        self.inboxes = {}
+        self.outboxes = {}
+        self.blobs = {}
+        # Request body bytes as received and after removing their Content-Encoding
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.status = {"status": "online", "system_message": "Stub relay", "repositories": []}
+        self.stopped = False
+        self._lock = threading.Condition()
+        self._server = _RelayServer((host, port), _RelayHandler)
+        self._server.relay = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/agentforge"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+        with self._lock:
+            self._lock.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def simulate_latency(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def should_fail(self):
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return False
+            self.injected_errors += 1
+            return True
+
+    def deliver(self, agent, message):
+        with self._lock:
+            self.inboxes.setdefault(agent, []).append(message)
+        if not self.auto_reply:
+            return
+        if self.seconds_per_kb > 0:
+            delay = self.seconds_per_kb * len(json.dumps(message)) / 1024
+            timer = threading.Timer(delay, self.push_reply, (agent, message))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.push_reply(agent, message)
+
+    def push_reply(self, agent, message):
+        payload = message.get("payload", {})
+        result = {"echo": payload.get("action"), "data": payload.get("data")}
+        self.push_result(agent, json.dumps(result).encode("utf-8"), ref_id=message.get("id"),
+                         recipient=message.get("sender"))
+
+    def push_result(self, agent, data, ref_id=None, recipient="chatgpt"):
+        """Publishes raw result bytes from `agent`, chunked when larger than chunk_size."""
+        encoded = base64.b64encode(data).decode("ascii")
+        size = self.chunk_size or len(encoded) or 1
+        pieces = [encoded[i:i + size] for i in range(0, len(encoded), size)] or [""]
+        payload_id = str(uuid.uuid4())
+        for sequence, piece in enumerate(pieces):
+            chunk = {"content": piece, "is_base64": True}
+            if len(pieces) > 1:
+                chunk.update({"message_id": payload_id, "sequence": sequence, "total": len(pieces)})
+            reply = {
+                "id": payload_id if len(pieces) == 1 else str(uuid.uuid4()),
+                "timestamp": time.time(),
+                "sender": agent,
+                "recipient": recipient,
+                "ref_id": ref_id,
+                "payload": {"status": "completed"},
+                "payload_chunk": chunk,
+            }
+            self.push_outbox(REPLY_OUTBOX.get(agent, agent), reply)
+
+    def push_outbox(self, outbox, message):
+        with self._lock:
+            box = self.outboxes.setdefault(outbox, [])
+            box.append(message)
+            del box[:-MAX_OUTBOX_SIZE]
+            self._lock.notify_all()
+
+    def _after(self, outbox, after):
+        box = self.outboxes.get(outbox, [])
+        if after is not None:
+            for index, msg in enumerate(box):
+                if msg["id"] == after:
+                    return box[index + 1:]
+        # Unknown (e.g. trimmed) cursor: return everything
+        return box
+
+    def get_outbox(self, outbox, after=None):
+        with self._lock:
+            return list(self._after(outbox, after))
+
+    def wait_outbox(self, outbox, since, wait, after=None):
+        """Returns messages newer than `since`, holding up to `wait` seconds for one."""
+        deadline = time.monotonic() + wait
+        with self._lock:
+            while True:
+                newer = [m for m in self._after(outbox, after) if m["timestamp"] > since]
+                remaining = deadline - time.monotonic()
+                if newer or remaining <= 0 or self.stopped:
+                    return newer
+                self._lock.wait(remaining)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in AgentForge Relay.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5101)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of inbox/outbox requests failing with 503")
+    parser.add_argument("--chunk-size", type=int, help="Split base64 replies into chunks of this many characters")
+    parser.add_argument("--seconds-per-kb", type=float, default=0.0,
+                        help="Delay of each reply per KiB of the command it answers")
+    args = parser.parse_args()
+
+    relay = StubRelay(host=args.host, port=args.port, latency=args.latency, error_rate=args.error_rate,
+                      chunk_size=args.chunk_size, seconds_per_kb=args.seconds_per_kb).start()
+    print(f"Stub relay listening on {relay.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        relay.stop()
+
+
+if __name__ == "__main__":
+    main()
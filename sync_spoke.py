@@ -5,11 +5,24 @@ import requests
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from resilience import backoff_delay
 
 # Default Hub URL (Nativeserver Tailscale IP)
 DEFAULT_HUB_URL = "http://100.111.236.92:5000/api/status"
 MAX_RETRIES = 10
-RETRY_DELAY = 5
+# Jittered exponential backoff between attempts (windows of 0.5s, 1s, 2s, ... capped)
+# instead of a fixed 5s, so a hub restart costs seconds rather than minutes
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 5
+# Repositories cloned / pulled at the same time
+DEFAULT_JOBS = 4
+# How missing repositories are cloned; a repo's hub entry can override it with "clone"
+CLONE_STRATEGIES = ("full", "shallow", "blobless", "single-branch")
+# How existing repositories are updated; a repo's hub entry can override it with "update"
+UPDATE_MODES = ("pull", "ff-only")
+DEFAULT_SHALLOW_DEPTH = 1
 
 def get_hub_status(url):
     for attempt in range(MAX_RETRIES):
@@ -21,55 +34,214 @@ def get_hub_status(url):
         except Exception as e:
             print(f"[WARN] Connection failed: {e}")
             if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY)
+                time.sleep(backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY))
             else:
                 print(f"[ERROR] Could not connect to Hub after {MAX_RETRIES} attempts.")
                 return None
 
-def sync_repo(repo_info, base_dir, dry_run=False):
+def run_git(args, cwd=None, log=print):
+    """
+    Runs a git command with its output captured and passed to log line by
+    line, so concurrent syncs don't interleave their output (log=None: quiet).
+    """
+    # Nobody can answer a credential prompt on captured output; fail instead of hanging
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    proc = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True, env=env)
+    for line in (proc.stdout + proc.stderr).splitlines() if log else []:
+        if line.strip():
+            log(f"    {line}")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, proc.stdout, proc.stderr)
+    return proc.stdout
+
+def current_branch(target_dir):
+    """The branch checked out in target_dir; None when HEAD is detached or it is not a repository."""
+    try:
+        return run_git(["symbolic-ref", "--short", "-q", "HEAD"], cwd=target_dir, log=None).strip() or None
+    except subprocess.CalledProcessError:
+        return None
+
+def expected_commit(repo_info, target_dir):
+    """
+    The commit the spoke should be at: the hub's 'commit' for the repo when
+    it sends one, otherwise whatever the remote branch points at according to
+    a cheap ls-remote: the hub's 'branch', else the branch checked out in
+    target_dir, else the remote HEAD. None if unknown.
+    """
+    if repo_info.get('commit'):
+        return repo_info['commit']
+    branch = repo_info.get('branch') or current_branch(target_dir)
+    try:
+        output = run_git(["ls-remote", repo_info['url'], f"refs/heads/{branch}" if branch else "HEAD"], log=None)
+    except subprocess.CalledProcessError:
+        return None
+    return output.split()[0] if output.strip() else None
+
+def is_up_to_date(repo_info, target_dir):
+    """True if the local HEAD already is the expected commit, so fetch and merge can be skipped."""
+    expected = expected_commit(repo_info, target_dir)
+    if not expected:
+        return False
+    try:
+        local = run_git(["rev-parse", "HEAD"], cwd=target_dir, log=None).strip()
+    except subprocess.CalledProcessError:
+        return False
+    # Hubs may send abbreviated SHAs
+    return len(expected) >= 7 and local.startswith(expected)
+
+def clone_args(repo_info, url, target_dir, strategy="full"):
+    """
+    git clone arguments for a repo's clone strategy:
+      full          complete history
+      shallow       only the last 'depth' commits (default 1) of one branch
+      blobless      all commits and trees, file contents fetched on demand (--filter=blob:none)
+      single-branch complete history of 'branch' (or the remote HEAD) only
+    """
+    strategy = repo_info.get('clone', strategy)
+    args = ["clone"]
+    if strategy == "shallow":
+        args += ["--depth", str(repo_info.get('depth', DEFAULT_SHALLOW_DEPTH))]
+    elif strategy == "blobless":
+        args += ["--filter=blob:none"]
+    elif strategy == "single-branch":
+        args += ["--single-branch"]
+    elif strategy != "full":
+        raise ValueError(f"Unknown clone strategy: {strategy}")
+    if repo_info.get('branch'):
+        args += ["--branch", repo_info['branch']]
+    return args + [url, target_dir]
+
+def fast_forward(repo_info, target_dir, log=print):
+    """
+    Fetches and fast-forwards only: never merges, so it cannot stop on conflicts.
+    :return: False if local history diverged from the remote (working tree left untouched)
+    """
+    fetch = ["fetch", "origin"]
+    if repo_info.get('clone') == "shallow":
+        fetch += ["--depth", str(repo_info.get('depth', DEFAULT_SHALLOW_DEPTH))]
+    if repo_info.get('branch'):
+        fetch.append(repo_info['branch'])
+    run_git(fetch, cwd=target_dir, log=log)
+    try:
+        run_git(["merge", "--ff-only", "FETCH_HEAD"], cwd=target_dir, log=log)
+    except subprocess.CalledProcessError:
+        return False
+    return True
+
+def sync_repo(repo_info, base_dir, dry_run=False, log=print, force=False, clone_strategy="full",
+              update_mode="pull"):
+    """
+    Clones or updates one repository.
+    :param log: Callable receiving each output line
+    :param force: Pull even when local HEAD already matches the expected commit
+    :param clone_strategy: Default for repos whose hub entry has no "clone" (see clone_args)
+    :param update_mode: Default for repos whose hub entry has no "update": "pull" or "ff-only"
+    :return: Dict with 'name', 'status' (updated, unchanged, diverged, cloned, skipped, failed)
+             and 'duration'
+    """
     name = repo_info.get('name')
     url = repo_info.get('url')
+    started = time.time()
+    result = {"name": name or str(repo_info), "status": "failed"}
     
     if not name or not url:
-        print(f"Invalid repo info: {repo_info}")
-        return
+        log(f"Invalid repo info: {repo_info}")
+        return dict(result, duration=0.0)
 
     target_dir = os.path.join(base_dir, name)
     
     if os.path.exists(target_dir):
         # Repo exists, pull changes
-        print(f"[SYNC] Updating {name}...")
+        log(f"[SYNC] Updating {name}...")
+        result["status"] = "updated"
         if not dry_run:
             try:
                 # Check if it's a git repo
                 if not os.path.exists(os.path.join(target_dir, ".git")):
-                     print(f"[WARN] {name} exists but is not a git repo. Skipping.")
-                     return
+                     log(f"[WARN] {name} exists but is not a git repo. Skipping.")
+                     result["status"] = "skipped"
+                     return dict(result, duration=time.time() - started)
+
+                # No-op fast path: nothing to fetch when HEAD already is the hub's commit
+                if not force and is_up_to_date(repo_info, target_dir):
+                    log(f"[SYNC] {name} already up to date.")
+                    result["status"] = "unchanged"
+                    return dict(result, duration=time.time() - started)
 
                 # Stash local changes to force alignment? Or just pull?
                 # "Realign with the data sent by the server" -> implies force or fast-forward
                 # For safety, we try pull. If conflict, we might need manual intervention, 
                 # but "automatic system" implies we should maybe fail hard or stash.
                 # Let's simple pull for now.
-                subprocess.run(["git", "pull"], cwd=target_dir, check=True)
-                print(f"[SYNC] {name} updated.")
+                # "ff-only" repos fetch and fast-forward, reporting divergence instead.
+                if repo_info.get('update', update_mode) == "ff-only":
+                    if not fast_forward(repo_info, target_dir, log=log):
+                        log(f"[WARN] {name} has diverged from the remote; not fast-forwardable. Left as is.")
+                        result["status"] = "diverged"
+                        return dict(result, duration=time.time() - started)
+                else:
+                    run_git(["pull"], cwd=target_dir, log=log)
+                log(f"[SYNC] {name} updated.")
             except subprocess.CalledProcessError as e:
-                print(f"[ERROR] Failed to update {name}: {e}")
+                log(f"[ERROR] Failed to update {name}: {e}")
+                result["status"] = "failed"
     else:
         # Repo missing, clone it
-        print(f"[SYNC] Cloning {name} to {target_dir}...")
+        log(f"[SYNC] Cloning {name} to {target_dir}...")
+        result["status"] = "cloned"
         if not dry_run:
             try:
-                subprocess.run(["git", "clone", url, target_dir], check=True)
-                print(f"[SYNC] {name} cloned.")
-            except subprocess.CalledProcessError as e:
-                print(f"[ERROR] Failed to clone {name}: {e}")
+                run_git(clone_args(repo_info, url, target_dir, clone_strategy), log=log)
+                log(f"[SYNC] {name} cloned.")
+            except (subprocess.CalledProcessError, ValueError) as e:
+                log(f"[ERROR] Failed to clone {name}: {e}")
+                result["status"] = "failed"
+    return dict(result, duration=time.time() - started)
+
+def _sync_buffered(repo, base_dir, options):
+    lines = []
+    result = sync_repo(repo, base_dir, log=lines.append, **options)
+    return result, lines
+
+def sync_all(repos, base_dir, jobs=DEFAULT_JOBS, log=print, **options):
+    """
+    Syncs repositories with up to `jobs` running at once. Each repo's output
+    is buffered and logged as one block, in the hub's order.
+    :param options: Passed on to sync_repo (dry_run, force, clone_strategy, update_mode)
+    :return: One sync_repo result per repo, in the same order
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for result, lines in pool.map(lambda repo: _sync_buffered(repo, base_dir, options), repos):
+            for line in lines:
+                log(line)
+            results.append(result)
+    return results
+
+def print_summary(results, log=print):
+    width = max([len("Repository")] + [len(r["name"]) for r in results])
+    log(f"{'Repository':<{width}}  {'Status':<8}  {'Duration':>8}")
+    log(f"{'-' * width}  {'-' * 8}  {'-' * 8}")
+    for r in results:
+        log(f"{r['name']:<{width}}  {r['status']:<8}  {r['duration']:>7.2f}s")
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    log(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    touched = [r["name"] for r in results if r["status"] in ("cloned", "updated")]
+    log(f"Touched: {', '.join(touched) if touched else 'none'}")
 
 def main():
     parser = argparse.ArgumentParser(description="Synchronize Spoke repositories with Hub.")
     parser.add_argument("--hub", default=DEFAULT_HUB_URL, help="Hub status URL")
     parser.add_argument("--root", default="..", help="Root directory for projects")
     parser.add_argument("--dry-run", action="store_true", help="Preview changes without executing")
+    parser.add_argument("--force", action="store_true", help="Pull every repository, even if already at the hub's commit")
+    parser.add_argument("--clone-strategy", default="full", choices=CLONE_STRATEGIES,
+                        help="How to clone missing repos without a hub 'clone' setting")
+    parser.add_argument("--update-mode", default="pull", choices=UPDATE_MODES,
+                        help="How to update repos without a hub 'update' setting")
+    parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help="Repositories synced concurrently")
     
     args = parser.parse_args()
     
@@ -86,10 +258,13 @@ def main():
     base_dir = os.path.abspath(args.root)
     print(f"Synchronizing {len(repos)} repositories to {base_dir}...")
     
-    for repo in repos:
-        sync_repo(repo, base_dir, dry_run=args.dry_run)
+    results = sync_all(repos, base_dir, jobs=args.jobs, dry_run=args.dry_run, force=args.force,
+                       clone_strategy=args.clone_strategy, update_mode=args.update_mode)
         
     print("Synchronization complete.")
+    print_summary(results)
+    # A diverged repo was left untouched and needs manual attention
+    failed = [r["name"] for r in results if r["status"] in ("failed", "diverged")]
     
     # Run Benchmark / Reporting
     if not args.dry_run:
@@ -108,5 +283,9 @@ def main():
         else:
             print("[WARN] benchmark.py not found.")
 
+    if failed:
+        print(f"[ERROR] {len(failed)} repositories failed to sync or diverged: {', '.join(failed)}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -21,8 +21,8 @@ class TestAgentForgeClient(unittest.TestCase):
         self.assertEqual(result['status'], 'success')
         mock_post.assert_called_once()
         args, kwargs = mock_post.call_args
-        self.assertEqual(kwargs['json']['payload']['action'], "test_action")
-        self.assertEqual(kwargs['json']['payload']['data'], {"key": "value"})
+        self.assertEqual(json.loads(kwargs['data'])['payload']['action'], "test_action")
+        self.assertEqual(json.loads(kwargs['data'])['payload']['data'], {"key": "value"})
 
     @patch('requests.Session.post')
     def test_send_command_connection_error(self, mock_post):
@@ -42,7 +42,7 @@ class TestAgentForgeClient(unittest.TestCase):
         # Setup mock response
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "messages": [
                 {
                     "id": "1",
@@ -53,7 +53,7 @@ class TestAgentForgeClient(unittest.TestCase):
                     }
                 }
             ]
-        }
+        }).encode()
         mock_get.return_value = mock_response
 
         # Execute
@@ -67,7 +67,7 @@ class TestAgentForgeClient(unittest.TestCase):
     def test_poll_responses_empty(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {"messages": []}
+        mock_response.content = json.dumps({"messages": []}).encode()
         mock_get.return_value = mock_response
 
         msgs = self.client.poll_responses()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from async_client import AsyncAgentForgeClient
+from stub_relay import StubRelay
+
+
+class TestAsyncAgentForgeClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.relay = StubRelay().start()
+
+    def tearDown(self):
+        self.relay.stop()
+
+    async def test_send_and_wait_round_trip(self):
+        async with AsyncAgentForgeClient(relay_url=self.relay.url) as client:
+            result = await client.send_command("test_action", {"key": "value"}, target_agent="executor")
+            self.assertEqual(result['status'], 'success')
+
+            msgs = await client.wait_for_response(timeout_seconds=5, target_agent="executor")
+
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(msgs[0]['sender'], "executor")
+        self.assertEqual(msgs[0]['content'], {"echo": "test_action", "data": {"key": "value"}})
+
+    async def test_concurrent_commands_across_agents(self):
+        agents = ["supervisor", "executor", "planner"]
+        async with AsyncAgentForgeClient(relay_url=self.relay.url, max_connections=20) as client:
+            results = await asyncio.gather(*(
+                client.send_command("ping", {"n": i}, target_agent=agents[i % 3]) for i in range(60)
+            ))
+
+        self.assertTrue(all(r['status'] == 'success' for r in results))
+        for agent in agents:
+            self.assertEqual(len(self.relay.inboxes[agent]), 20)
+
+    async def test_send_command_connection_error(self):
+        async with AsyncAgentForgeClient(relay_url="http://127.0.0.1:9/agentforge") as client:
+            result = await client.send_command("test_action")
+
+        self.assertEqual(result['status'], 'error')
+        self.assertIn("Connection refused", result['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
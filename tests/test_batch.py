@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from client import AgentForgeClient
+from resilience import RetryPolicy
+from stub_relay import StubRelay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSendBatch(unittest.TestCase):
+    commands = [{"action": "job", "data": {"n": i}, "target_agent": ["executor", "planner"][i % 2]}
+                for i in range(250)]
+
+    def _send(self, capabilities):
+        with StubRelay(auto_reply=False, capabilities=capabilities) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            results = client.send_batch(self.commands)
+            client.close()
+            return results, relay.inboxes
+
+    def _assert_delivered(self, results, inboxes):
+        self.assertEqual(len(results), len(self.commands))
+        self.assertTrue(all(r["status"] == "success" for r in results))
+        self.assertEqual(len({r["correlation_id"] for r in results}), len(self.commands))
+        executor_ids = [m["correlation_id"] for m in inboxes["executor"]]
+        # Results are in input order and carry the id that was sent
+        self.assertEqual(executor_ids, [r["correlation_id"] for r in results[0::2]])
+
+    def test_bulk_endpoint(self):
+        results, inboxes = self._send(("batch",))
+        self._assert_delivered(results, inboxes)
+        self.assertEqual(len(inboxes["executor"]) + len(inboxes["planner"]), 250)
+
+    def test_pipelined_fallback(self):
+        results, inboxes = self._send(())
+        self.assertEqual(len(results), 250)
+        self.assertTrue(all(r["status"] == "success" for r in results))
+        self.assertEqual(sorted(m["payload"]["data"]["n"] for m in inboxes["executor"]), list(range(0, 250, 2)))
+
+    def test_caller_correlation_ids_kept(self):
+        with StubRelay(auto_reply=False) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            results = client.send_batch([{"action": "job", "correlation_id": "mine"}])
+            client.close()
+        self.assertEqual(results[0]["correlation_id"], "mine")
+
+    def test_connection_error_per_command(self):
+        client = AgentForgeClient(relay_url="http://127.0.0.1:9/agentforge", transport="short_poll")
+        results = client.send_batch([{"action": "a"}, {"action": "b"}])
+        self.assertEqual([r["status"] for r in results], ["error", "error"])
+        self.assertTrue(all(r["correlation_id"] for r in results))
+
+    def test_bulk_read_timeout_not_resent_singly(self):
+        client = AgentForgeClient(relay_url="http://mock-relay:5000", transport="short_poll",
+                                  retry_policy=RetryPolicy(attempts=2, base_delay=0.01))
+        client._capabilities = ["batch"]
+        with patch.object(client.session, "post", side_effect=requests.exceptions.ReadTimeout("slow")) as post:
+            results = client.send_batch([{"action": "a"}, {"action": "b"}], max_workers=1)
+        client.close()
+        self.assertEqual([r["status"] for r in results], ["error", "error"])
+        # Only the bulk request, retried under one idempotency key
+        self.assertTrue(all(call.args[0].endswith("/batch") for call in post.call_args_list))
+        keys = {call.kwargs["headers"]["Idempotency-Key"] for call in post.call_args_list}
+        self.assertEqual(len(keys), 1)
+
+    def test_bulk_rejection_falls_back_to_single_sends(self):
+        client = AgentForgeClient(relay_url="http://mock-relay:5000", transport="short_poll")
+        client._capabilities = ["batch"]
+        responses = {True: MagicMock(status_code=404, text="not found"), False: MagicMock(status_code=200)}
+        with patch.object(client.session, "post", side_effect=lambda url, **kw: responses[url.endswith("/batch")]):
+            results = client.send_batch([{"action": "a"}, {"action": "b"}])
+        client.close()
+        self.assertEqual([r["status"] for r in results], ["success", "success"])
+
+
+class TestPluginBatch(unittest.TestCase):
+    def test_batch_file(self):
+        with StubRelay(auto_reply=False) as relay, tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "commands.jsonl")
+            with open(path, "w") as f:
+                for i in range(20):
+                    f.write(json.dumps({"action": "job", "data": {"n": i}, "target": "executor"}) + "\n")
+
+            proc = subprocess.run([sys.executable, "plugin.py", "--server", relay.url, "--batch", path],
+                                  cwd=REPO_ROOT, capture_output=True, text=True, timeout=60)
+
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            self.assertEqual(json.loads(proc.stdout)["sent"], 20)
+            self.assertEqual(len(relay.inboxes["executor"]), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
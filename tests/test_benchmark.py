@@ -0,0 +1,51 @@
+import logging
+import unittest
+
+import benchmark
+
+
+class TestStatistics(unittest.TestCase):
+    def test_summarize(self):
+        samples = [float(i) for i in range(1, 21)]
+        summary = benchmark.summarize(samples, nbytes=10e6)
+        self.assertEqual(summary["runs"], 20)
+        self.assertEqual(summary["median"], 10.5)
+        self.assertEqual(summary["p95"], 19.0)
+        self.assertEqual(summary["min"], 1.0)
+        self.assertAlmostEqual(summary["stddev"], 5.916, places=3)
+        self.assertAlmostEqual(summary["throughput_mb_s"], 10 / 10.5)
+
+    def test_measure_runs_warmup_untimed(self):
+        calls = []
+        samples = benchmark.measure(lambda: calls.append(1) or 0.5, warmup=2, repeat=3)
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(samples, [0.5, 0.5, 0.5])
+
+
+class TestSuite(unittest.TestCase):
+    def test_all_workloads(self):
+        suite = benchmark.run_suite(warmup=0, repeat=2)
+        self.assertEqual(suite["schema_version"], benchmark.SCHEMA_VERSION)
+        self.assertEqual(set(suite["results"]), set(benchmark.WORKLOADS))
+        for name, result in suite["results"].items():
+            self.assertEqual(result["runs"], 2, name)
+            self.assertGreater(result["median"], 0, name)
+        self.assertIn("throughput_mb_s", suite["results"]["decode_base64_json"])
+
+    def test_round_trip_restores_the_client_log_level(self):
+        logger = logging.getLogger("AntigravitySupervisorClient")
+        level = logger.level
+        logger.setLevel(logging.DEBUG)
+        try:
+            benchmark.run_suite(["client_round_trip"], warmup=0, repeat=1)
+            self.assertEqual(logger.level, logging.DEBUG)
+        finally:
+            logger.setLevel(level)
+
+    def test_unknown_workload(self):
+        with self.assertRaises(ValueError):
+            benchmark.run_suite(["nope"], warmup=0, repeat=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import base64
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+from chunks import INLINE_LIMIT, ChunkAssembler
+from client import AgentForgeClient, build_message, decode_message
+from stub_relay import StubRelay
+
+
+def make_chunks(data, size, message_id="payload-1"):
+    encoded = base64.b64encode(data).decode("ascii")
+    pieces = [encoded[i:i + size] for i in range(0, len(encoded), size)]
+    return [
+        {
+            "id": f"msg-{i}",
+            "sender": "executor",
+            "payload_chunk": {"content": piece, "is_base64": True, "message_id": message_id,
+                              "sequence": i, "total": len(pieces)},
+        }
+        for i, piece in enumerate(pieces)
+    ]
+
+
+class TestChunkAssembler(unittest.TestCase):
+    def test_in_order_reassembly(self):
+        chunks = make_chunks(json.dumps({"result": "x" * 1000}).encode(), size=101)
+        assembler = ChunkAssembler()
+
+        results = [assembler.add(c, build_message) for c in chunks]
+
+        self.assertTrue(all(r is None for r in results[:-1]))
+        self.assertEqual(results[-1]["content"], {"result": "x" * 1000})
+        self.assertEqual(len(assembler), 0)
+
+    def test_out_of_order_and_duplicate_chunks(self):
+        text = "Ünïcödé text " * 50
+        chunks = make_chunks(text.encode("utf-8"), size=30)
+        assembler = ChunkAssembler()
+        order = list(reversed(chunks)) + [chunks[0]]
+
+        results = [assembler.add(c, build_message) for c in order]
+
+        completed = [r for r in results if r is not None]
+        self.assertEqual(len(completed), 1)
+        self.assertEqual(completed[0]["content"], text)
+
+    def test_missing_chunk_times_out(self):
+        chunks = make_chunks(b"a" * 300, size=40)
+        assembler = ChunkAssembler(timeout=10)
+        for c in chunks[:-1]:
+            assembler.add(c, build_message)
+
+        assembler.expire(now=float("inf"))
+
+        self.assertEqual(len(assembler), 0)
+        self.assertEqual(assembler.expired, 1)
+
+    def test_stalled_payload_expires_without_new_chunks(self):
+        chunks = make_chunks(b"a" * 300, size=40)
+        assembler = ChunkAssembler(timeout=0.2)
+        try:
+            for c in chunks[:-1]:
+                assembler.add(c, build_message)
+            time.sleep(0.5)
+            self.assertEqual((len(assembler), assembler.expired), (0, 1))
+        finally:
+            assembler.close()
+
+    def test_large_result_streams_to_output_dir(self):
+        data = os.urandom(6 * 1024 * 1024)
+        with tempfile.TemporaryDirectory() as tmp:
+            assembler = ChunkAssembler(output_dir=tmp)
+            chunks = make_chunks(data, size=64 * 1024)
+
+            tracemalloc.start()
+            result = None
+            while chunks:
+                result = assembler.add(chunks.pop(0), build_message)
+            # Chunk list not counted: it was built before tracing started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            with open(result["content"]["path"], "rb") as f:
+                self.assertEqual(f.read(), data)
+        self.assertEqual(result["content"]["bytes"], len(data))
+        # Bounded by the in-memory spool limit plus one chunk, not 3x the payload
+        self.assertLess(peak, 2 * 1024 * 1024)
+
+    def test_hostile_message_id_stays_in_output_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = os.path.join(tmp, "out")
+            for message_id in ("../../escaped", "/tmp/escaped", ".."):
+                assembler = ChunkAssembler(output_dir=output_dir)
+                result = None
+                for c in make_chunks(b"a" * (INLINE_LIMIT + 1), size=256 * 1024, message_id=message_id):
+                    result = assembler.add(c, build_message)
+                path = result["content"]["path"]
+                self.assertEqual(os.path.dirname(os.path.abspath(path)), os.path.abspath(output_dir))
+            self.assertEqual(len(os.listdir(output_dir)), 3)
+            self.assertEqual(sorted(os.listdir(tmp)), ["out"])
+
+
+class TestResultFallback(unittest.TestCase):
+    def test_payload_result_used_when_chunk_empty(self):
+        msg = {"id": "1", "sender": "executor", "payload": {"result": "def fib(n): ...", "status": "completed"}}
+        self.assertEqual(decode_message(msg)["content"], "def fib(n): ...")
+
+
+class TestChunkedRoundTrip(unittest.TestCase):
+    def test_client_reassembles_chunked_reply(self):
+        with StubRelay(chunk_size=512) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            result = client.send_command("document", {"source": "x" * 5000}, target_agent="executor")
+            msgs = client.wait_for_response(action_id=result["correlation_id"], timeout_seconds=5,
+                                            target_agent="executor")
+            client.close()
+
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(msgs[0]["content"]["data"], {"source": "x" * 5000})
+
+    def test_client_writes_large_results_to_chunk_dir(self):
+        source = "x" * (INLINE_LIMIT + 1024)
+        with StubRelay(chunk_size=256 * 1024) as relay, tempfile.TemporaryDirectory() as tmp:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", chunk_dir=tmp)
+            result = client.send_command("document", {"source": source}, target_agent="executor")
+            msgs = client.wait_for_response(action_id=result["correlation_id"], timeout_seconds=10,
+                                            target_agent="executor")
+            client.close()
+            with open(msgs[0]["content"]["path"]) as f:
+                self.assertEqual(json.load(f)["data"], {"source": source})
+
+
+if __name__ == '__main__':
+    unittest.main()
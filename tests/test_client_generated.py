@@ -1,4 +1,5 @@
 
+import json
 import unittest
 from unittest.mock import MagicMock, patch
 from client import AgentForgeClient
@@ -21,8 +22,8 @@ class TestAgentForgeClient(unittest.TestCase):
         self.assertEqual(result['status'], 'success')
         mock_post.assert_called_once()
         args, kwargs = mock_post.call_args
-        self.assertEqual(kwargs['json']['payload']['action'], "test_action")
-        self.assertEqual(kwargs['json']['sender'], "chatgpt")
+        self.assertEqual(json.loads(kwargs['data'])['payload']['action'], "test_action")
+        self.assertEqual(json.loads(kwargs['data'])['sender'], "chatgpt")
 
     @patch('client.requests.Session.post')
     def test_send_command_connection_error(self, mock_post):
@@ -42,7 +43,7 @@ class TestAgentForgeClient(unittest.TestCase):
         # Configure mock
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "messages": [
                 {
                     "id": "1",
@@ -51,7 +52,7 @@ class TestAgentForgeClient(unittest.TestCase):
                     "payload_chunk": {"content": "dGVzdA==", "is_base64": True} # "test" base64
                 }
             ]
-        }
+        }).encode()
         mock_get.return_value = mock_response
 
         # Call method
@@ -0,0 +1,89 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import codec
+from client import AgentForgeClient
+from message import Message
+from stub_relay import StubRelay
+
+
+class TestCodec(unittest.TestCase):
+    def test_dumps_matches_stdlib(self):
+        value = {"text": "naïve ✓", "n": [1, 2.5, None, True], "big": 2 ** 70}
+        self.assertEqual(json.loads(codec.dumps(value)), value)
+        self.assertEqual(codec.loads(codec.dumps(value)), value)
+        self.assertEqual(codec.loads('{"a": 1}'), {"a": 1})
+
+    def test_dumps_writes_mappings_as_objects(self):
+        message = Message({"id": "m1", "sender": "executor"}, "hi", keep_raw=False)
+        self.assertEqual(codec.loads(codec.dumps({"m": message}))["m"]["content"], "hi")
+
+    def test_loads_raises_json_decode_error(self):
+        with self.assertRaises(json.JSONDecodeError):
+            codec.loads(b"not json")
+
+    def test_stdlib_fallback(self):
+        with patch.object(codec, "orjson", None):
+            self.assertEqual(codec.loads(codec.dumps({"a": [1, 2]})), {"a": [1, 2]})
+
+    def test_compress_round_trip(self):
+        data = b"def f():\n    return 1\n" * 500
+        for encoding in codec.ENCODINGS:
+            compressed = codec.compress(data, encoding)
+            self.assertLess(len(compressed), len(data) / 10)
+            self.assertEqual(codec.decompress(compressed, encoding), data)
+        with self.assertRaises(ValueError):
+            codec.decompress(b"garbage", "gzip")
+        with self.assertRaises(ValueError):
+            codec.compress(data, "br")
+
+    def test_negotiate(self):
+        self.assertEqual(codec.negotiate(["long_poll", "gzip"]), "gzip")
+        self.assertIsNone(codec.negotiate(["long_poll"]))
+
+
+class TestCompressedTraffic(unittest.TestCase):
+    def round_trip(self, capabilities, prompt):
+        with StubRelay(capabilities=capabilities) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="long_poll")
+            result = client.send_command("execute_agent", {"prompt": prompt}, target_agent="executor")
+            replies = client.wait_for_response(action_id=result["correlation_id"], timeout_seconds=10,
+                                               target_agent="executor")
+            self.assertEqual(replies[0]["content"]["data"]["prompt"], prompt)
+            self.assertEqual(relay.inboxes["executor"][0]["payload"]["data"]["prompt"], prompt)
+            return relay, client
+
+    def test_large_bodies_compressed_both_ways(self):
+        prompt = "import os\nprint(os.getcwd())\n" * 2000
+        relay, client = self.round_trip(("long_poll", "cursor", "gzip"), prompt)
+        self.assertLess(relay.bytes_received, relay.bytes_decoded / 5)
+        self.assertLess(client.metrics.counter("agentforge_bytes_received_total", endpoint="outbox"), len(prompt))
+
+    def test_relay_without_compression(self):
+        prompt = "import os\n" * 2000
+        relay, client = self.round_trip(("long_poll", "cursor"), prompt)
+        self.assertEqual(relay.bytes_received, relay.bytes_decoded)
+        self.assertGreater(client.metrics.counter("agentforge_bytes_received_total", endpoint="outbox"), len(prompt))
+
+    def test_small_bodies_not_compressed(self):
+        relay, _ = self.round_trip(("long_poll", "cursor", "gzip"), "hi")
+        self.assertEqual(relay.bytes_received, relay.bytes_decoded)
+
+    def test_small_bodies_serialised_once(self):
+        client = AgentForgeClient(relay_url="http://mock-relay:5000")
+        body = client._encode({"id": "cid-1"}, headers={"Idempotency-Key": "cid-1"})
+        self.assertNotIn("json", body)
+        self.assertEqual(body["data"], codec.dumps({"id": "cid-1"}))
+        self.assertEqual(body["headers"], {"Idempotency-Key": "cid-1", "Content-Type": "application/json"})
+
+    def test_corrupt_body_rejected(self):
+        with StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url)
+            response = client.session.post(f"{relay.url}/inbox/executor", data=b"garbage",
+                                           headers={"Content-Encoding": "gzip"}, timeout=5)
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import base64
+import gzip
+import hashlib
+import os
+import subprocess
+import tempfile
+import unittest
+
+from client import AgentForgeClient
+from context_packer import ContextPacker, list_project_files
+from resilience import RetryPolicy
+from stub_relay import StubRelay
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestListProjectFiles(unittest.TestCase):
+    def _make_tree(self, root):
+        _write(root, ".gitignore", "build/\n*.log\n/secret.txt\n")
+        _write(root, "src/app.py", "print('hi')\n")
+        _write(root, "build/out.bin", "x")
+        _write(root, "src/debug.log", "x")
+        _write(root, "secret.txt", "x")
+        _write(root, "src/secret.txt", "kept")
+
+    def test_fallback_walk_honours_gitignore(self):
+        with tempfile.TemporaryDirectory() as root:
+            self._make_tree(root)
+            self.assertEqual(list_project_files(root), [".gitignore", "src/app.py", "src/secret.txt"])
+
+    def test_git_checkout(self):
+        with tempfile.TemporaryDirectory() as root:
+            self._make_tree(root)
+            subprocess.run(["git", "init", "-q", root], check=True)
+            self.assertEqual(list_project_files(root), [".gitignore", "src/app.py", "src/secret.txt"])
+
+
+class TestContextPacker(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        _write(self.root, "README.md", "# Project\n")
+        _write(self.root, "src/big.py", "x = 1\n" * 2000)
+        _write(self.root, "src/copy.py", "x = 1\n" * 2000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _send(self, relay):
+        client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+        try:
+            return ContextPacker(self.root).send(client)
+        finally:
+            client.close()
+
+    def test_only_changed_files_are_uploaded(self):
+        with StubRelay(auto_reply=False) as relay:
+            first = self._send(relay)
+            self.assertEqual(first["status"], "success")
+            # Identical files share one blob; the big text file went up gzip-compressed
+            self.assertEqual(first["context"]["uploaded_blobs"], 2)
+            big = "x = 1\n" * 2000
+            self.assertEqual(relay.blobs[hashlib.sha256(big.encode()).hexdigest()], big.encode())
+            context = relay.inboxes["supervisor"][0]["payload"]["data"]["context"]
+            self.assertEqual(sorted(context["files"]), ["README.md", "src/big.py", "src/copy.py"])
+
+            self.assertEqual(self._send(relay)["context"]["uploaded_blobs"], 0)
+
+            _write(self.root, "README.md", "# Project v2\n")
+            os.remove(os.path.join(self.root, "src/copy.py"))
+            third = self._send(relay)
+            self.assertEqual(third["context"]["uploaded_blobs"], 1)
+            context = relay.inboxes["supervisor"][-1]["payload"]["data"]["context"]
+            self.assertNotIn("files", context)
+            self.assertEqual(list(context["changed"]), ["README.md"])
+            self.assertEqual(context["removed"], ["src/copy.py"])
+            self.assertEqual(context["base_id"], relay.inboxes["supervisor"][1]["payload"]["data"]["context"]
+                             ["manifest_id"])
+
+    def test_inline_blobs_without_blob_capability(self):
+        with StubRelay(auto_reply=False, capabilities=()) as relay:
+            self.assertEqual(self._send(relay)["status"], "success")
+            blobs = relay.inboxes["supervisor"][0]["payload"]["data"]["context"]["blobs"]
+            decoded = {}
+            for sha, blob in blobs.items():
+                data = base64.b64decode(blob["content"])
+                decoded[sha] = gzip.decompress(data) if blob["encoding"] == "gzip+base64" else data
+            self.assertTrue(all(hashlib.sha256(data).hexdigest() == sha for sha, data in decoded.items()))
+            self.assertEqual(len(decoded), 2)
+
+    def test_failed_send_is_not_recorded(self):
+        with StubRelay(auto_reply=False) as relay:
+            url = relay.url
+        client = AgentForgeClient(relay_url=url, transport="short_poll", retry_policy=RetryPolicy(attempts=1))
+        packer = ContextPacker(self.root)
+        result = packer.send(client)
+        client.close()
+        self.assertEqual(result["status"], "error")
+        self.assertFalse(os.path.exists(packer.manifest_path))
+        self.assertEqual(len(packer.prepare(url).new_blobs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import ast
+import unittest
+
+import bench_context_slicer
+import context_slicer
+
+SOURCE = '''import json
+import logging
+import os, sys
+from collections import OrderedDict, defaultdict
+
+# Logger used by every helper
+logger = logging.getLogger("x")
+# Seconds to wait
+TIMEOUT = 5
+UNUSED = 1
+
+
+def helper(path, timeout=TIMEOUT):
+    """Reads a file."""
+    with open(path) as f:
+        return f.read()
+
+
+def unrelated():
+    return sys.argv
+
+
+class Store:
+    """Keeps values."""
+
+    def __init__(self):
+        self.items = OrderedDict()
+
+    def load(self, path):
+        """Loads values from a JSON file."""
+        self.items.update(json.loads(helper(path)))
+        self.save()
+        logger.info("loaded")
+
+    def save(self):
+        """Writes values out."""
+        return os.getcwd()
+
+    def other(self):
+        return defaultdict(list)
+'''
+
+
+class TestContextSlicer(unittest.TestCase):
+    def test_method_slice(self):
+        text = context_slicer.slice_source(SOURCE, "Store.load")
+        ast.parse(text)
+        self.assertIn("import json\nimport logging\nfrom collections import OrderedDict\n", text)
+        self.assertNotIn("defaultdict", text)
+        self.assertNotIn("import os", text)
+        # Globals come with their comment and whatever their values use
+        self.assertIn("# Logger used by every helper\nlogger = ", text)
+        self.assertIn("TIMEOUT = 5", text)
+        self.assertNotIn("UNUSED", text)
+        # Callees as stubs, the method and constructor in full, unrelated code left out
+        self.assertIn('def helper(path, timeout=TIMEOUT):\n    """Reads a file."""\n    ...\n', text)
+        self.assertIn('    def save(self):\n        """Writes values out."""\n        ...\n', text)
+        self.assertIn("self.items = OrderedDict()", text)
+        self.assertIn('class Store:\n    """Keeps values."""\n', text)
+        self.assertNotIn("unrelated", text)
+        self.assertNotIn("def other", text)
+
+    def test_function_slice(self):
+        text = context_slicer.slice_source(SOURCE, "unrelated")
+        self.assertEqual(text, "import sys\n\n\ndef unrelated():\n    return sys.argv\n")
+
+    def test_budget_drops_lowest_priority_first(self):
+        full = context_slicer.slice_source(SOURCE, "Store.load")
+        text = context_slicer.slice_source(SOURCE, "Store.load", budget=len(full) - 1)
+        self.assertNotIn('"""Reads a file."""', text)
+        self.assertIn("def helper(path, timeout=TIMEOUT):\n    ...\n", text)
+
+        tight = context_slicer.slice_source(SOURCE, "Store.load", budget=10)
+        self.assertIn("def load(self, path):", tight)
+        self.assertIn("referenced definitions omitted", tight)
+        self.assertNotIn("def helper", tight)
+
+    def test_one_line_defs_stub_to_valid_python(self):
+        source = ('import functools\n\n\n@functools.cache\ndef f(): \'\'\'doc\'\'\'\n\n\n'
+                  'def g(a,\n      b): "x"; return 1\n\n\ndef h():\n    return f() + g(1, 2)\n')
+        text = context_slicer.slice_source(source, "h")
+        ast.parse(text)
+        self.assertIn("@functools.cache\ndef f():\n    '''doc'''\n    ...\n", text)
+        self.assertIn('def g(a,\n      b):\n    "x"\n    ...\n', text)
+
+    def test_names_bound_in_try_and_if_blocks(self):
+        source = ("import json\nimport sys\n\ntry:\n    import orjson\nexcept ImportError:\n    orjson = None\n\n"
+                  "if sys.platform == 'win32':\n    SEP = '\\\\'\nelse:\n    SEP = '/'\n\n\n"
+                  "def dumps(obj):\n    if orjson is not None:\n        return orjson.dumps(obj)\n"
+                  "    return json.dumps(obj).encode() + SEP.encode()\n")
+        text = context_slicer.slice_source(source, "dumps")
+        ast.parse(text)
+        self.assertIn("import json\nimport sys\n", text)
+        self.assertIn("try:\n    import orjson\nexcept ImportError:\n    orjson = None\n", text)
+        self.assertIn("if sys.platform == 'win32':", text)
+        self.assertIn("try:\n    import orjson", context_slicer.slice_file("codec.py", "dumps"))
+
+    def test_unknown_target(self):
+        with self.assertRaises(ValueError):
+            context_slicer.slice_source(SOURCE, "Store.nope")
+        with self.assertRaises(ValueError):
+            context_slicer.slice_source(SOURCE, "helper.inner")
+
+    def test_every_target_of_the_client_slices_to_valid_python(self):
+        with open("client.py", encoding="utf-8") as f:
+            source = f.read()
+        for target in context_slicer.targets(source):
+            ast.parse(context_slicer.slice_source(source, target))
+        sizes = bench_context_slicer.prompt_sizes("client.py")
+        whole, sliced = sizes["AgentForgeClient.send_command"]
+        self.assertLess(sliced, whole / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from client import AgentForgeClient, decode_message
+from cursor import OutboxCursor, load_cursors, save_cursors
+from stub_relay import StubRelay
+
+
+class TestOutboxCursor(unittest.TestCase):
+    def test_seen_after_advance(self):
+        cursor = OutboxCursor()
+        msg = {"id": "a", "timestamp": 1}
+        self.assertFalse(cursor.seen(msg))
+        cursor.advance(msg)
+        self.assertTrue(cursor.seen(msg))
+        self.assertEqual(cursor.last_id, "a")
+
+    def test_eviction_raises_watermark(self):
+        cursor = OutboxCursor(max_seen=2)
+        for i in range(3):
+            cursor.advance({"id": str(i), "timestamp": i})
+
+        self.assertEqual(len(cursor), 2)
+        self.assertEqual(cursor.watermark, 0)
+        # Evicted id is still treated as delivered through the watermark
+        self.assertTrue(cursor.seen({"id": "0", "timestamp": 0}))
+        self.assertFalse(cursor.seen({"id": "3", "timestamp": 3}))
+
+    def test_save_and_load_round_trip(self):
+        cursor = OutboxCursor()
+        cursor.advance({"id": "a", "timestamp": 5})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cursors.json")
+            save_cursors({"executor": cursor}, path)
+            loaded = load_cursors(path)["executor"]
+
+        self.assertEqual(loaded.last_id, "a")
+        self.assertEqual(loaded.last_timestamp, 5)
+        self.assertTrue(loaded.seen({"id": "a", "timestamp": 5}))
+
+
+class TestIncrementalPolling(unittest.TestCase):
+    def _push(self, relay, count):
+        for _ in range(count):
+            relay.push_reply("executor", {"payload": {"action": "job"}})
+
+    def _assert_incremental(self, capabilities):
+        with StubRelay(auto_reply=False, capabilities=capabilities) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            self._push(relay, 5)
+            first = client.poll_new(limit=100, target_agent="executor")
+
+            self._push(relay, 2)
+            with patch("client.decode_message", wraps=decode_message) as decode:
+                second = client.poll_new(limit=100, target_agent="executor")
+                third = client.poll_new(limit=100, target_agent="executor")
+            client.close()
+
+        self.assertEqual(len(first), 5)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(third, [])
+        # Only the two new messages were decoded
+        self.assertEqual(decode.call_count, 2)
+        self.assertFalse({m["id"] for m in first} & {m["id"] for m in second})
+
+    def test_client_side_dedup_without_relay_cursor(self):
+        self._assert_incremental(())
+
+    def test_relay_cursor(self):
+        self._assert_incremental(("cursor",))
+
+    def test_limit_leaves_rest_for_next_poll(self):
+        with StubRelay(auto_reply=False, capabilities=()) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            self._push(relay, 3)
+            first = client.poll_new(limit=2, target_agent="executor")
+            second = client.poll_new(limit=2, target_agent="executor")
+            client.close()
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
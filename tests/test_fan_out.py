@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from client import AgentForgeClient, load_routes
+from stub_relay import StubRelay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestFanOut(unittest.TestCase):
+    def test_all_policy_collects_every_reply(self):
+        with StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url)
+            arrived = []
+            result = client.fan_out("analyze_project", {"path": "."}, targets=["planner", "executor", "supervisor"],
+                                    timeout_seconds=5, on_result=lambda target, msg: arrived.append(target))
+            client.close()
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["completed"], 3)
+        self.assertEqual(sorted(arrived), ["executor", "planner", "supervisor"])
+        for target, entry in result["results"].items():
+            self.assertEqual(entry["response"]["content"]["echo"], "analyze_project", target)
+            self.assertEqual(entry["response"]["correlation_id"], entry["send_result"]["correlation_id"])
+
+    def test_first_policy_returns_without_waiting_for_the_rest(self):
+        with StubRelay(auto_reply=False) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            deliver = relay.deliver
+
+            def planner_only(agent, message):
+                deliver(agent, message)
+                if agent == "planner":
+                    relay.push_reply(agent, message)
+
+            relay.deliver = planner_only
+            result = client.fan_out("plan", targets=["planner", "executor"], timeout_seconds=5, policy="first")
+            client.close()
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["required"], 1)
+        self.assertIsNotNone(result["results"]["planner"]["response"])
+        self.assertIsNone(result["results"]["executor"]["response"])
+
+    def test_quorum_not_met_is_an_error(self):
+        with StubRelay(auto_reply=False) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            result = client.fan_out("plan", targets=["planner", "executor", "supervisor"], timeout_seconds=0.5,
+                                    policy="quorum")
+            client.close()
+        self.assertEqual(result["status"], "error")
+        self.assertEqual((result["required"], result["completed"]), (2, 0))
+        self.assertEqual(len(relay.inboxes), 3)
+
+    def test_routes_are_data(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"reviewer": "chatgpt"}, f)
+        try:
+            client = AgentForgeClient(relay_url="http://127.0.0.1:9", routes=load_routes(f.name))
+        finally:
+            os.remove(f.name)
+        self.assertEqual(client.reply_outbox("reviewer"), "chatgpt")
+        self.assertEqual(client.reply_outbox("executor"), "executor")
+        self.assertEqual(client.reply_outbox("custom"), "custom")
+
+    def test_plugin_targets(self):
+        with StubRelay() as relay:
+            proc = subprocess.run([sys.executable, "plugin.py", "--no-daemon", "--server", relay.url,
+                                   "--action", "heartbeat", "--targets", "planner,executor", "--wait", "5"],
+                                  cwd=REPO_ROOT, capture_output=True, text=True, timeout=30)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        output = json.loads(proc.stdout)
+        self.assertEqual(set(output["results"]), {"planner", "executor"})
+        self.assertIn("Reply from planner", proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
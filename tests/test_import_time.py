@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed for plugin.py before it decides what to do.
+# It is ~25 ms today; importing the client stack (requests, urllib3, ...)
+# would add well over 100 ms.
+IMPORT_BUDGET_MS = 80
+# Modules the CLI must not load until a code path needs them
+HEAVY_MODULES = {"requests", "urllib3", "client", "aiohttp", "orjson"}
+
+
+def import_times(*args):
+    """Runs python -X importtime with args; returns {module: cumulative microseconds}."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=REPO_ROOT, capture_output=True,
+                          text=True, timeout=60)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return proc, times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_plugin_import_budget(self):
+        # Best of three runs: the budget is about our imports, not a busy machine
+        best = min(import_times("-c", "import plugin")[1]["plugin"] for _ in range(3))
+        self.assertLess(best / 1000, IMPORT_BUDGET_MS)
+
+    def test_help_does_not_load_client_stack(self):
+        proc, times = import_times("plugin.py", "--help")
+        self.assertEqual(proc.returncode, 0)
+        self.assertIn("--action", proc.stdout)
+        self.assertFalse(HEAVY_MODULES & set(times), HEAVY_MODULES & set(times))
+
+    def test_argument_error_does_not_load_client_stack(self):
+        proc, times = import_times("plugin.py", "--wait", "soon")
+        self.assertEqual(proc.returncode, 2)
+        self.assertFalse(HEAVY_MODULES & set(times), HEAVY_MODULES & set(times))
+
+
+if __name__ == "__main__":
+    unittest.main()
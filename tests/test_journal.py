@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from client import AgentForgeClient
+from journal import Journal
+from stub_relay import StubRelay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def received(i, correlation_id=None):
+    return {"id": f"msg-{i}", "timestamp": 1000.0 + i, "sender": "executor", "action": None,
+            "correlation_id": correlation_id or f"cmd-{i}", "content": {"result": "x" * 200, "n": i}}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "journal.sqlite3")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_client_journals_commands_and_replies(self):
+        journal = Journal(self.path)
+        with StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", journal=journal)
+            sent = client.send_command("execute_agent", {"prompt": "fib"}, target_agent="executor")
+            client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=5, target_agent="executor")
+            # Seen again by a later poll: still journaled once
+            client.poll_responses(target_agent="executor")
+            client.close()
+
+        entries = journal.query(correlation_id=sent["correlation_id"])
+        self.assertEqual(sorted(e["direction"] for e in entries), ["received", "sent"])
+        reply = journal.query(correlation_id=sent["correlation_id"], direction="received")[0]
+        self.assertEqual(reply["action"], "execute_agent")
+        self.assertEqual(reply["message"]["content"]["echo"], "execute_agent")
+        self.assertNotIn("raw_payload", reply["message"])
+        self.assertEqual(len(journal.query(agent="executor", action="execute_agent")), 2)
+        journal.close()
+
+    def test_compact_messages_stay_encoded(self):
+        journal = Journal(self.path)
+        with StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", compact_messages=True,
+                                      journal=journal)
+            sent = client.send_command("execute_agent", {"prompt": "fib"}, target_agent="executor")
+            reply = client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=5,
+                                             target_agent="executor")[0]
+            client.close()
+        self.assertTrue(reply.encoded_content()[1])
+        entry = journal.query(correlation_id=sent["correlation_id"], direction="received")[0]
+        self.assertEqual(entry["message"]["content"]["echo"], "execute_agent")
+        self.assertNotIn("content_base64", entry["message"])
+        journal.close()
+
+    def test_compaction_by_age_and_size(self):
+        clock = FakeClock()
+        journal = Journal(self.path, max_age=100, clock=clock)
+        journal.record_received("executor", [received(i) for i in range(10)])
+        clock.now += 50
+        journal.record_received("executor", [received(i) for i in range(10, 20)])
+        clock.now += 60
+        self.assertEqual(journal.compact(), 10)
+        self.assertEqual(journal.stats()["entries"], 10)
+
+        journal.record_received("executor", [received(i) for i in range(20, 2000)])
+        journal.max_bytes = journal.size() // 2
+        journal.compact()
+        self.assertLess(journal.size(), journal.max_bytes)
+        # The oldest entries went first
+        self.assertEqual(journal.query(correlation_id="cmd-1999")[0]["message"]["id"], "msg-1999")
+        self.assertEqual(journal.query(correlation_id="cmd-10"), [])
+        journal.close()
+
+    def test_lookups_over_100k_messages(self):
+        journal = Journal(self.path)
+        for start in range(0, 100000, 5000):
+            journal.record_received("executor", [received(i) for i in range(start, start + 5000)])
+
+        started = time.perf_counter()
+        for i in range(0, 100000, 1000):
+            self.assertEqual(len(journal.query(correlation_id=f"cmd-{i}")), 1)
+        per_lookup_ms = (time.perf_counter() - started) * 1000 / 100
+        newest = journal.query(agent="executor", limit=10)
+        print(f"\n100k journal entries: {per_lookup_ms:.3f} ms per correlation ID lookup")
+        self.assertLess(per_lookup_ms, 10)
+        self.assertEqual(newest[0]["message"]["id"], "msg-99999")
+        journal.close()
+
+    def test_plugin_history(self):
+        with StubRelay() as relay:
+            proc = subprocess.run([sys.executable, "plugin.py", "--no-daemon", "--server", relay.url,
+                                   "--journal", self.path, "--action", "heartbeat", "--target", "planner",
+                                   "--wait", "5"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        correlation_id = json.loads(proc.stdout)["send_result"]["correlation_id"]
+
+        proc = subprocess.run([sys.executable, "plugin.py", "--history", "--journal", self.path,
+                               "--correlation-id", correlation_id], cwd=REPO_ROOT, capture_output=True, text=True,
+                              timeout=30)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        entries = json.loads(proc.stdout)
+        self.assertEqual([e["direction"] for e in entries], ["received", "sent"])
+        self.assertEqual(entries[0]["message"]["content"]["echo"], "heartbeat")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+
+import requests
+
+import loadgen
+from stub_relay import StubRelay
+
+
+class TestStubRelayFaults(unittest.TestCase):
+    def test_error_rate(self):
+        with StubRelay(error_rate=0.5, error_seed=1) as relay:
+            statuses = [requests.get(f"{relay.url}/outbox/chatgpt", timeout=2).status_code for _ in range(40)]
+            self.assertEqual(statuses.count(503), relay.injected_errors)
+            self.assertTrue(5 < relay.injected_errors < 35)
+            # Health and status checks are never failed
+            self.assertEqual(requests.get(f"{relay.url}/healthz", timeout=2).status_code, 200)
+            self.assertEqual(requests.get(f"{relay.url}/api/status", timeout=2).status_code, 200)
+
+
+class TestLoadgen(unittest.TestCase):
+    def test_sync_round_trips_with_chunked_replies(self):
+        with StubRelay(chunk_size=16) as relay:
+            latencies, errors, elapsed = loadgen.run_sync(relay.url, requests=30, concurrency=4, timeout=5)
+        result = loadgen.report(latencies, errors, elapsed, 30)
+        self.assertEqual(result["completed"], 30)
+        self.assertEqual(result["error_count"], 0)
+        self.assertGreater(result["requests_per_s"], 0)
+        self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["p99"])
+
+    def test_async_counts_errors(self):
+        # Every inbox/outbox request fails: all sends end up as errors
+        with StubRelay(error_rate=1.0) as relay:
+            latencies, errors, elapsed = asyncio.run(loadgen.run_async(relay.url, requests=10, concurrency=5,
+                                                                       timeout=1))
+        result = loadgen.report(latencies, errors, elapsed, 10)
+        self.assertEqual(result["completed"], 0)
+        self.assertEqual(result["errors"], {"send_error": 10})
+        self.assertNotIn("latency_ms", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
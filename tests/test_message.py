@@ -0,0 +1,65 @@
+import base64
+import json
+import unittest
+from unittest.mock import patch
+
+import bench_messages
+import message as message_module
+from client import AgentForgeClient, decode_message
+from message import Message
+from stub_relay import StubRelay
+
+
+def encoded(value):
+    return base64.b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+class TestMessage(unittest.TestCase):
+    def setUp(self):
+        self.raw = {"id": "m1", "timestamp": 5, "sender": "executor", "ref_id": "c1",
+                    "payload_chunk": {"content": encoded({"result": 42}), "is_base64": True}}
+
+    def test_dict_compatible(self):
+        message = decode_message(self.raw, compact=True)
+        self.assertIsInstance(message, Message)
+        self.assertEqual(message, decode_message(self.raw))
+        self.assertEqual(message["correlation_id"], "c1")
+        self.assertEqual(message.get("content"), {"result": 42})
+        self.assertEqual(json.loads(json.dumps(message, default=dict)), json.loads(json.dumps(decode_message(self.raw))))
+        with self.assertRaises(KeyError):
+            message["nope"]
+
+    def test_content_decoded_once_on_first_access(self):
+        with patch("message.decode_content", wraps=message_module.decode_content) as decode:
+            message = decode_message(self.raw, compact=True)
+            self.assertEqual(decode.call_count, 0)
+            self.assertEqual(message["content"], {"result": 42})
+            self.assertEqual(message.content, {"result": 42})
+            self.assertEqual(decode.call_count, 1)
+
+    def test_raw_payload_is_optional(self):
+        self.assertNotIn("raw_payload", decode_message(self.raw, compact=True, keep_raw=False))
+        self.assertNotIn("raw_payload", decode_message(self.raw, keep_raw=False))
+        self.assertIs(decode_message(self.raw, compact=True)["raw_payload"], self.raw)
+
+    def test_client_returns_compact_messages(self):
+        with StubRelay(chunk_size=64) as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", compact_messages=True,
+                                      keep_raw=False)
+            sent = client.send_command("heartbeat", {"n": 1}, target_agent="executor")
+            msgs = client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=5,
+                                            target_agent="executor")
+            client.close()
+        self.assertIsInstance(msgs[0], Message)
+        self.assertEqual(msgs[0]["content"]["echo"], "heartbeat")
+        self.assertNotIn("raw_payload", msgs[0])
+
+    def test_compact_messages_hold_less_memory(self):
+        body = bench_messages.synthetic_outbox(1000)
+        full, _ = bench_messages.retained_bytes(body)
+        compact, _ = bench_messages.retained_bytes(body, compact=True, keep_raw=False, touch=True)
+        self.assertLess(compact, full * 0.6)
+
+
+if __name__ == "__main__":
+    unittest.main()
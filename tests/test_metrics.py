@@ -0,0 +1,75 @@
+import unittest
+
+from client import AgentForgeClient
+from metrics import Metrics
+from resilience import RetryPolicy
+from stub_relay import StubRelay
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counters_summaries_and_exporters(self):
+        metrics = Metrics()
+        seen = []
+        metrics.add_hook(lambda kind, name, value, labels: seen.append((kind, name, value, labels)))
+
+        metrics.inc("requests_total", endpoint="inbox")
+        metrics.inc("requests_total", 2, endpoint="inbox")
+        metrics.observe("poll_seconds", 0.5, outbox="chatgpt")
+        metrics.observe("poll_seconds", 1.5, outbox="chatgpt")
+
+        self.assertEqual(metrics.counter("requests_total", endpoint="inbox"), 3)
+        self.assertEqual(metrics.summary("poll_seconds", outbox="chatgpt"),
+                         {"count": 2, "sum": 2.0, "min": 0.5, "max": 1.5, "mean": 1.0})
+        self.assertEqual(seen[0], ("counter", "requests_total", 1, {"endpoint": "inbox"}))
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{endpoint="inbox"} 3', text)
+        self.assertIn('poll_seconds_count{outbox="chatgpt"} 2', text)
+        self.assertEqual(metrics.to_json()["summaries"][0]["labels"], {"outbox": "chatgpt"})
+
+    def test_failing_hook_is_dropped(self):
+        metrics = Metrics()
+
+        def broken(*args):
+            raise RuntimeError("exporter down")
+
+        metrics.add_hook(broken)
+        metrics.inc("x")
+        metrics.inc("x")
+        self.assertEqual(metrics.counter("x"), 2)
+        self.assertEqual(metrics._hooks, [])
+
+
+class TestClientInstrumentation(unittest.TestCase):
+    def test_round_trip_is_instrumented(self):
+        with StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll")
+            sent = client.send_command("heartbeat", {"n": 1}, target_agent="executor")
+            msgs = client.wait_for_response(action_id=sent["correlation_id"], timeout_seconds=5,
+                                            target_agent="executor")
+            client.close()
+
+        self.assertEqual(len(msgs), 1)
+        metrics = client.metrics
+        self.assertEqual(metrics.summary("agentforge_send_seconds", inbox="executor")["count"], 1)
+        self.assertGreaterEqual(metrics.summary("agentforge_poll_seconds", outbox="executor")["count"], 1)
+        self.assertEqual(metrics.summary("agentforge_time_to_first_response_seconds", outbox="executor")["count"], 1)
+        self.assertGreaterEqual(metrics.summary("agentforge_polls_per_wait", outbox="executor")["max"], 1)
+        self.assertGreaterEqual(metrics.summary("agentforge_decode_seconds")["count"], 1)
+        self.assertGreater(metrics.counter("agentforge_bytes_sent_total", endpoint="inbox"), 0)
+        self.assertGreater(metrics.counter("agentforge_bytes_received_total", endpoint="outbox"), 0)
+
+    def test_errors_are_classified(self):
+        client = AgentForgeClient(relay_url="http://127.0.0.1:9", transport="short_poll",
+                                  retry_policy=RetryPolicy(attempts=1))
+        self.assertEqual(client.send_command("heartbeat")["status"], "error")
+        self.assertEqual(client.poll_responses(target_agent="chatgpt"), [])
+        client.close()
+
+        self.assertEqual(client.metrics.counter("agentforge_errors_total", op="send", error="connection"), 1)
+        self.assertEqual(client.metrics.counter("agentforge_errors_total", op="poll", error="connection"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
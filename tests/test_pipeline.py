@@ -0,0 +1,181 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import pipeline
+from client import AgentForgeClient
+from stub_relay import StubRelay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULE = '''import os
+
+
+def add(a, b):
+    return a + b
+
+
+@staticmethod
+def cwd():
+    return os.getcwd()
+
+
+class Greeter:
+    def hello(self):
+        return "hi"
+'''
+
+
+class ExecutorRelay(StubRelay):
+    """Replies to each prompt after `delay` seconds with the prompt's code, docstring added, in a fence."""
+
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.prompts = []
+
+    def push_reply(self, agent, message):
+        prompt = message["payload"]["data"]["prompt"]
+        self.prompts.append(prompt)
+        code = prompt.split("CODE:\n", 1)[1].split("\n\nReturn ONLY", 1)[0].rstrip("\n")
+        result = json.dumps({"result": f"```python\n\"\"\"Generated.\"\"\"\n{code}\n```"}).encode("utf-8")
+        threading.Timer(self.delay, self.push_result, (agent, result),
+                        {"ref_id": message.get("id"), "recipient": message.get("sender")}).start()
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        for path, source in (("pkg/mod.py", MODULE), ("pkg/broken.py", "def (:\n"), ("README.md", "# hi\n"),
+                             ("node_modules/x/y.py", "x = 1\n")):
+            os.makedirs(os.path.dirname(os.path.join(self.root.name, path)) or self.root.name, exist_ok=True)
+            with open(os.path.join(self.root.name, path), "w") as f:
+                f.write(source)
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def test_module_jobs(self):
+        jobs = pipeline.discover_jobs(self.root.name, "docstrings")
+        self.assertEqual([job.key for job in jobs], ["docstrings:pkg/broken.py", "docstrings:pkg/mod.py"])
+
+    def test_function_jobs(self):
+        jobs = pipeline.discover_jobs(self.root.name, "tests", granularity="function")
+        self.assertEqual([job.key for job in jobs],
+                         ["tests:pkg/mod.py::add", "tests:pkg/mod.py::cwd", "tests:pkg/mod.py::Greeter"])
+        # Test jobs carry the imports their unit uses
+        self.assertTrue(jobs[1].source.startswith("import os\n\n\n@staticmethod\ndef cwd"))
+        self.assertEqual(jobs[2].lines, (13, 15))
+        docstring_jobs = pipeline.discover_jobs(self.root.name, "docstrings", granularity="function")
+        self.assertTrue(docstring_jobs[1].source.startswith("@staticmethod\ndef cwd"))
+
+    def test_extract_code(self):
+        self.assertEqual(pipeline.extract_code({"result": "text\n```python\nx = 1\n```\nbye"}), "x = 1\n")
+        self.assertEqual(pipeline.extract_code("y = 2"), "y = 2\n")
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.out = tempfile.TemporaryDirectory()
+        for i in range(12):
+            with open(os.path.join(self.root.name, f"mod{i:02d}.py"), "w") as f:
+                f.write(MODULE)
+
+    def tearDown(self):
+        self.root.cleanup()
+        self.out.cleanup()
+
+    def run_pipeline(self, relay, jobs, **options):
+        client = AgentForgeClient(relay_url=relay.url)
+        try:
+            return pipeline.run_pipeline(client, jobs, self.root.name, self.out.name, log=lambda line: None,
+                                         **options)
+        finally:
+            client.close()
+
+    def test_concurrent_and_bounded_by_in_flight(self):
+        jobs = pipeline.discover_jobs(self.root.name, "docstrings")
+        with ExecutorRelay(delay=0.3) as relay:
+            started = time.monotonic()
+            summary = self.run_pipeline(relay, jobs, max_in_flight=4)
+            elapsed = time.monotonic() - started
+        self.assertEqual(summary["done"], 12)
+        # 12 jobs of 0.3s: 3 waves of 4 in flight, against 3.6s one at a time
+        self.assertGreater(elapsed, 0.85)
+        self.assertLess(elapsed, 2.5)
+        with open(os.path.join(self.out.name, "docstrings", "mod00.py.patch")) as f:
+            patch = f.read()
+        self.assertIn('+"""Generated."""', patch)
+        self.assertIn("--- a/mod00.py", patch)
+
+    def test_function_patches_only_touch_the_unit(self):
+        jobs = [job for job in pipeline.discover_jobs(self.root.name, "docstrings", granularity="function")
+                if job.path == "mod00.py"]
+        with ExecutorRelay() as relay:
+            self.run_pipeline(relay, jobs)
+        with open(os.path.join(self.out.name, "docstrings", "mod00.py.Greeter.patch")) as f:
+            patch = f.read()
+        self.assertIn("@@ -10,6 +10,7 @@", patch)
+
+    def test_resumes_from_checkpoint(self):
+        jobs = pipeline.discover_jobs(self.root.name, "tests")
+        checkpoint = pipeline.Checkpoint(os.path.join(self.out.name, pipeline.CHECKPOINT_NAME))
+        for job in jobs[:5]:
+            checkpoint.record(job, "done")
+        checkpoint.record(jobs[5], "failed", error="timeout")
+        with ExecutorRelay() as relay:
+            summary = self.run_pipeline(relay, jobs)
+            self.assertEqual(len(relay.prompts), 7)
+        self.assertEqual((summary["skipped"], summary["done"], summary["failed"]), (5, 7, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.out.name, "tests", "test_mod11.py")))
+
+        # A changed module is redone, the rest stay done
+        with open(os.path.join(self.root.name, "mod03.py"), "a") as f:
+            f.write("\nX = 1\n")
+        jobs = pipeline.discover_jobs(self.root.name, "tests")
+        with ExecutorRelay() as relay:
+            summary = self.run_pipeline(relay, jobs)
+        self.assertEqual((summary["skipped"], summary["done"]), (11, 1))
+
+    def test_cli_reaches_the_given_server(self):
+        with ExecutorRelay() as relay:
+            proc = subprocess.run([sys.executable, "pipeline.py", self.root.name, "--out", self.out.name,
+                                   "--server", relay.url, "--include", "mod00.py"],
+                                  cwd=REPO_ROOT, capture_output=True, text=True, timeout=60)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(json.loads(proc.stdout[proc.stdout.index("{"):])["done"], 1)
+
+    def test_bad_reply_fails_only_its_job(self):
+        jobs = pipeline.discover_jobs(self.root.name, "tests")[:3]
+        write_result = pipeline.write_result
+
+        def failing_write(job, content, root, output_dir):
+            if job is jobs[1]:
+                raise KeyError("content")
+            return write_result(job, content, root, output_dir)
+
+        with ExecutorRelay() as relay, patch("pipeline.write_result", failing_write):
+            summary = self.run_pipeline(relay, jobs)
+        self.assertEqual((summary["done"], summary["failed"]), (2, 1))
+        checkpoint = pipeline.Checkpoint(os.path.join(self.out.name, pipeline.CHECKPOINT_NAME))
+        self.assertFalse(checkpoint.is_done(jobs[1]))
+        self.assertTrue(checkpoint.is_done(jobs[2]))
+
+    def test_timeouts_recorded_as_failed(self):
+        jobs = pipeline.discover_jobs(self.root.name, "tests")[:2]
+        with ExecutorRelay(auto_reply=False) as relay:
+            summary = self.run_pipeline(relay, jobs, job_timeout=0.3)
+        self.assertEqual(summary["failed"], 2)
+        checkpoint = pipeline.Checkpoint(os.path.join(self.out.name, pipeline.CHECKPOINT_NAME))
+        self.assertFalse(checkpoint.is_done(jobs[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
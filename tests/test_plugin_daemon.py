@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from client import AgentForgeClient
+from plugin_daemon import DaemonClient, DaemonError, serve
+from stub_relay import StubRelay
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestPluginDaemon(unittest.TestCase):
+    def setUp(self):
+        self.relay = StubRelay().start()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self._tmp.name, "plugin.sock")
+        client = AgentForgeClient(relay_url=self.relay.url, transport="long_poll", compact_messages=True)
+        ready = threading.Event()
+        self.thread = threading.Thread(target=serve, args=(client, self.socket_path), kwargs={"ready": ready},
+                                       daemon=True)
+        self.thread.start()
+        self.assertTrue(ready.wait(5))
+
+    def tearDown(self):
+        daemon = DaemonClient.connect(self.socket_path)
+        if daemon is not None:
+            daemon.call("shutdown")
+            daemon.close()
+        self.thread.join(5)
+        self.relay.stop()
+        self._tmp.cleanup()
+
+    def _plugin(self, *args):
+        return subprocess.run([sys.executable, "plugin.py", "--socket", self.socket_path, *args],
+                              cwd=REPO_ROOT, capture_output=True, text=True, timeout=30)
+
+    def test_rpc_calls(self):
+        daemon = DaemonClient.connect(self.socket_path)
+        try:
+            self.assertEqual(daemon.call("ping")["relay_url"], self.relay.url)
+            result = daemon.call("request", action="heartbeat", data={"n": 1}, target_agent="executor", wait=5)
+            self.assertEqual(result["send_result"]["status"], "success")
+            self.assertEqual(result["responses"][0]["correlation_id"], result["send_result"]["correlation_id"])
+            self.assertIn('agentforge_send_seconds_count{inbox="executor"} 1', daemon.call("stats", format="prometheus"))
+            with self.assertRaises(DaemonError):
+                daemon.call("no_such_method")
+        finally:
+            daemon.close()
+
+    def test_plugin_forwards_to_daemon(self):
+        # The thin client never learns the stub's URL: only the daemon can reach the relay
+        proc = self._plugin("--action", "analyze_project", "--data", '{"path": "."}', "--wait", "5")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        output = json.loads(proc.stdout)
+        self.assertEqual(output["responses"][0]["content"]["echo"], "analyze_project")
+        self.assertEqual(self.relay.inboxes["supervisor"][0]["payload"]["data"], {"path": "."})
+
+        proc = self._plugin("--check-connection")
+        self.assertEqual(json.loads(proc.stdout), {"status": "connected", "url": self.relay.url})
+
+    def test_second_daemon_is_refused(self):
+        with self.assertRaises(RuntimeError):
+            serve(AgentForgeClient(relay_url=self.relay.url), self.socket_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import benchmark
+from report_spool import ReportSpool, report_key
+from resilience import RetryPolicy
+
+
+class _HubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        hub = self.server.hub
+        report = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status = hub.statuses.pop(0) if hub.statuses else 200
+        if status == 200:
+            hub.reports.append(report)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class StubHub:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.reports = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _HubHandler)
+        self.server.hub = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/report"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def report(timestamp, hostname="spoke-1", size=10):
+    return {"timestamp": timestamp, "hostname": hostname, "status": "online", "padding": "x" * size}
+
+
+class TestReportSpool(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.lines = []
+        self.spool = ReportSpool(self.dir.name, log=self.lines.append)
+        self.hub = StubHub()
+
+    def tearDown(self):
+        self.hub.stop()
+        self.dir.cleanup()
+
+    def test_deduplicated_by_hostname_and_timestamp(self):
+        self.assertTrue(self.spool.enqueue(report(100.5)))
+        self.assertFalse(self.spool.enqueue(report(100.5)))
+        self.assertTrue(self.spool.enqueue(report(100.5, hostname="spoke-2")))
+        self.assertNotEqual(report_key(report(100.5)), report_key(report(100.25)))
+        self.assertEqual(len(self.spool.pending()), 2)
+
+    def test_flush_sends_oldest_first_in_batches(self):
+        for timestamp in (300, 100, 200):
+            self.spool.enqueue(report(timestamp))
+        result = self.spool.flush(self.hub.url, batch_size=2)
+        self.assertEqual(result, {"sent": 2, "rejected": 0, "pending": 1})
+        self.assertEqual([r["timestamp"] for r in self.hub.reports], [100, 200])
+        self.assertEqual(self.spool.drain(self.hub.url)["pending"], 0)
+        self.assertEqual([r["timestamp"] for r in self.hub.reports], [100, 200, 300])
+
+    def test_outage_keeps_reports(self):
+        self.spool.enqueue(report(100))
+        self.hub.stop()
+        result = self.spool.drain(self.hub.url, policy=RetryPolicy(attempts=2, base_delay=0.01, max_delay=0.01))
+        self.assertEqual(result["sent"], 0)
+        self.assertEqual(result["pending"], 1)
+        self.assertIn("error", result)
+        self.hub = StubHub()
+        self.assertEqual(self.spool.drain(self.hub.url)["sent"], 1)
+        self.assertEqual(self.spool.pending(), [])
+
+    def test_transient_errors_backed_off_and_retried(self):
+        self.hub.statuses = [503, 503]
+        self.spool.enqueue(report(100))
+        result = self.spool.drain(self.hub.url, policy=RetryPolicy(attempts=5, base_delay=0.01, max_delay=0.01))
+        self.assertEqual(result, {"sent": 1, "rejected": 0, "pending": 0})
+
+    def test_rejected_reports_not_resent(self):
+        self.hub.statuses = [400]
+        self.spool.enqueue(report(100))
+        self.spool.enqueue(report(200))
+        result = self.spool.drain(self.hub.url)
+        self.assertEqual(result, {"sent": 1, "rejected": 1, "pending": 0})
+        self.assertEqual(len(self.spool.rejected()), 1)
+        self.assertFalse(self.spool.enqueue(report(100)))
+
+    def test_capped_by_dropping_oldest(self):
+        self.spool.max_bytes = 2500
+        for timestamp in range(5):
+            self.spool.enqueue(report(timestamp, size=1000))
+        self.assertEqual(len(self.spool.pending()), 2)
+        self.spool.drain(self.hub.url)
+        self.assertEqual([r["timestamp"] for r in self.hub.reports], [3, 4])
+        self.assertTrue(any("dropped" in line for line in self.lines))
+
+    def test_report_to_hub_never_blocks_on_outage(self):
+        self.hub.stop()
+        started = time.monotonic()
+        result = benchmark.report_to_hub(report(100), self.hub.url, spool=self.spool, budget=0.5)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result["pending"], 1)
+        for thread in threading.enumerate():
+            if thread.name == "report-flush":
+                thread.join(5)
+        with open(os.path.join(self.dir.name, self.spool.pending()[0]), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["timestamp"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from client import AgentForgeClient
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, backoff_delay, retry_call
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBackoff(unittest.TestCase):
+    def test_delay_within_window(self):
+        for attempt in range(8):
+            delay = backoff_delay(attempt, base_delay=0.5, max_delay=5)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(5, 0.5 * 2 ** attempt))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_half_opens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.retry_after(), 10)
+
+        clock.now = 10
+        self.assertTrue(breaker.allow())
+        # Only one trial call at a time while half open
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+class TestRetryCall(unittest.TestCase):
+    def test_retries_until_success(self):
+        func = MagicMock(side_effect=[ConnectionError(), ConnectionError(), "ok"])
+        result = retry_call(func, RetryPolicy(attempts=3), retry_on=(ConnectionError,), sleep=lambda s: None)
+        self.assertEqual(result, "ok")
+        self.assertEqual(func.call_count, 3)
+
+    def test_gives_up_after_attempts(self):
+        func = MagicMock(side_effect=ConnectionError())
+        with self.assertRaises(ConnectionError):
+            retry_call(func, RetryPolicy(attempts=2), retry_on=(ConnectionError,), sleep=lambda s: None)
+        self.assertEqual(func.call_count, 2)
+
+    def test_open_breaker_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        func = MagicMock()
+        with self.assertRaises(CircuitOpenError):
+            retry_call(func, breaker=breaker)
+        func.assert_not_called()
+
+    def test_unretried_error_frees_half_open_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        with self.assertRaises(ValueError):
+            retry_call(MagicMock(side_effect=ValueError()), retry_on=(ConnectionError,), breaker=breaker)
+        self.assertEqual(retry_call(lambda: "ok", breaker=breaker), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestClientResilience(unittest.TestCase):
+    def setUp(self):
+        self.client = AgentForgeClient(relay_url="http://mock-relay:5000", transport="short_poll",
+                                       retry_policy=RetryPolicy(attempts=3, base_delay=0.01))
+
+    @patch('client.requests.Session.post')
+    def test_send_retries_transient_errors_with_same_id(self, mock_post):
+        unavailable = MagicMock(status_code=503, text="restarting")
+        ok = MagicMock(status_code=200)
+        mock_post.side_effect = [requests.exceptions.ConnectionError("refused"), unavailable, ok]
+
+        result = self.client.send_command("test_action", correlation_id="cid-1")
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(mock_post.call_count, 3)
+        ids = {json.loads(call.kwargs['data'])['id'] for call in mock_post.call_args_list}
+        self.assertEqual(ids, {"cid-1"})
+        self.assertEqual(mock_post.call_args.kwargs['headers']['Idempotency-Key'], "cid-1")
+
+    @patch('client.requests.Session.post')
+    def test_client_errors_not_retried(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=400, text="bad request")
+        result = self.client.send_command("test_action")
+        self.assertEqual(result['status'], 'error')
+        mock_post.assert_called_once()
+
+    @patch('client.requests.Session.get')
+    def test_open_circuit_skips_polls(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+        for _ in range(self.client.breaker.failure_threshold):
+            self.client.poll_responses()
+        mock_get.reset_mock()
+
+        self.assertEqual(self.client.poll_responses(), [])
+        mock_get.assert_not_called()
+
+    @patch('client.requests.Session.get')
+    def test_half_open_poll_answered_404_frees_the_trial(self, mock_get):
+        clock = FakeClock()
+        self.client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        self.client.breaker.record_failure()
+        clock.now = 5
+        mock_get.return_value = MagicMock(status_code=404, text="no such outbox")
+        self.assertEqual(self.client.poll_responses(target_agent="nobody"), [])
+
+        mock_get.reset_mock()
+        self.client.poll_responses(target_agent="nobody")
+        mock_get.assert_called_once()
+        self.assertTrue(self.client.breaker.allow())
+
+    @patch('client.requests.Session.get')
+    def test_wait_for_response_sleeps_while_circuit_open(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+        self.client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+        start = time.time()
+        self.assertEqual(self.client.wait_for_response(timeout_seconds=1.5), [])
+
+        self.assertLess(time.time() - start, 2.5)
+        # One failed poll opened the circuit; no polling for the rest of the wait
+        self.assertEqual(mock_get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+
+from client import AgentForgeClient
+from result_cache import ResultCache, cache_key
+from stub_relay import StubRelay
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_ignores_data_key_order(self):
+        self.assertEqual(cache_key("execute_agent", "executor", {"a": 1, "b": 2}),
+                         cache_key("execute_agent", "executor", {"b": 2, "a": 1}))
+        self.assertNotEqual(cache_key("execute_agent", "executor", {"a": 1}),
+                            cache_key("execute_agent", "planner", {"a": 1}))
+
+    def test_hits_misses_and_saved_time(self):
+        cache = ResultCache(self.cache_dir)
+        self.assertIsNone(cache.get("execute_agent", "executor", {"prompt": "x"}))
+        cache.put("execute_agent", "executor", {"prompt": "x"}, [{"content": "done"}], elapsed=120)
+        self.assertEqual(cache.get("execute_agent", "executor", {"prompt": "x"}), [{"content": "done"}])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["saved_seconds"], 120)
+
+    def test_ttl(self):
+        now = [1000.0]
+        cache = ResultCache(self.cache_dir, ttl=60, clock=lambda: now[0])
+        cache.put("execute_agent", "executor", {}, ["old"])
+        path = os.path.join(self.cache_dir, cache_key("execute_agent", "executor", {}) + ".json")
+        now[0] += 30
+        self.assertEqual(cache.get("execute_agent", "executor", {}), ["old"])
+        now[0] += 31
+        self.assertIsNone(cache.get("execute_agent", "executor", {}))
+        self.assertFalse(os.path.exists(path))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.cache_dir, max_bytes=3000)
+        for i in range(3):
+            cache.put("execute_agent", "executor", {"n": i}, ["x" * 800])
+            os.utime(os.path.join(self.cache_dir, cache_key("execute_agent", "executor", {"n": i}) + ".json"),
+                     (time.time() - 100 + i, time.time() - 100 + i))
+        # Touch the oldest entry so the second one becomes least recently used
+        self.assertIsNotNone(cache.get("execute_agent", "executor", {"n": 0}))
+        cache.put("execute_agent", "executor", {"n": 3}, ["x" * 800])
+        self.assertIsNotNone(cache.get("execute_agent", "executor", {"n": 0}))
+        self.assertIsNone(cache.get("execute_agent", "executor", {"n": 1}))
+        self.assertIsNotNone(cache.get("execute_agent", "executor", {"n": 3}))
+
+
+class TestClientRequest(unittest.TestCase):
+    def test_second_request_is_served_from_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", cache=ResultCache(cache_dir))
+            data = {"prompt": "Document client.py"}
+            first = client.request("execute_agent", data, target_agent="executor", timeout_seconds=5)
+            second = client.request("execute_agent", data, target_agent="executor", timeout_seconds=5)
+            fresh = client.request("execute_agent", data, target_agent="executor", timeout_seconds=5,
+                                   use_cache=False)
+            client.close()
+            self.assertFalse(first["cached"])
+            self.assertEqual(first["responses"][0]["content"]["data"], data)
+            self.assertTrue(second["cached"])
+            self.assertEqual(second["responses"], first["responses"])
+            self.assertFalse(fresh["cached"])
+            self.assertEqual(len(relay.inboxes["executor"]), 2)
+
+    def test_non_cacheable_actions_always_run(self):
+        with tempfile.TemporaryDirectory() as cache_dir, StubRelay() as relay:
+            client = AgentForgeClient(relay_url=relay.url, transport="short_poll", cache=ResultCache(cache_dir))
+            for _ in range(2):
+                self.assertFalse(client.request("heartbeat", {}, timeout_seconds=5)["cached"])
+            client.close()
+            self.assertEqual(len(relay.inboxes["supervisor"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from async_client import AsyncAgentForgeClient
+from client import AgentForgeClient
+from router import AsyncResponseRouter, ResponseRouter
+from stub_relay import StubRelay
+
+
+class TestResponseRouter(unittest.TestCase):
+    def setUp(self):
+        self.relay = StubRelay().start()
+        self.client = AgentForgeClient(relay_url=self.relay.url)
+
+    def tearDown(self):
+        self.client.close()
+        self.relay.stop()
+
+    def test_send_command_stamps_correlation_id(self):
+        result = self.client.send_command("test_action", target_agent="executor")
+
+        sent = self.relay.inboxes["executor"][0]
+        self.assertEqual(sent["correlation_id"], result["correlation_id"])
+        self.assertEqual(sent["id"], result["correlation_id"])
+
+    def test_wait_for_response_filters_by_action_id(self):
+        first = self.client.send_command("first", target_agent="executor")
+        second = self.client.send_command("second", target_agent="executor")
+
+        msgs = self.client.wait_for_response(action_id=second["correlation_id"], timeout_seconds=5,
+                                             target_agent="executor")
+
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(msgs[0]["content"]["echo"], "second")
+        self.assertNotEqual(msgs[0]["correlation_id"], first["correlation_id"])
+
+    def test_concurrent_waiters_get_their_own_replies(self):
+        router = ResponseRouter(self.client, outbox="executor", poll_interval=0.05)
+        futures = [router.submit("job", {"n": i}, target_agent="executor") for i in range(20)]
+
+        replies = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual([r["content"]["data"]["n"] for r in replies], list(range(20)))
+        self.assertEqual(router.pending_count, 0)
+
+    def test_waiters_from_threads_share_one_poller(self):
+        router = ResponseRouter(self.client, outbox="executor", poll_interval=0.05)
+
+        def run(i):
+            result = self.client.send_command("job", {"n": i}, target_agent="executor")
+            return router.wait(result["correlation_id"], timeout=5)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            replies = list(pool.map(run, range(8)))
+
+        self.assertEqual([r["content"]["data"]["n"] for r in replies], list(range(8)))
+
+    def test_wait_times_out_without_reply(self):
+        self.relay.auto_reply = False
+        router = ResponseRouter(self.client, outbox="executor", poll_interval=0.05)
+
+        self.assertIsNone(router.wait("missing", timeout=0.2))
+        self.assertEqual(router.pending_count, 0)
+
+
+class TestAsyncResponseRouter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.relay = StubRelay().start()
+
+    def tearDown(self):
+        self.relay.stop()
+
+    async def test_concurrent_waiters(self):
+        async with AsyncAgentForgeClient(relay_url=self.relay.url) as client:
+            router = AsyncResponseRouter(client, outbox="planner", poll_interval=0.05)
+            futures = await asyncio.gather(*(router.submit("job", {"n": i}, target_agent="planner")
+                                             for i in range(30)))
+            replies = await asyncio.wait_for(asyncio.gather(*futures), 5)
+            await router.close()
+
+        self.assertEqual([r["content"]["data"]["n"] for r in replies], list(range(30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import time
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from client import AgentForgeClient
+from plugin_daemon import PluginDaemon
+from scheduler import Scheduler, TokenBucket
+from stub_relay import StubRelay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock)
+        for _ in range(2):
+            self.assertEqual(bucket.delay(), 0)
+            bucket.take()
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        clock.now = 0.5
+        self.assertEqual(bucket.delay(), 0)
+
+    def test_no_rate_never_limits(self):
+        bucket = TokenBucket(rate=None, burst=1)
+        for _ in range(10):
+            bucket.take()
+        self.assertEqual(bucket.delay(), 0)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.relay = StubRelay(auto_reply=False).start()
+        self.client = AgentForgeClient(relay_url=self.relay.url, transport="long_poll")
+
+    def tearDown(self):
+        self.scheduler.close()
+        self.client.close()
+        self.relay.stop()
+
+    def _sent(self, agent="executor"):
+        return [m["payload"]["action"] for m in self.relay.inboxes.get(agent, [])]
+
+    def _reply(self, job):
+        sent = next(m for m in self.relay.inboxes[job.target_agent] if m["id"] == job.correlation_id)
+        self.relay.push_reply(job.target_agent, sent)
+
+    def test_interactive_overtakes_batch_backlog(self):
+        self.scheduler = Scheduler(self.client, rate=None, max_in_flight=2, poll_interval=0.05)
+        batch = [self.scheduler.submit("job", {"n": i}, target_agent="executor", priority="batch") for i in range(5)]
+        batch[0].sent.result(timeout=5)
+        # One slot stays reserved for interactive commands
+        time.sleep(0.2)
+        self.assertEqual(self._sent(), ["job"])
+        self.assertEqual(self.scheduler.queued("executor"), 4)
+
+        started = time.perf_counter()
+        palette = self.scheduler.submit("heartbeat", target_agent="executor")
+        self.assertEqual(palette.sent.result(timeout=5)["status"], "success")
+        self.assertLess(time.perf_counter() - started, 1)
+        self._reply(palette)
+        self.assertEqual(palette.reply.result(timeout=5)["content"]["echo"], "heartbeat")
+
+        # A reply frees the batch job's slot for the next one
+        self._reply(batch[0])
+        batch[0].reply.result(timeout=5)
+        batch[1].sent.result(timeout=5)
+        self.assertEqual(self.scheduler.in_flight("executor"), 1)
+
+    def test_rate_limit_per_agent(self):
+        self.scheduler = Scheduler(self.client, rate=None, max_in_flight=100,
+                                   per_agent={"executor": {"rate": 20, "burst": 1}})
+        started = time.perf_counter()
+        jobs = [self.scheduler.submit("job", target_agent="executor", priority="batch") for _ in range(5)]
+        others = [self.scheduler.submit("job", target_agent="planner", priority="batch") for _ in range(5)]
+        for job in others:
+            job.sent.result(timeout=5)
+        self.assertLess(time.perf_counter() - started, 0.15)
+        for job in jobs:
+            job.sent.result(timeout=5)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.19)
+
+    def test_failed_send_frees_slot(self):
+        self.relay.stop()
+        self.scheduler = Scheduler(self.client, rate=None, max_in_flight=1)
+        self.client.retry_policy.attempts = 1
+        job = self.scheduler.submit("job", target_agent="executor")
+        self.assertEqual(job.sent.result(timeout=5)["status"], "error")
+        with self.assertRaises(ConnectionError):
+            job.reply.result(timeout=5)
+        self.assertEqual(self.scheduler.in_flight("executor"), 0)
+
+    def test_overdue_reply_expires(self):
+        self.scheduler = Scheduler(self.client, rate=None, reply_timeout=0.3)
+        job = self.scheduler.submit("job", target_agent="executor")
+        with self.assertRaises(FutureTimeoutError):
+            job.reply.result(timeout=5)
+        self.assertEqual(self.scheduler.in_flight("executor"), 0)
+
+    def test_abandoned_command_frees_slot(self):
+        self.scheduler = Scheduler(self.client, rate=None, max_in_flight=1)
+        first = self.scheduler.submit("job", target_agent="executor")
+        first.sent.result(timeout=5)
+        second = self.scheduler.submit("job", target_agent="executor")
+        self.assertFalse(self.scheduler.abandon(first))
+        self.assertEqual(second.sent.result(timeout=5)["status"], "success")
+        self.assertTrue(first.reply.cancelled())
+        # Still queued: abandoning cancels it
+        third = self.scheduler.submit("job", target_agent="executor")
+        self.assertTrue(self.scheduler.abandon(third))
+        self.assertEqual(self._sent(), ["job", "job"])
+
+    def test_daemon_fire_and_forget_does_not_hold_slots(self):
+        self.scheduler = Scheduler(self.client, rate=None)
+        daemon = PluginDaemon(self.client, scheduler=self.scheduler)
+        for _ in range(6):
+            result = daemon.request("heartbeat", target_agent="executor")
+            self.assertEqual(result["send_result"]["status"], "success")
+        result = daemon.request("heartbeat", target_agent="executor", wait=0.2)
+        self.assertEqual(result["responses"], [])
+        self.assertEqual(self.scheduler.in_flight("executor"), 0)
+
+    def test_unknown_priority(self):
+        self.scheduler = Scheduler(self.client)
+        with self.assertRaises(ValueError):
+            self.scheduler.submit("job", priority="urgent")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import sync_spoke
+
+GIT = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-c", "init.defaultBranch=main"]
+
+
+def make_remote(base, name, files=None):
+    """Creates a bare repository `name`.git under base with one commit."""
+    work = os.path.join(base, "work", name)
+    os.makedirs(work)
+    subprocess.run(GIT + ["init", "-q", work], check=True)
+    for rel_path, content in (files or {"README.md": f"# {name}\n"}).items():
+        with open(os.path.join(work, rel_path), "w") as f:
+            f.write(content)
+    subprocess.run(GIT + ["add", "-A"], cwd=work, check=True)
+    subprocess.run(GIT + ["commit", "-q", "-m", "initial"], cwd=work, check=True)
+    bare = os.path.join(base, f"{name}.git")
+    subprocess.run(GIT + ["clone", "-q", "--bare", work, bare], check=True)
+    return bare
+
+
+def disk_usage(path):
+    return sum(os.path.getsize(os.path.join(dirpath, name))
+               for dirpath, _, names in os.walk(path) for name in names)
+
+
+class TestSyncAll(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base = self._tmp.name
+        self.spoke = os.path.join(self.base, "spoke")
+        os.makedirs(self.spoke)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parallel_sync_reports_each_repo_in_order(self):
+        repos = [{"name": f"repo{i}", "url": make_remote(self.base, f"repo{i}")} for i in range(4)]
+        repos.append({"name": "missing", "url": os.path.join(self.base, "missing.git")})
+        lines = []
+        results = sync_spoke.sync_all(repos, self.spoke, jobs=4, log=lines.append)
+        self.assertEqual([r["name"] for r in results], ["repo0", "repo1", "repo2", "repo3", "missing"])
+        self.assertEqual([r["status"] for r in results], ["cloned"] * 4 + ["failed"])
+        self.assertTrue(os.path.exists(os.path.join(self.spoke, "repo3", "README.md")))
+        # Output blocks are not interleaved: each repo's lines are contiguous, in hub order
+        starts = [i for i, line in enumerate(lines) if line.startswith("[SYNC] Cloning")]
+        self.assertEqual([lines[i].split()[2] for i in starts], ["repo0", "repo1", "repo2", "repo3", "missing"])
+
+        results = sync_spoke.sync_all(repos[:4], self.spoke, jobs=4, log=lambda line: None, force=True)
+        self.assertEqual([r["status"] for r in results], ["updated"] * 4)
+
+    def _push_commit(self, name):
+        work = os.path.join(self.base, "work", name)
+        with open(os.path.join(work, "CHANGES.md"), "a") as f:
+            f.write("change\n")
+        subprocess.run(GIT + ["add", "-A"], cwd=work, check=True)
+        subprocess.run(GIT + ["commit", "-q", "-m", "change"], cwd=work, check=True)
+        subprocess.run(GIT + ["push", "-q", os.path.join(self.base, f"{name}.git"), "HEAD:main"], cwd=work,
+                       check=True)
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=work, capture_output=True, text=True).stdout.strip()
+
+    def test_unchanged_repos_are_skipped(self):
+        repos = [{"name": name, "url": make_remote(self.base, name)} for name in ("same", "moved")]
+        sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)
+        new_head = self._push_commit("moved")
+
+        # ls-remote fallback
+        results = sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)
+        self.assertEqual([r["status"] for r in results], ["unchanged", "updated"])
+        self.assertTrue(os.path.exists(os.path.join(self.spoke, "moved", "CHANGES.md")))
+
+        # Commit SHA from the hub status: no remote access at all when it matches
+        hub_repos = [{"name": "moved", "url": os.path.join(self.base, "gone.git"), "commit": new_head[:12]}]
+        self.assertEqual(sync_spoke.sync_all(hub_repos, self.spoke, log=lambda line: None)[0]["status"],
+                         "unchanged")
+
+    def test_ff_only_reports_divergence(self):
+        repos = [{"name": "proj", "url": make_remote(self.base, "proj"), "update": "ff-only"}]
+        sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)
+        self._push_commit("proj")
+        self.assertEqual(sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)[0]["status"], "updated")
+
+        self._push_commit("proj")
+        local = os.path.join(self.spoke, "proj")
+        with open(os.path.join(local, "LOCAL.md"), "w") as f:
+            f.write("local work\n")
+        subprocess.run(GIT + ["add", "-A"], cwd=local, check=True)
+        subprocess.run(GIT + ["commit", "-q", "-m", "local"], cwd=local, check=True)
+        result = sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)[0]
+        self.assertEqual(result["status"], "diverged")
+        self.assertTrue(os.path.exists(os.path.join(local, "LOCAL.md")))
+
+    def test_compares_against_the_checked_out_branch(self):
+        repos = [{"name": "proj", "url": make_remote(self.base, "proj")}]
+        work = os.path.join(self.base, "work", "proj")
+        subprocess.run(GIT + ["push", "-q", repos[0]["url"], "HEAD:dev"], cwd=work, check=True)
+        sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)
+        local = os.path.join(self.spoke, "proj")
+        subprocess.run(GIT + ["checkout", "-q", "dev"], cwd=local, check=True)
+
+        # main moved, dev did not: the dev checkout is up to date
+        self._push_commit("proj")
+        self.assertEqual(sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)[0]["status"], "unchanged")
+
+        subprocess.run(GIT + ["push", "-q", repos[0]["url"], "HEAD:dev"], cwd=work, check=True)
+        self.assertEqual(sync_spoke.sync_all(repos, self.spoke, log=lambda line: None)[0]["status"], "updated")
+        self.assertTrue(os.path.exists(os.path.join(local, "CHANGES.md")))
+
+    def test_divergence_fails_the_run(self):
+        results = [{"name": "a", "status": "unchanged", "duration": 0.1},
+                   {"name": "b", "status": "diverged", "duration": 0.1}]
+        with mock.patch.object(sys, "argv", ["sync_spoke.py", "--dry-run"]), \
+                mock.patch.object(sync_spoke, "get_hub_status", return_value={"repositories": [{"name": "a"}]}), \
+                mock.patch.object(sync_spoke, "sync_all", return_value=results), \
+                mock.patch("builtins.print"):
+            with self.assertRaises(SystemExit) as raised:
+                sync_spoke.main()
+        self.assertEqual(raised.exception.code, 1)
+
+    def test_summary_table(self):
+        lines = []
+        sync_spoke.print_summary([{"name": "a", "status": "cloned", "duration": 1.5},
+                                  {"name": "b", "status": "failed", "duration": 0.25}], log=lines.append)
+        self.assertIn("1.50s", lines[2])
+        self.assertTrue(lines[3].startswith("b ") and "failed" in lines[3])
+        self.assertEqual(lines[-2], "1 cloned, 1 failed")
+        self.assertEqual(lines[-1], "Touched: a")
+
+
+class TestCloneStrategies(unittest.TestCase):
+    """Clones a repository with a sizeable history with every strategy, reporting time and disk use."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        work = os.path.join(cls._tmp.name, "work")
+        subprocess.run(GIT + ["init", "-q", work], check=True)
+        for i in range(30):
+            with open(os.path.join(work, "data.txt"), "w") as f:
+                f.write(os.urandom(32 * 1024).hex())  # incompressible 64 KiB per revision
+            subprocess.run(GIT + ["add", "-A"], cwd=work, check=True)
+            subprocess.run(GIT + ["commit", "-q", "-m", f"revision {i}"], cwd=work, check=True)
+        bare = os.path.join(cls._tmp.name, "big.git")
+        subprocess.run(GIT + ["clone", "-q", "--bare", work, bare], check=True)
+        subprocess.run(["git", "config", "uploadpack.allowFilter", "true"], cwd=bare, check=True)
+        # file:// makes git use the pack protocol (honouring --depth / --filter) instead of hardlinks
+        cls.url = f"file://{bare}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_strategies(self):
+        measurements = {}
+        for strategy in sync_spoke.CLONE_STRATEGIES:
+            spoke = os.path.join(self._tmp.name, f"spoke-{strategy}")
+            started = time.perf_counter()
+            result = sync_spoke.sync_repo({"name": "big", "url": self.url, "clone": strategy}, spoke,
+                                          log=lambda line: None)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(result["status"], "cloned", strategy)
+            self.assertTrue(os.path.exists(os.path.join(spoke, "big", "data.txt")))
+            measurements[strategy] = (elapsed, disk_usage(os.path.join(spoke, "big", ".git")))
+
+        print()
+        for strategy, (elapsed, size) in measurements.items():
+            print(f"{strategy:<14} {elapsed * 1000:8.1f} ms {size / 1024:10.1f} KiB")
+        self.assertLess(measurements["shallow"][1], measurements["full"][1] / 5)
+        self.assertLess(measurements["blobless"][1], measurements["full"][1] / 5)
+
+    def test_shallow_clone_fast_forwards(self):
+        spoke = os.path.join(self._tmp.name, "spoke-ff")
+        repo = {"name": "big", "url": self.url, "clone": "shallow", "update": "ff-only"}
+        sync_spoke.sync_repo(repo, spoke, log=lambda line: None)
+        self.assertEqual(sync_spoke.sync_repo(repo, spoke, log=lambda line: None, force=True)["status"],
+                         "updated")
+
+
+if __name__ == "__main__":
+    unittest.main()
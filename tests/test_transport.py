@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from client import AgentForgeClient
+from stub_relay import StubRelay
+from transport import LongPollTransport, RelayStatusError, ShortPollTransport, SSETransport, _EventStream
+
+
+class TestTransportDetection(unittest.TestCase):
+    def _detect(self, capabilities):
+        with StubRelay(capabilities=capabilities) as relay:
+            client = AgentForgeClient(relay_url=relay.url)
+            transport = client.transport
+            client.close()
+        return transport
+
+    def test_prefers_sse(self):
+        self.assertIsInstance(self._detect(("long_poll", "sse")), SSETransport)
+
+    def test_long_poll_when_no_sse(self):
+        self.assertIsInstance(self._detect(("long_poll",)), LongPollTransport)
+
+    def test_falls_back_to_short_poll(self):
+        self.assertIsInstance(self._detect(()), ShortPollTransport)
+
+    def test_unreachable_relay_retries_detection(self):
+        client = AgentForgeClient(relay_url="http://127.0.0.1:9/agentforge")
+        self.assertIsInstance(client.transport, ShortPollTransport)
+        self.assertEqual(client._transport, "auto")
+
+
+class TestWaitingTransports(unittest.TestCase):
+    def setUp(self):
+        self.relay = StubRelay(auto_reply=False).start()
+
+    def tearDown(self):
+        self.relay.stop()
+
+    def _reply_later(self, delay):
+        def reply():
+            time.sleep(delay)
+            self.relay.push_reply("executor", {"id": "cid-1", "payload": {"action": "job"}})
+        threading.Thread(target=reply, daemon=True).start()
+
+    def _assert_prompt_delivery(self, transport):
+        client = AgentForgeClient(relay_url=self.relay.url, transport=transport)
+        try:
+            self._reply_later(0.3)
+            start = time.time()
+            msgs = client.wait_for_response(action_id="cid-1", timeout_seconds=5, target_agent="executor")
+            elapsed = time.time() - start
+        finally:
+            client.close()
+
+        self.assertEqual(len(msgs), 1)
+        self.assertEqual(msgs[0]["correlation_id"], "cid-1")
+        # Delivered as soon as the reply lands, not on the next 1s poll tick
+        self.assertLess(elapsed, 0.9)
+
+    def test_long_poll_delivers_without_poll_interval(self):
+        self._assert_prompt_delivery("long_poll")
+
+    def test_sse_delivers_without_poll_interval(self):
+        self._assert_prompt_delivery("sse")
+
+    def test_sse_waiters_do_not_lose_each_others_replies(self):
+        client = AgentForgeClient(relay_url=self.relay.url, transport="sse")
+        try:
+            sent = [client.send_command("job", target_agent="executor")["correlation_id"] for _ in range(2)]
+            for message in self.relay.inboxes["executor"]:
+                self.relay.push_reply("executor", message)
+            # Sequential: the first wait sees both replies and must leave the second's
+            for correlation_id in sent:
+                msgs = client.wait_for_response(action_id=correlation_id, timeout_seconds=2, target_agent="executor")
+                self.assertEqual([m["correlation_id"] for m in msgs], [correlation_id])
+
+            sent = [client.send_command("job", target_agent="executor")["correlation_id"] for _ in range(6)]
+            results = {}
+
+            def waiter(correlation_id):
+                results[correlation_id] = client.wait_for_response(action_id=correlation_id, timeout_seconds=5,
+                                                                   target_agent="executor")
+            threads = [threading.Thread(target=waiter, args=(correlation_id,)) for correlation_id in sent]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.2)
+            for message in self.relay.inboxes["executor"][2:]:
+                self.relay.push_reply("executor", message)
+            for thread in threads:
+                thread.join(10)
+            self.assertEqual({cid: [m["correlation_id"] for m in msgs] for cid, msgs in results.items()},
+                             {cid: [cid] for cid in sent})
+        finally:
+            client.close()
+
+    def test_idle_sse_stream_closes_and_reopens(self):
+        transport = SSETransport(AgentForgeClient(relay_url=self.relay.url).session, self.relay.url)
+        try:
+            self.assertEqual(transport.fetch("executor", wait=0.1, since=time.time()), [])
+            stream = transport._streams["executor"]
+            stream.idle_timeout = 0
+            self.relay.push_reply("executor", {"id": "cid-1", "payload": {"action": "job"}})
+            stream.join(5)
+            self.assertFalse(stream.is_alive())
+            self.assertEqual(len(transport.fetch("executor", wait=1, since=0)), 1)
+            self.assertIsNot(transport._streams["executor"], stream)
+        finally:
+            transport.close()
+
+    def test_sse_stream_asks_for_identity_encoding(self):
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=503)
+        stream = _EventStream(session, f"{self.relay.url}/outbox/executor/stream", since=0)
+        with self.assertRaises(RelayStatusError):
+            stream._consume()
+        self.assertEqual(session.get.call_args.kwargs["headers"]["Accept-Encoding"], "identity")
+
+    def test_long_poll_returns_empty_after_wait(self):
+        transport = LongPollTransport(AgentForgeClient(relay_url=self.relay.url).session, self.relay.url)
+        start = time.time()
+        self.assertEqual(transport.fetch("executor", wait=0.2, since=time.time()), [])
+        self.assertGreaterEqual(time.time() - start, 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,301 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+
+import codec
+from resilience import backoff_delay
+
+logger = logging.getLogger("AntigravitySupervisorClient")
+
+# Longest a single long-poll / stream wait is held open by the relay
+MAX_WAIT_SECONDS = 25
+# Backoff window for SSE reconnects after the relay drops the stream
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+# Recent stream events kept for readers; each reads from its own position
+STREAM_BUFFER_SIZE = 1000
+# A stream nobody has read for this long is closed (and reopened on demand)
+STREAM_IDLE_SECONDS = 300
+
+
+class RelayStatusError(Exception):
+    """Raised by a transport when the relay answers with a non-200 status."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _messages_from(response):
+    if response.status_code != 200:
+        raise RelayStatusError(response.status_code)
+    # API format: {"messages": [...]}
+    return codec.loads(response.content).get("messages", [])
+
+
+class ShortPollTransport:
+    """
+    One GET per poll; the relay answers immediately with the whole outbox.
+    Works against every relay version and is the fallback.
+    """
+    name = "short_poll"
+    supports_wait = False
+
+    def __init__(self, session, relay_url):
+        self.session = session
+        self.relay_url = relay_url
+
+    def fetch(self, target_agent, timeout=5, wait=0, since=0, after=None, limit=None):
+        endpoint = f"{self.relay_url}/outbox/{target_agent}"
+        if after is None:
+            return _messages_from(self.session.get(endpoint, timeout=timeout))
+        # Relays without cursor support ignore the parameter
+        return _messages_from(self.session.get(endpoint, params={"after": after}, timeout=timeout))
+
+    def close(self):
+        pass
+
+
+class LongPollTransport(ShortPollTransport):
+    """
+    GET /outbox/<agent>?wait=S&since=T[&after=ID]: the relay holds the request
+    until a message newer than T (and after message ID) exists or S seconds
+    pass, so replies are delivered as soon as they land instead of on the
+    next one-second tick.
+    """
+    name = "long_poll"
+    supports_wait = True
+
+    def fetch(self, target_agent, timeout=5, wait=0, since=0, after=None, limit=None):
+        endpoint = f"{self.relay_url}/outbox/{target_agent}"
+        wait = min(wait, MAX_WAIT_SECONDS)
+        params = {"since": since}
+        if after is not None:
+            params["after"] = after
+        if wait > 0:
+            params["wait"] = wait
+        response = self.session.get(endpoint, params=params, timeout=timeout + wait)
+        return _messages_from(response)
+
+
+def _iter_stream_lines(response, on_bytes=None):
+    """
+    Yields decoded lines as soon as they arrive. requests' iter_lines() waits
+    for a full read chunk, which would hold back small events.
+    :param on_bytes: Optional callable given the size of every chunk read
+    """
+    raw = response.raw
+    # urllib3 < 2 has no read1(); fall back to byte-wise reads
+    read = getattr(raw, "read1", None) or (lambda size: raw.read(1))
+    buffer = b""
+    while True:
+        chunk = read(8192)
+        if not chunk:
+            return
+        if on_bytes is not None:
+            on_bytes(len(chunk))
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
+
+
+class _EventStream(threading.Thread):
+    """
+    Background reader for one outbox SSE stream. Events go into a bounded
+    buffer of recent messages that every reader reads from its own position
+    (the `after` / `since` of its cursor), so concurrent waiters on one
+    outbox never consume each other's replies.
+    """
+
+    def __init__(self, session, endpoint, since, on_bytes=None, idle_timeout=STREAM_IDLE_SECONDS):
+        super().__init__(name=f"sse-{endpoint.rsplit('/', 2)[-2]}", daemon=True)
+        self.session = session
+        self.on_bytes = on_bytes
+        self.endpoint = endpoint
+        self.since = since
+        self.idle_timeout = idle_timeout
+        self.messages = deque(maxlen=STREAM_BUFFER_SIZE)
+        self.last_event_id = None
+        self._last_read = time.monotonic()
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def run(self):
+        self.failures = 0
+        while not self._stopped.is_set():
+            try:
+                self._consume()
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Outbox stream interrupted: {e}")
+                self.failures += 1
+            self._stopped.wait(backoff_delay(self.failures, RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY))
+
+    def _consume(self):
+        # Lines are read from the raw socket, past urllib3's decoding: ask for an uncompressed stream
+        headers = {"Accept": "text/event-stream", "Accept-Encoding": "identity"}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        # Read timeout is twice the relay's keep-alive interval
+        response = self.session.get(self.endpoint, params={"since": self.since}, headers=headers,
+                                    stream=True, timeout=(5, 2 * MAX_WAIT_SECONDS))
+        with response:
+            if response.status_code != 200:
+                raise RelayStatusError(response.status_code)
+            self.failures = 0
+            data_lines = []
+            for line in _iter_stream_lines(response, self.on_bytes):
+                if time.monotonic() - self._last_read > self.idle_timeout:
+                    logger.info(f"Closing idle outbox stream {self.endpoint}")
+                    self.stop()
+                if self._stopped.is_set():
+                    return
+                if not line:
+                    if data_lines:
+                        self._dispatch("\n".join(data_lines))
+                        data_lines = []
+                elif line.startswith(":"):
+                    continue  # keep-alive comment
+                elif line.startswith("id:"):
+                    self.last_event_id = line[3:].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+
+    def _dispatch(self, data):
+        try:
+            msg = codec.loads(data)
+        except json.JSONDecodeError:
+            logger.warning("Skipping malformed stream event.")
+            return
+        with self._cond:
+            self.since = max(self.since, msg.get("timestamp", 0))
+            self.messages.append(msg)
+            self._cond.notify_all()
+
+    def _newer(self, since, after):
+        if after is not None:
+            for index, msg in enumerate(self.messages):
+                if msg.get("id") == after:
+                    return list(self.messages)[index + 1:]
+        # No position, or it left the buffer: fall back to the timestamp
+        return [m for m in self.messages if m.get("timestamp", 0) > since]
+
+    def read(self, wait, since=0, after=None, limit=None):
+        """Buffered messages after the reader's position, waiting up to `wait` seconds for one."""
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                self._last_read = time.monotonic()
+                msgs = self._newer(since, after)
+                remaining = deadline - time.monotonic()
+                if msgs or remaining <= 0 or self._stopped.is_set():
+                    return msgs[:limit] if limit is not None else msgs
+                self._cond.wait(remaining)
+
+    def stop(self):
+        # The reader notices at the next event or keep-alive; closing the
+        # response from this thread would block on the in-progress read.
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+
+
+class SSETransport(ShortPollTransport):
+    """
+    GET /outbox/<agent>/stream (text/event-stream): one long-lived connection
+    per outbox, the relay pushes each message as an event. fetch() returns the
+    buffered events after the caller's position (`after`, else `since`),
+    waiting up to `wait` seconds for one, so every consumer sees every event.
+    A one-shot poll (wait=0) with no stream open is a plain GET instead.
+    Streams nobody reads for STREAM_IDLE_SECONDS close themselves.
+    Stream bodies have no Content-Length; set on_bytes to count what they carry.
+    """
+    name = "sse"
+    supports_wait = True
+    on_bytes = None
+
+    def __init__(self, session, relay_url):
+        super().__init__(session, relay_url)
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, target_agent, timeout=5, wait=0, since=0, after=None, limit=None):
+        with self._lock:
+            stream = self._streams.get(target_agent)
+            if stream is not None and stream.stopped:
+                del self._streams[target_agent]
+                stream = None
+            if stream is None:
+                if wait <= 0:
+                    return super().fetch(target_agent, timeout=timeout, after=after)
+                stream = _EventStream(self.session, f"{self.relay_url}/outbox/{target_agent}/stream", since,
+                                      on_bytes=self.on_bytes)
+                stream.start()
+                self._streams[target_agent] = stream
+        return stream.read(min(wait, MAX_WAIT_SECONDS), since=since, after=after, limit=limit)
+
+    def close(self):
+        with self._lock:
+            for stream in self._streams.values():
+                stream.stop()
+            self._streams.clear()
+
+
+TRANSPORTS = {
+    ShortPollTransport.name: ShortPollTransport,
+    LongPollTransport.name: LongPollTransport,
+    SSETransport.name: SSETransport,
+}
+
+# Best first; used when the relay advertises several
+PREFERENCE = [SSETransport.name, LongPollTransport.name, ShortPollTransport.name]
+
+
+def detect_capabilities(session, relay_url, timeout=2):
+    """
+    Reads the relay's advertised capabilities from /healthz
+    (e.g. {"status": "ok", "capabilities": ["long_poll", "sse"]}).
+    :return: List of capability names, or None if the relay was unreachable
+    """
+    try:
+        response = session.get(f"{relay_url}/healthz", timeout=timeout)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return []
+    try:
+        capabilities = response.json().get("capabilities", [])
+    except (ValueError, AttributeError):
+        return []
+    return capabilities if isinstance(capabilities, list) else []
+
+
+def create_transport(name, session, relay_url, capabilities):
+    """
+    Builds a transport by name. "auto" picks the best one in `capabilities`
+    and falls back to short polling for relays that advertise nothing.
+    :param capabilities: Result of detect_capabilities (None = relay unreachable)
+    :return: (transport, conclusive) - conclusive is False when detection
+             could not reach the relay and should be retried later
+    """
+    if name != "auto":
+        if name not in TRANSPORTS:
+            raise ValueError(f"Unknown transport '{name}'. Choose from: auto, {', '.join(TRANSPORTS)}")
+        return TRANSPORTS[name](session, relay_url), True
+
+    if capabilities is None:
+        return ShortPollTransport(session, relay_url), False
+    for candidate in PREFERENCE:
+        if candidate in capabilities:
+            logger.info(f"Using {candidate} transport for outbox polling.")
+            return TRANSPORTS[candidate](session, relay_url), True
+    return ShortPollTransport(session, relay_url), True